@@ -1,4 +1,3 @@
-import asyncio
 from dotenv import load_dotenv
 from werkzeug.exceptions import MethodNotAllowed, HTTPException, NotFound
 from flask import Flask, render_template, request
@@ -7,16 +6,13 @@ from flask_jwt_extended import JWTManager
 from utils.vector_store_setup import init_qdrant_collections
 import traceback
 from routes.action.action_controller import action
-from routes.chat.chat_controller import chat_workflow, send_chat_stream
+from routes.chat.chat_controller import chat_workflow
 from routes.copilot.copilot_controller import copilot
 from routes.data_source.data_source_controller import datasource_workflow
 from routes.flow.flow_controller import flow
 from routes.typing.powerup_controller import powerup
 from routes.api_call.api_call_controller import api_call_controller
-from shared.utils.opencopilot_utils.telemetry import (
-    log_api_call,
-    log_opensource_telemetry_data,
-)
+from shared.utils.opencopilot_utils.telemetry import log_api_call
 
 from routes.uploads.upload_controller import upload_controller
 from shared.models.opencopilot_db import create_database_schema
@@ -31,7 +27,16 @@ from routes.search.search_controller import search_workflow
 from flask_cors import CORS
 from shared.models.opencopilot_db.database_setup import engine
 from sqlalchemy.orm import sessionmaker
-from utils.llm_consts import JWT_SECRET_KEY
+from utils.llm_consts import (
+    JWT_SECRET_KEY,
+    ENABLE_CHAT_WORKERS,
+    ENABLE_PERSISTENT_EVENT_LOOP,
+    SOCKETIO_CHANNEL,
+    SOCKETIO_MESSAGE_QUEUE,
+)
+from utils.event_loop import run_coroutine
+from utils.chat_dispatcher import submit_chat
+from routes.chat.socket_chat import queue_socket_chat, run_socket_chat
 import sentry_sdk
 
 sentry_sdk.init(traces_sample_rate=1.0, profiles_sample_rate=1.0)
@@ -41,14 +46,24 @@ SessionLocal = sessionmaker(bind=engine)
 load_dotenv()
 
 create_database_schema()
-app = Flask(__name__)
+
+
+class OpenCopilotFlask(Flask):
+    def async_to_sync(self, func):
+        """Runs the async views on the worker's event loop instead of a new loop per request"""
+        if not ENABLE_PERSISTENT_EVENT_LOOP:
+            return super().async_to_sync(func)
+
+        return lambda *args, **kwargs: run_coroutine(func(*args, **kwargs))
+
+
+app = OpenCopilotFlask(__name__)
 
 # @Todo only allow for cloud and porter [for later]
 CORS(app)
 app.config["JWT_SECRET_KEY"] = JWT_SECRET_KEY  # Change this to a random secret key
 JWTManager(app)
 # CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
 
 app.after_request(log_api_call)
 
@@ -68,7 +83,14 @@ app.register_blueprint(powerup, url_prefix="/backend/powerup")
 app.register_blueprint(search_workflow, url_prefix="/backend/search")
 
 app.config.from_object(Config)
-socketio = SocketIO(app, cors_allowed_origins="*")
+# emits go through the message queue, a chat can be processed by another server or a chat worker than the one its
+# client is connected to
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    message_queue=SOCKETIO_MESSAGE_QUEUE,
+    channel=SOCKETIO_CHANNEL,
+)
 
 
 @app.errorhandler(HTTPException)
@@ -109,14 +131,7 @@ def handle_exception(error):
 @socketio.on("send_chat")
 def handle_send_chat(json_data):
     user_message = ChatInput(**json_data)
-    message = user_message.content
-    session_id = user_message.session_id
-    headers_from_json = user_message.headers
-    bot_token = user_message.bot_token
-    extra_params = user_message.extra_params or {}
-    incoming_message_id = (
-        user_message.id or None
-    )  # incoming message (assigned by the client)
+    sid = request.sid
 
     json_data = {
         "url": request.base_url,
@@ -126,17 +141,18 @@ def handle_send_chat(json_data):
         "method": "wss",
     }
 
-    asyncio.run(
-        send_chat_stream(
-            message,
-            bot_token,
-            session_id,
-            headers_from_json,
-            extra_params,
-            incoming_message_id,
-        )
+    if ENABLE_CHAT_WORKERS:
+        queue_socket_chat(sid, user_message.model_dump(by_alias=True), json_data)
+        return
+
+    def emit_to_client(event: str, data):
+        socketio.emit(event, data, to=sid)
+
+    # the chat runs on the worker's loop, the handler returns right away
+    submit_chat(
+        user_message.session_id,
+        lambda: run_socket_chat(app, user_message, emit_to_client, json_data),
     )
-    log_opensource_telemetry_data(json_data)
 
 
 init_qdrant_collections()
@@ -0,0 +1,140 @@
+"""
+Production entry point: the flask routes and the Socket.IO server as a single asgi app, served with
+
+    hypercorn --config python:hypercorn_conf asgi:application
+
+or
+
+    uvicorn asgi:application --host 0.0.0.0 --port 8002 --workers 4 --timeout-graceful-shutdown 30
+"""
+
+import asyncio
+import threading
+from typing import Any, Optional, Set, Tuple
+
+import socketio
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+from app import app
+from routes.chat.chat_dto import ChatInput
+from routes.chat.followup_service import get_follow_up_task
+from routes.chat.socket_chat import queue_socket_chat, run_socket_chat
+from utils.chat_dispatcher import dispatch_chat, get_pending_chats
+from utils.event_loop import drain_worker_loop, set_worker_loop
+from utils.get_logger import SilentException
+from utils.llm_consts import (
+    ASGI_WSGI_THREADS,
+    ENABLE_CHAT_WORKERS,
+    GRACEFUL_SHUTDOWN_TIMEOUT,
+    SOCKETIO_CHANNEL,
+    SOCKETIO_MESSAGE_QUEUE,
+)
+
+# flask-socketio's server is bound to the wsgi app, the widget only connects over websockets which need an asgi server
+sio = socketio.AsyncServer(
+    async_mode="asgi",
+    cors_allowed_origins="*",
+    client_manager=(
+        socketio.AsyncRedisManager(SOCKETIO_MESSAGE_QUEUE, channel=SOCKETIO_CHANNEL)
+        if SOCKETIO_MESSAGE_QUEUE
+        else None
+    ),
+)
+
+
+class SocketEmitter:
+    """Sends a chat's events to its client in the order they are emitted, from the loop or any other thread"""
+
+    def __init__(self, sid: str):
+        self.sid = sid
+        self.loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        self.queue: "asyncio.Queue[Optional[Tuple[str, Any]]]" = asyncio.Queue()
+        self.sender = asyncio.create_task(self.send())
+
+    def __call__(self, event: str, data: Any) -> None:
+        if threading.get_ident() == self.thread_id:
+            self.queue.put_nowait((event, data))
+        else:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, (event, data))
+
+    async def send(self) -> None:
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+
+            event, data = item
+            try:
+                await sio.emit(event, data, to=self.sid)
+            except Exception as e:
+                SilentException.capture_exception(e)
+
+    async def close(self) -> None:
+        self.queue.put_nowait(None)
+        await self.sender
+
+
+# emitters waiting for their chat's follow-up questions before they close
+_closing_emitters: Set[asyncio.Task] = set()
+
+
+async def close_emitter(
+    emitter: SocketEmitter, follow_ups: Optional[asyncio.Task]
+) -> None:
+    if follow_ups is not None:
+        await asyncio.wait([follow_ups])
+    await emitter.close()
+
+
+@sio.on("send_chat")
+async def handle_send_chat(sid: str, json_data: dict):
+    user_message = ChatInput(**json_data)
+    environ = sio.get_environ(sid) or {}
+    scheme, host = environ.get("wsgi.url_scheme", "http"), environ.get("HTTP_HOST", "")
+
+    json_data = {
+        "url": f"{scheme}://{host}/socket.io/",
+        "path": "/socketio/",
+        "query_params": "{}",
+        "path_params": "{}",
+        "method": "wss",
+    }
+    if ENABLE_CHAT_WORKERS:
+        queue_socket_chat(sid, user_message.model_dump(by_alias=True), json_data)
+        return
+
+    emitter = SocketEmitter(sid)
+
+    async def chat():
+        try:
+            await run_socket_chat(app, user_message, emitter, json_data)
+        finally:
+            # the follow-up questions are emitted after the chat released its slot, the session's next chat
+            # doesn't wait for them
+            task = asyncio.create_task(
+                close_emitter(emitter, get_follow_up_task(user_message.session_id))
+            )
+            _closing_emitters.add(task)
+            task.add_done_callback(_closing_emitters.discard)
+
+    dispatch_chat(user_message.session_id, chat)
+
+
+async def on_startup():
+    # the async flask views run on the server's loop, next to the Socket.IO handlers
+    set_worker_loop(asyncio.get_running_loop())
+
+
+async def on_shutdown():
+    await drain_worker_loop(
+        GRACEFUL_SHUTDOWN_TIMEOUT, [*get_pending_chats(), *_closing_emitters]
+    )
+
+
+application = socketio.ASGIApp(
+    sio,
+    other_asgi_app=WSGIMiddleware(app, workers=ASGI_WSGI_THREADS),
+    on_startup=on_startup,
+    on_shutdown=on_shutdown,
+)
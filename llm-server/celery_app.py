@@ -7,6 +7,7 @@ import sentry_sdk
 from celery import Celery
 from shared.models.opencopilot_db import create_database_schema
 from sentry_sdk.integrations.celery import CeleryIntegration
+from utils.llm_consts import ANALYTICS_ROLLUP_INTERVAL, INTENT_CLASSIFIER_RETRAIN_INTERVAL
 
 sentry_sdk.init(
     traces_sample_rate=1.0, profiles_sample_rate=1.0, integrations=[CeleryIntegration()]
@@ -24,3 +25,15 @@ app.conf.imports = ("workers.tasks",)
 app.conf.broker_connection_max_retries = 5
 app.conf.broker_connection_retry = True
 app.conf.broker_connection_retry_on_startup = True
+
+# periodic jobs, scheduled by a single celery beat process (the beat service of the compose files)
+app.conf.beat_schedule = {
+    "train-intent-classifiers": {
+        "task": "workers.tasks.train_intent_classifiers.train_intent_classifiers",
+        "schedule": INTENT_CLASSIFIER_RETRAIN_INTERVAL,
+    },
+    "rollup-analytics": {
+        "task": "workers.tasks.rollup_analytics.rollup_analytics_counters",
+        "schedule": ANALYTICS_ROLLUP_INTERVAL,
+    },
+}
@@ -6,6 +6,7 @@ from langchain.output_parsers import PydanticOutputParser
 class ActionableOrNotType(BaseModel):
     actionable: bool = Field(description="is the message actionable or not")
     api: Optional[str] = Field(description="the api operation id")
+    route: str = Field(default="llm", description="how the verdict was reached")
 
 
 def parse_actionable_or_not_response(json_dict: dict) -> ActionableOrNotType:
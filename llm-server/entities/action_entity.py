@@ -1,9 +1,39 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from pydantic import BaseModel
 
 from .utils import generate_operation_id_from_name
 from dataclasses import dataclass
 
+class ActionCachePolicy(BaseModel):
+    """
+    Opt-in caching of an action's GET responses. Cached responses are shared by every user of the bot, the headers
+    that identify the user are part of the key, set key_headers to [] only if the response is the same for all.
+    """
+
+    enabled: bool = False
+    # in seconds, shortened by the response's Cache-Control max-age
+    ttl: int = 300
+    # header names whose values are part of the cache key
+    key_headers: List[str] = ["Authorization", "Cookie"]
+    # query params that are part of the cache key, all of them if not set
+    key_params: Optional[List[str]] = None
+
+
+class ResponsePruning(BaseModel):
+    """
+    How an action's responses are reduced before they are summarized, set as the "response_pruning" payload field.
+    Unset limits default to the RESPONSE_PRUNING_* settings.
+    """
+
+    enabled: bool = True
+    max_array_items: Optional[int] = None
+    max_string_length: Optional[int] = None
+    max_tokens: Optional[int] = None
+    # fields that are never dropped, and fields that always are
+    keep_fields: List[str] = []
+    drop_fields: List[str] = []
+
+
 @dataclass
 class ActionDTO(BaseModel):
     id: Optional[str] = None
@@ -14,6 +44,7 @@ class ActionDTO(BaseModel):
     description: Optional[str]
     operation_id: Optional[str] = None  # Set as None initially
     payload: Dict = {}
+    cache_policy: Optional[ActionCachePolicy] = None
 
     # Additional Pydantic configuration
     class Config:
@@ -58,6 +58,14 @@ class FlowDTO(BaseModel):
                         action_ids.append(action.id)
         return action_ids
 
+    def get_all_operation_ids(self):
+        return [
+            action.operation_id
+            for block in self.blocks
+            for action in block.actions or []
+            if action.operation_id
+        ]
+
 
 class PartialFlowDTO(BaseModel):
     bot_id: str
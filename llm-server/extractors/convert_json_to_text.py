@@ -4,13 +4,14 @@ from typing import Dict, Any, cast, List, Union
 
 from langchain.schema import HumanMessage, SystemMessage, BaseMessage
 
+from utils.emit_stream import emit_stream
 from utils.get_chat_model import get_chat_model
-from flask_socketio import emit
+from utils.prompt_budget import fit_text
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
 
-def convert_json_to_text(
+async def convert_json_to_text(
     user_input: str,
     api_response: Dict[str, Any],
     api_request_data: Dict[str, Any],
@@ -26,23 +27,27 @@ def convert_json_to_text(
     """
     )
 
+    # stream_messages prepends the system message
     messages = [
-        system_message,
         HumanMessage(content=user_input),
-        HumanMessage(
-            content="Here is the response from the apis: {}".format(api_response)
-        ),
         HumanMessage(content="Now present the response in a non-tech way:"),
     ]
+    response = fit_text(str(api_response), [system_message, *messages])
+    messages.insert(
+        1,
+        HumanMessage(content="Here is the response from the apis: {}".format(response)),
+    )
 
-    result = stream_messages(
+    result = await stream_messages(
         system_message, messages, is_streaming, session_id, "convert_json_to_text"
     )
 
     return cast(str, result)
 
 
-def convert_json_error_to_text(error: str, is_streaming: bool, session_id: str) -> str:
+async def convert_json_error_to_text(
+    error: str, is_streaming: bool, session_id: str
+) -> str:
     # Define a system message requesting the LLM to explain the API error in user-friendly language
     system_message = SystemMessage(
         content="""
@@ -51,20 +56,21 @@ def convert_json_error_to_text(error: str, is_streaming: bool, session_id: str)
     )
 
     messages: List[HumanMessage] = []
+    error = fit_text(error, [system_message])
     messages.append(
         HumanMessage(
             content=f"The following error occurred while processing your request:\n\n{error}"
         )
     )
 
-    result = stream_messages(
+    result = await stream_messages(
         system_message, messages, is_streaming, session_id, "convert_json_error_to_text"
     )
 
     return cast(str, result)
 
 
-def create_readable_error(
+async def create_readable_error(
     user_input: str, error: str, is_streaming: bool, session_id: str
 ) -> str:
     # Define a system message requesting the LLM to explain the API error in user-friendly language
@@ -83,7 +89,7 @@ def create_readable_error(
     messages.append(HumanMessage(content=f"Here is the user input: \n\n{user_input}"))
     messages.append(HumanMessage(content=f"Here are the error: \n\n{error}"))
 
-    result = stream_messages(
+    result = await stream_messages(
         system_message, messages, is_streaming, session_id, "create_readable_error"
     )
 
@@ -109,7 +115,7 @@ def create_readable_fill_the_form_message(
 
 
 
-def stream_messages(
+async def stream_messages(
     system_message: SystemMessage,
     messages: List[HumanMessage],
     is_streaming: bool,
@@ -122,10 +128,4 @@ def stream_messages(
     all_messages.append(system_message)
     all_messages.extend(messages)
 
-    result = ""
-    for chunk in chat.stream(all_messages):
-        if is_streaming:
-            emit(session_id, chunk.content)
-        result += str(chunk.content)
-
-    return result
+    return await emit_stream(chat.astream(all_messages), session_id, is_streaming)
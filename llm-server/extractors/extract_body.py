@@ -3,6 +3,7 @@ from langchain.schema import HumanMessage, SystemMessage
 
 from extractors.extract_json import extract_json_payload
 from utils.get_chat_model import get_chat_model
+from utils.prompt_budget import fit_text
 from shared.utils.opencopilot_utils import get_llm
 
 from typing import Any, Optional
@@ -35,7 +36,6 @@ async def gen_body_from_schema(
         ),
         HumanMessage(content="Swagger Schema: {}".format(body_schema)),
         HumanMessage(content="User input: {}".format(text)),
-        HumanMessage(content="prev api responses: {}".format(prev_api_response)),
         HumanMessage(content="current_state: {}".format(current_state)),
         HumanMessage(
             content="Generate the compact JSON payload for the API request based on the provided information, without adding commentary. If a user fails to provide a necessary parameter, default values for required parameters will be used, while optional parameters will be left unchanged."
@@ -45,7 +45,12 @@ async def gen_body_from_schema(
     if api_generation_prompt is not None:
         messages.append(HumanMessage(content="{}".format(api_generation_prompt)))
 
-    result = chat(messages)
+    # the previous responses are the only unbounded part of the prompt
+    prev_api_response = fit_text(str(prev_api_response), messages)
+    messages.insert(
+        4, HumanMessage(content="prev api responses: {}".format(prev_api_response))
+    )
+    result = await chat.ainvoke(messages)
 
     d: Any = extract_json_payload(result.content)
     
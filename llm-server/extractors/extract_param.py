@@ -6,6 +6,7 @@ from shared.utils.opencopilot_utils import get_llm
 from custom_types.t_json import JsonData
 from typing import Optional, cast
 from langchain.schema import HumanMessage, SystemMessage
+from utils.prompt_budget import fit_text
 
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
@@ -21,7 +22,6 @@ async def gen_params_from_schema(
             content="You are an intelligent machine learning model that can produce REST API's params / query params in json format, given the json schema, user input, data from previous api calls, and current application state."
         ),
         HumanMessage(content="Json Schema: {}.".format(param_schema)),
-        HumanMessage(content="prev api responses: {}.".format(prev_resp)),
         HumanMessage(content="User's requirement: {}.".format(text)),
         HumanMessage(content="Current state: {}.".format(current_state)),
         HumanMessage(
@@ -31,6 +31,9 @@ async def gen_params_from_schema(
             content="Your output must be a valid json, without any commentary"
         ),
     ]
-    result = chat(messages)
+    # the previous responses are the only unbounded part of the prompt
+    prev_resp = fit_text(str(prev_resp), messages)
+    messages.insert(2, HumanMessage(content="prev api responses: {}.".format(prev_resp)))
+    result = await chat.ainvoke(messages)
     d: Optional[JsonData] = extract_json_payload(result.content)
     return d
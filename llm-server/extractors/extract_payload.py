@@ -0,0 +1,121 @@
+import importlib
+import json
+from typing import Any, Dict, Optional
+
+from jsonschema import Draft7Validator
+from langchain.schema import HumanMessage, SystemMessage
+
+from utils.get_chat_model import get_chat_model
+from utils.prompt_budget import fit_text
+from utils.get_logger import SilentException
+
+
+def parse_json_object(content: str) -> Optional[Dict[str, Any]]:
+    """Parses the outermost json object of the content, nested objects included"""
+    start, end = content.find("{"), content.rfind("}")
+    if start == -1 or end <= start:
+        return None
+
+    try:
+        parsed = json.loads(content[start : end + 1])
+    except json.JSONDecodeError:
+        return None
+
+    return parsed if isinstance(parsed, dict) else None
+
+
+def is_valid_payload(
+    payload: Dict[str, Any],
+    path_params_schema: Dict[str, Any],
+    query_params_schema: Dict[str, Any],
+    body_schema: Dict[str, Any],
+) -> bool:
+    path_params = payload.get("path_params")
+    query_params = payload.get("query_params")
+    body = payload.get("body")
+
+    if not isinstance(path_params, dict) or not isinstance(query_params, dict):
+        return False
+
+    # every path param is needed to build the url
+    if not set(path_params_schema).issubset(path_params):
+        return False
+
+    if not set(query_params).issubset(query_params_schema):
+        return False
+
+    if body_schema:
+        return body is not None and Draft7Validator(body_schema).is_valid(body)
+
+    return True
+
+
+async def gen_payload_from_schema(
+    path_params_schema: Dict[str, Any],
+    query_params_schema: Dict[str, Any],
+    body_schema: Dict[str, Any],
+    text: str,
+    prev_api_response: str,
+    app: Optional[str],
+    current_state: Optional[str],
+) -> Optional[Dict[str, Any]]:
+    """
+    Generates the path params, query params and body of a request in a single LLM call.
+
+    Returns:
+        A dict with the "path_params", "query_params" and "body" keys, or None if the model's output is not valid
+        against the action's schema.
+    """
+    chat = get_chat_model("gen_payload_from_schema")
+    api_generation_prompt = None
+    if app:
+        module_name = f"integrations.custom_prompts.{app}"
+        module = importlib.import_module(module_name)
+        api_generation_prompt = getattr(module, "api_generation_prompt")
+
+    schema = json.dumps(
+        {
+            "path_params": path_params_schema,
+            "query_params": query_params_schema,
+            "body": body_schema,
+        },
+        separators=(",", ":"),
+    )
+
+    messages = [
+        SystemMessage(
+            content="You are an intelligent machine learning model that can produce a complete REST API request (path params, query params and json body) in json format"
+        ),
+        HumanMessage(
+            content="You will be given the swagger schema of the path params, query params and body of the request, user input, data from previous api calls, and current state information stored in the current_state variable. You should use the field descriptions provided in the schema to generate the request."
+        ),
+        HumanMessage(content="Swagger Schema: {}".format(schema)),
+        HumanMessage(content="User input: {}".format(text)),
+        HumanMessage(content="current_state: {}".format(current_state)),
+        HumanMessage(
+            content='Generate a single compact JSON object with exactly the keys "path_params", "query_params" and "body", without adding commentary. Every path param is required. In cases where user input does not contain information for a query param, DO NOT add that query param. If a user fails to provide a necessary parameter, default values for required parameters will be used, while optional parameters will be left unchanged. Use null for the body if the schema has none.'
+        ),
+    ]
+
+    if api_generation_prompt is not None:
+        messages.append(HumanMessage(content="{}".format(api_generation_prompt)))
+
+    # the previous responses are the only unbounded part of the prompt
+    prev_api_response = fit_text(str(prev_api_response), messages)
+    messages.insert(
+        4, HumanMessage(content="prev api responses: {}".format(prev_api_response))
+    )
+    result = await chat.ainvoke(messages)
+    payload = parse_json_object(str(result.content))
+
+    try:
+        if payload is None or not is_valid_payload(
+            payload, path_params_schema, query_params_schema, body_schema
+        ):
+            return None
+    except Exception as e:
+        # an invalid schema in the swagger file, let the per part generators handle it
+        SilentException.capture_exception(e)
+        return None
+
+    return payload
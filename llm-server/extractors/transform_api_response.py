@@ -3,6 +3,7 @@ import logging
 from langchain.schema import HumanMessage, SystemMessage
 from utils.get_chat_model import get_chat_model
 from utils.chat_models import CHAT_MODELS
+from utils.prompt_budget import fit_text
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
@@ -11,16 +12,26 @@ def transform_api_response_from_schema(server_url: str, responseText: str) -> st
     chat = get_chat_model("transform_api_response_from_schema")
 
     # responseText = truncate_json(json.loads(responseText))
+    system_message = SystemMessage(
+        content="You are a bot capable of comprehending API responses."
+    )
+    instructions = HumanMessage(
+        content="Analyze the provided API responses and extract only the essential fields required for subsequent API interactions. Disregard any non-essential attributes such as CSS or color-related data. If there are generic fields like 'id,' provide them with more descriptive names in your response. Format your response as a minified JSON object with clear and meaningful keys that map to their respective values from the API response."
+    )
+    response_format = "Here is the response from current REST API: {} for endpoint: {}"
+    # the response gets what the other messages leave of the budget
+    response_text = fit_text(
+        responseText,
+        [
+            system_message,
+            instructions,
+            HumanMessage(content=response_format.format("", server_url)),
+        ],
+    )
     messages = [
-        SystemMessage(content="You are a bot capable of comprehending API responses."),
-        HumanMessage(
-            content="Here is the response from current REST API: {} for endpoint: {}".format(
-                responseText, server_url
-            )
-        ),
-        HumanMessage(
-            content="Analyze the provided API responses and extract only the essential fields required for subsequent API interactions. Disregard any non-essential attributes such as CSS or color-related data. If there are generic fields like 'id,' provide them with more descriptive names in your response. Format your response as a minified JSON object with clear and meaningful keys that map to their respective values from the API response."
-        ),
+        system_message,
+        HumanMessage(content=response_format.format(response_text, server_url)),
+        instructions,
     ]
 
     result = chat(messages)
@@ -0,0 +1,12 @@
+# hypercorn settings of the production asgi server, see asgi.py
+import os
+
+bind = [os.getenv("BIND", "0.0.0.0:8002")]
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+# "uvloop" or "asyncio", the event loop each worker runs for its whole lifetime
+worker_class = os.getenv("WORKER_CLASS", "uvloop")
+# seconds in-flight requests get to finish when a worker is stopped
+graceful_timeout = float(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30"))
+keep_alive_timeout = float(os.getenv("KEEP_ALIVE_TIMEOUT", "5"))
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+errorlog = "-"
@@ -1,6 +1,6 @@
 from typing import Optional, Any
-import json
-import os
+
+from integrations.transformer_registry import get_transformer
 
 
 def load_json_config(app: Optional[str], operation_id: str) -> Optional[Any]:
@@ -13,18 +13,5 @@ def load_json_config(app: Optional[str], operation_id: str) -> Optional[Any]:
     Returns:
         The loaded config dict if found, else None
     """
-
-    if not app:
-        return None
-    current_dir = os.path.dirname(__file__)
-    config_file = os.path.join(
-        current_dir, f"transformers/{app}/operations/{operation_id}.json"
-    )
-
-    if not os.path.exists(config_file):
-        return None
-
-    with open(config_file, "r") as f:
-        data = json.load(f)
-
-    return data
+    transformer = get_transformer(app, operation_id)
+    return transformer.template if transformer is not None else None
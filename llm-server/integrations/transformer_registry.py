@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from integrations.transformers.transformer import Projection, compile_projection
+from utils.llm_consts import TRANSFORMER_RELOAD_INTERVAL
+
+TRANSFORMERS_DIR = os.path.join(os.path.dirname(__file__), "transformers")
+
+
+@dataclass
+class Transformer:
+    template: Any
+    projection: Projection
+    mtime: float
+
+
+@dataclass
+class AppTransformers:
+    # by operation id
+    transformers: Dict[str, Transformer] = field(default_factory=dict)
+    checked_at: float = 0
+
+
+_apps: Dict[str, AppTransformers] = {}
+_known_apps: set[str] = set()
+_known_apps_checked_at: float = 0
+_lock = threading.Lock()
+
+
+def list_apps() -> set[str]:
+    try:
+        return {
+            entry.name for entry in os.scandir(TRANSFORMERS_DIR) if entry.is_dir()
+        }
+    except FileNotFoundError:
+        return set()
+
+
+def is_stale(checked_at: float) -> bool:
+    return (
+        not checked_at
+        or TRANSFORMER_RELOAD_INTERVAL > 0
+        and time.monotonic() - checked_at >= TRANSFORMER_RELOAD_INTERVAL
+    )
+
+
+def is_known_app(app: str) -> bool:
+    """The app name comes from a request header, only the app directories are looked up"""
+    global _known_apps, _known_apps_checked_at
+    if is_stale(_known_apps_checked_at):
+        _known_apps = list_apps()
+        _known_apps_checked_at = time.monotonic()
+    return app in _known_apps
+
+
+def load_app_transformers(app: str, previous: AppTransformers) -> AppTransformers:
+    """Compiles the app's new and modified templates, the unchanged ones are reused"""
+    loaded = AppTransformers(checked_at=time.monotonic())
+    operations_dir = os.path.join(TRANSFORMERS_DIR, app, "operations")
+    try:
+        entries = [
+            entry
+            for entry in os.scandir(operations_dir)
+            if entry.is_file() and entry.name.endswith(".json")
+        ]
+    except FileNotFoundError:
+        return loaded
+
+    for entry in entries:
+        operation_id = entry.name[: -len(".json")]
+        mtime = entry.stat().st_mtime
+        transformer = previous.transformers.get(operation_id)
+        if transformer is None or transformer.mtime != mtime:
+            try:
+                with open(entry.path, "r") as f:
+                    template = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning("Could not load transformer %s: %s", entry.path, e)
+                continue
+            transformer = Transformer(template, compile_projection(template), mtime)
+
+        loaded.transformers[operation_id] = transformer
+
+    return loaded
+
+
+def get_transformer(app: Optional[str], operation_id: str) -> Optional[Transformer]:
+    """
+    Returns the compiled transformer of the app's operation. The app's templates are loaded on first use and
+    reloaded when their files change, checked at most once every TRANSFORMER_RELOAD_INTERVAL seconds.
+    """
+    if not app:
+        return None
+
+    app_transformers = _apps.get(app)
+    if app_transformers is None or is_stale(app_transformers.checked_at):
+        with _lock:
+            if not is_known_app(app):
+                return None
+            app_transformers = load_app_transformers(
+                app, _apps.get(app) or AppTransformers()
+            )
+            _apps[app] = app_transformers
+
+    return app_transformers.transformers.get(operation_id)
@@ -1,4 +1,7 @@
-from typing import Dict, Any
+from typing import Dict, Any, Callable
+
+# applies a compiled partial json template to an api response
+Projection = Callable[[Any], Any]
 
 
 # full json is api response, partial_json is the final result we are expecting, we have to define partial json for all endpoints, take partial json from apis/<slack>/<api_name>/<method> and then pass it to this function
@@ -22,6 +25,32 @@ def transform_response(full_json: Dict[str, Any], partial_json: Dict[str, Any])
     # return json.dumps(flatten(recursive_filter(full_json, partial_json)))
 
 
+def compile_projection(partial_json: Any) -> Projection:
+    """
+    Compiles a partial json template into a projection, so the template is only interpreted once. Like
+    transform_response, objects keep the template's keys and lists are projected item by item with the template's
+    first item. An object template applied to a list projects each of its items.
+    """
+    if isinstance(partial_json, list):
+        if not partial_json:
+            return lambda full: full
+        return compile_projection(partial_json[0])
+
+    if not isinstance(partial_json, dict):
+        return lambda full: full
+
+    fields = [(key, compile_projection(value)) for key, value in partial_json.items()]
+
+    def project(full: Any) -> Any:
+        if isinstance(full, dict):
+            return {key: field(full[key]) for key, field in fields if key in full}
+        if isinstance(full, list):
+            return [project(item) for item in full]
+        return full
+
+    return project
+
+
 # Example usage
 # full_json = {
 #     "ok": True,
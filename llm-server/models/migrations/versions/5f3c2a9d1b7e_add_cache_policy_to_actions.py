@@ -0,0 +1,40 @@
+"""Add cache_policy to actions
+
+Revision ID: 5f3c2a9d1b7e
+Revises: 433191267223
+Create Date: 2024-03-12 10:41:27.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5f3c2a9d1b7e"
+down_revision: Union[str, None] = "433191267223"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if (
+        not op.get_bind()
+        .execute(text("SHOW COLUMNS FROM actions LIKE 'cache_policy'"))
+        .fetchone()
+    ):
+        op.add_column(
+            "actions",
+            sa.Column(
+                "cache_policy",
+                sa.JSON(),
+                nullable=True,
+            ),
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("actions", "cache_policy")
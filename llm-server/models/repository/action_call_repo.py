@@ -21,6 +21,17 @@ def add_action_call(operation_id: str, session_id: str, bot_id: str) -> Action:
         return action_call
 
 
+def get_latest_action_calls_by_bot_id(bot_id: str, limit: int = 5000) -> List[ActionCall]:
+    with Session() as session:
+        return (
+            session.query(ActionCall)
+            .filter(ActionCall.chatbot_id == bot_id)
+            .order_by(ActionCall.timestamp.desc())
+            .limit(limit)
+            .all()
+        )
+
+
 def get_action_call_by_id(action_id: str) -> Action:
     with Session() as session:
         return session.query(Action).filter(Action.id == action_id).first()
@@ -8,11 +8,16 @@ from sqlalchemy.orm import sessionmaker
 
 from entities.action_entity import ActionDTO
 from shared.models.opencopilot_db.action import Action
+from utils.action_catalog_version import bump_action_catalog_version
 
 # Create a Session factory
 SessionLocal = sessionmaker(bind=engine)
 
 
+def dump_cache_policy(dto: ActionDTO) -> Optional[dict]:
+    return dto.cache_policy.model_dump() if dto.cache_policy else None
+
+
 def create_actions(chatbot_id: str, data: List[ActionDTO]) -> List[dict]:
     """
     Creates multiple new Action instances and adds them to the database with validations.
@@ -29,6 +34,7 @@ def create_actions(chatbot_id: str, data: List[ActionDTO]) -> List[dict]:
                 api_endpoint=dto.api_endpoint,
                 request_type=dto.request_type,
                 payload=dto.payload,
+                cache_policy=dump_cache_policy(dto),
                 created_at=datetime.datetime.utcnow(),
                 updated_at=datetime.datetime.utcnow(),
             )
@@ -36,6 +42,7 @@ def create_actions(chatbot_id: str, data: List[ActionDTO]) -> List[dict]:
         try:
             session.add_all(actions)
             session.commit()
+            bump_action_catalog_version(chatbot_id)
             for action in actions:
                 session.refresh(action)
             return actions
@@ -58,12 +65,14 @@ def create_action(chatbot_id: str, data: ActionDTO) -> dict:
             api_endpoint=data.api_endpoint,
             request_type=data.request_type,
             payload=data.payload,
+            cache_policy=dump_cache_policy(data),
             created_at=datetime.datetime.utcnow(),
             updated_at=datetime.datetime.utcnow(),
         )
         try:
             session.add(new_action)
             session.commit()
+            bump_action_catalog_version(chatbot_id)
             session.refresh(new_action)
             return new_action
         except Exception as e:
@@ -87,10 +96,12 @@ def update_action(action_id: str, data: ActionDTO) -> Action:
         action.api_endpoint = data.api_endpoint
         action.request_type = data.request_type
         action.payload = data.payload
+        action.cache_policy = dump_cache_policy(data)
         action.updated_at = datetime.datetime.utcnow()
 
         try:
             session.commit()
+            bump_action_catalog_version(str(action.bot_id))
             session.refresh(action)
             return action
         except Exception as e:
@@ -116,6 +127,7 @@ def delete_all_actions(chatbot_id: str):
     with SessionLocal() as session:
         session.query(Action).filter(Action.bot_id == chatbot_id).delete()
         session.commit()
+        bump_action_catalog_version(chatbot_id)
     
 
 def find_action_by_operation_id(operation_id: str) -> Optional[Action]:
@@ -174,6 +186,7 @@ def action_to_dict(action: Action) -> dict:
         "operation_id": to_camel_case(action.operation_id),
         "request_type": action.request_type,
         "payload": action.payload,
+        "cache_policy": action.cache_policy,
         "status": action.status,
         "created_at": action.created_at.isoformat(),
         "updated_at": action.updated_at.isoformat(),
@@ -227,6 +240,7 @@ def delete_action_by_id(operation_id: str, bot_id: str):
             # Delete the action
             session.delete(action)
             session.commit()
+            bump_action_catalog_version(bot_id)
             return {"message": "Action deleted successfully"}
         else:
             return {"error": "Action not found"}, 404
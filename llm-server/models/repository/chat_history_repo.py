@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 from typing import Optional, List, Dict, Union, Tuple
 from models.repository.action_call_repo import (
@@ -11,6 +12,15 @@ from langchain.schema import BaseMessage, AIMessage, HumanMessage
 from sqlalchemy import func
 
 from shared.models.opencopilot_db.chatbot import Chatbot
+from utils.conversation_buffer import (
+    append_to_conversation_buffer,
+    CountedConversationMessages,
+    clear_conversation_buffer,
+    fill_conversation_buffer,
+    read_conversation_buffer,
+)
+from utils.llm_consts import CONVERSATION_BUFFER_SIZE
+from utils.prompt_budget import TOKEN_COUNT_KEY, count_tokens
 import json
 
 Session = sessionmaker(bind=engine)
@@ -44,6 +54,7 @@ def create_chat_history(
 
         session.add(chat_history)
         session.commit()
+        append_to_conversation_buffer(session_id, [(from_user, message)])
 
     return chat_history
 
@@ -73,16 +84,75 @@ def get_all_chat_history_by_session_id_with_total(
     return chat_history[::-1], total_messages
 
 
+def get_latest_chat_history_by_session_id(
+    session_id: str, limit: int
+) -> List[ChatHistory]:
+    """Retrieves the most recent chat history records of a session, oldest first"""
+    with Session() as session:
+        chats = (
+            session.query(ChatHistory)
+            .filter(ChatHistory.session_id == session_id)
+            .order_by(ChatHistory.created_at.desc(), ChatHistory.id.desc())
+            .limit(limit)
+            .all()
+        )
+
+    return chats[::-1]
+
+
+def get_recent_conversation(session_id: str) -> CountedConversationMessages:
+    """
+    Returns the session's most recent messages with their token counts from its redis buffer, loading the buffer
+    from the database with a single query on a miss.
+    """
+    messages = read_conversation_buffer(session_id)
+    if messages is not None:
+        return messages
+
+    chats = get_latest_chat_history_by_session_id(session_id, CONVERSATION_BUFFER_SIZE)
+    fill_conversation_buffer(
+        session_id, [(bool(chat.from_user), str(chat.message)) for chat in chats]
+    )
+    return [
+        (bool(chat.from_user), str(chat.message), count_tokens(str(chat.message)))
+        for chat in chats
+    ]
+
+
 async def get_chat_message_as_llm_conversation(session_id: str) -> List[BaseMessage]:
-    chats, _ = get_all_chat_history_by_session_id_with_total(session_id, 100)
-    conversations: List[BaseMessage] = []
-    for chat in chats:
-        if chat.from_user:
-            conversations.append(HumanMessage(content=str(chat.message)))
-        else:
-            conversations.append(AIMessage(content=str(chat.message)))
+    # runs in a worker thread so it overlaps with the other lookups of the chat turn
+    messages = await asyncio.to_thread(get_recent_conversation, session_id)
+
+    return [
+        HumanMessage(content=message, additional_kwargs={TOKEN_COUNT_KEY: token_count})
+        if from_user
+        else AIMessage(content=message, additional_kwargs={TOKEN_COUNT_KEY: token_count})
+        for from_user, message, token_count in messages
+    ]
 
-    return conversations
+
+def get_latest_chat_history_by_bot_id(
+    chatbot_id: str, limit: int = 5000
+) -> List[ChatHistory]:
+    """Retrieves the most recent chat history records of a bot, in chronological order.
+
+    Args:
+      chatbot_id: The ID of the chatbot.
+      limit: The maximum number of chat history records to retrieve.
+
+    Returns:
+      A list of ChatHistory objects, oldest first.
+    """
+    with Session() as session:
+        chats = (
+            session.query(ChatHistory)
+            .filter(ChatHistory.chatbot_id == chatbot_id)
+            .order_by(ChatHistory.id.desc())
+            .limit(limit)
+            .all()
+        )
+
+    return chats[::-1]
 
 
 def get_all_chat_history(limit: int = 10, offset: int = 0) -> List[ChatHistory]:
@@ -121,6 +191,7 @@ def update_chat_history(
     """
     with Session() as session:
         chat_history: ChatHistory = session.query(ChatHistory).get(chat_history_id)
+        previous_session_id = str(chat_history.session_id)
 
         if not chatbot_id:
             chat_history.chatbot_id = chatbot_id
@@ -135,6 +206,9 @@ def update_chat_history(
 
         session.add(chat_history)
         session.commit()
+        clear_conversation_buffer(previous_session_id)
+        if session_id:
+            clear_conversation_buffer(session_id)
 
     return chat_history
 
@@ -147,8 +221,10 @@ def delete_chat_history(chat_history_id: str) -> None:
     """
     with Session() as session:
         chat_history = session.query(ChatHistory).get(chat_history_id)
+        session_id = str(chat_history.session_id)
         session.delete(chat_history)
         session.commit()
+        clear_conversation_buffer(session_id)
 
 
 def get_chat_history_for_retrieval_chain(
@@ -166,15 +242,17 @@ def get_chat_history_for_retrieval_chain(
 
     with Session() as session:
         # Query and limit results if a limit is provided
+        # newest first, so the limit keeps the most recent entries
         query = (
             session.query(ChatHistory)
             .filter(ChatHistory.session_id == session_id)
-            .order_by(ChatHistory.created_at.asc())
+            .order_by(ChatHistory.created_at.desc(), ChatHistory.id.desc())
         )
 
         if limit:
             query = query.limit(limit)
 
+        # back to chronological order, a user query is followed by its bot response
         query = query.all()[::-1]
 
         chat_history: List[Tuple[str, str]] = []
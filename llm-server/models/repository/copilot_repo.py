@@ -9,6 +9,7 @@ from sqlalchemy.orm import sessionmaker, Session
 from copy import deepcopy
 from shared.models.opencopilot_db.chatbot import Chatbot, engine
 from utils.base import generate_random_token
+from utils.chatbot_cache import get_cached_chatbot, invalidate_chatbot
 from werkzeug.exceptions import NotFound
 
 # Create a Session factory
@@ -142,6 +143,7 @@ def create_copilot(
 def find_one_or_fail_by_id(bot_id: str) -> Chatbot:
     """
     Finds a Chatbot instance by its ID. Raises an exception if the Chatbot is not found.
+    The instance is a snapshot served from the chatbot cache, it is not bound to any session.
 
     Args:
         bot_id (str): The unique identifier of the Chatbot.
@@ -153,6 +155,12 @@ def find_one_or_fail_by_id(bot_id: str) -> Chatbot:
         ValueError: If no Chatbot is found with the provided ID.
         Exception: If any other exception occurs during the database operation.
     """
+    return get_cached_chatbot(
+        ("id", str(bot_id)), lambda: query_one_or_fail_by_id(bot_id)
+    )
+
+
+def query_one_or_fail_by_id(bot_id: str) -> Chatbot:
     session: Session = SessionLocal()
     try:
         bot = session.query(Chatbot).filter(Chatbot.id == str(bot_id)).one()
@@ -174,12 +182,18 @@ def find_one_or_fail_by_token(bot_token: str) -> Chatbot:
         bot_token: The unique identifier of the Chatbot.
 
     Returns:
-        Chatbot: The found Chatbot instance.
+        Chatbot: The found Chatbot instance, a snapshot served from the chatbot cache.
 
     Raises:
         ValueError: If no Chatbot is found with the provided ID.
         Exception: If any other exception occurs during the database operation.
     """
+    return get_cached_chatbot(
+        ("token", str(bot_token)), lambda: query_one_or_fail_by_token(bot_token)
+    )
+
+
+def query_one_or_fail_by_token(bot_token: str) -> Chatbot:
     session: Session = SessionLocal()
     try:
         bot = session.query(Chatbot).filter(Chatbot.token == str(bot_token)).one()
@@ -221,15 +235,14 @@ def chatbot_to_dict(chatbot: Chatbot):
 def delete_copilot_global_key(copilot_id: str, variable_key: str):
     with SessionLocal() as session:
         try:
-            copilot = find_one_or_fail_by_id(copilot_id)
-            vars_dict = deepcopy(dict(copilot.global_variables))
+            copilot = session.query(Chatbot).filter(Chatbot.id == copilot_id).one()
+            vars_dict = deepcopy(dict(copilot.global_variables or {}))
 
             if variable_key in vars_dict:
                 del vars_dict[variable_key]
                 copilot.global_variables = vars_dict
-                session.add(copilot)
                 session.commit()
-                session.refresh(copilot)
+                invalidate_chatbot(copilot_id)
         except Exception:
             session.rollback()
             raise NotFound(description=f"No Chatbot found with token: {copilot_id}")
@@ -251,7 +264,7 @@ def store_copilot_global_variables(copilot_id: str, new_variables: dict):
             chatbot.updated_at = datetime.datetime.utcnow()
 
             session.commit()
-            session.refresh(chatbot)
+            invalidate_chatbot(copilot_id)
             return existing_variables
         except exc.NoResultFound:
             session.rollback()
@@ -312,6 +325,7 @@ def update_copilot(
         chatbot.updated_at = datetime.datetime.utcnow()
 
         session.commit()
+        invalidate_chatbot(copilot_id)
         return chatbot_to_dict(chatbot)
     except exc.NoResultFound:
         session.rollback()
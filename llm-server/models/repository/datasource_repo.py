@@ -4,6 +4,7 @@ from shared.models.opencopilot_db import PdfDataSource, WebsiteDataSource
 from sqlalchemy.orm import sessionmaker
 from qdrant_client import models
 from utils.llm_consts import initialize_qdrant_client, VectorCollections
+from utils.knowledgebase_version import bump_knowledgebase_version
 
 client = initialize_qdrant_client()
 
@@ -44,6 +45,7 @@ def qdrant_delete_knowledgebase_item_by_link_and_bot_id(link: str, bot_id: str):
             )
         ),
     )
+    bump_knowledgebase_version(bot_id)
 
     return result
 
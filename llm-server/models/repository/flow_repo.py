@@ -7,6 +7,7 @@ from entities.flow_entity import FlowDTO
 from shared.models.opencopilot_db.flow import Flow
 from shared.models.opencopilot_db.flow_variables import FlowVariable
 from shared.models.opencopilot_db.chatbot import Chatbot
+from utils.action_catalog_version import bump_action_catalog_version
 
 Session = sessionmaker(bind=engine)
 
@@ -36,6 +37,7 @@ def create_flow(flow_dto: FlowDTO) -> Flow:
 
         session.add(new_flow)
         session.commit()
+        bump_action_catalog_version(flow_dto.bot_id)
         session.refresh(
             new_flow
         )  # Refresh the instance to load any unloaded attributes
@@ -62,6 +64,7 @@ def update_flow(flow_id: str, flow_dto: FlowDTO) -> Type[Flow]:
             flow.payload = blocks_json
             flow.description = flow_dto.description
             session.commit()
+            bump_action_catalog_version(str(flow.chatbot_id))
             session.refresh(flow)
             return flow
         return None
@@ -188,7 +191,9 @@ def delete_flow(flow_id: str) -> bool:
     with Session() as session:
         flow = session.query(Flow).filter(Flow.id == flow_id).first()
         if flow:
+            bot_id = str(flow.chatbot_id)
             session.delete(flow)
             session.commit()
+            bump_action_catalog_version(bot_id)
             return True
         return False
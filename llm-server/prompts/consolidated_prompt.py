@@ -1,6 +1,7 @@
 from typing import List, cast
 from langchain.schema import BaseMessage, AIMessage, HumanMessage, SystemMessage
 from utils.get_chat_model import get_chat_model
+from utils.prompt_budget import fit_text, get_remaining_tokens, trim_history
 
 
 def get_last_4(arr):
@@ -42,23 +43,29 @@ Output: "What does the Italian place on Main Street serve?"
         )
     )
 
-    messages.append(
-        HumanMessage(
-            content=f"Here's the conversation history: ```{conversation_history}```"
-        )
-    )
-    messages.append(HumanMessage(content=f"{user_input}"))
-
-    messages.extend(_ms)
-    messages.append(
+    tail: List[BaseMessage] = [
+        HumanMessage(content=f"{user_input}"),
         HumanMessage(
             content=f"""Give me the standalone input without any commentary and without quotes after adding the relevant context from past conversations
             <user-input>
                 {user_input}
             </user-input>
     """
+        ),
+    ]
+    # the most recent messages that fit in the budget, the rendered history is truncated if it is still too long
+    history = trim_history(
+        conversation_history, get_remaining_tokens([*messages, *tail])
+    )
+    messages.append(
+        HumanMessage(
+            content=fit_text(
+                f"Here's the conversation history: ```{history}```",
+                [*messages, *tail],
+            )
         )
     )
+    messages.extend(tail)
 
     chat = get_chat_model("get_consolidate_question")
     result = await chat.ainvoke(messages)
@@ -7,6 +7,7 @@ from shared.utils.opencopilot_utils.get_vector_store import get_vector_store
 from shared.utils.opencopilot_utils import StoreOptions
 from langchain.docstore.document import Document
 from utils.llm_consts import initialize_qdrant_client
+from utils.prompt_budget import with_token_count
 
 client = initialize_qdrant_client()
 
@@ -33,7 +34,7 @@ def save_swagger_paths_to_qdrant(swagger_doc: ResolvingParser, bot_id: str):
                     document.metadata["bot_id"] = bot_id
                     document.metadata["operation"] = operation
 
-                    documents.append(document)
+                    documents.append(with_token_count(document))
                 except KeyError as e:
                     # Handle the specific key error, log, or take necessary action
                     raise e
@@ -12,6 +12,7 @@ from models.repository.action_repo import (
     delete_action_by_id,
 )
 from routes.action import action_vector_service
+from utils.action_response_cache import get_action_cache_stats
 
 
 action = Blueprint("action", __name__)
@@ -44,6 +45,11 @@ def get_actions(chatbot_id):
     return jsonify([action_to_dict(action) for action in actions])
 
 
+@action.route("/bot/<string:chatbot_id>/cache-stats", methods=["GET"])
+def get_cache_stats(chatbot_id):
+    return jsonify(get_action_cache_stats(chatbot_id))
+
+
 @action.route("/bot/<string:chatbot_id>/import-from-swagger", methods=["PUT"])
 def import_actions_from_swagger_file(chatbot_id):
     # Check if the request has the file part
@@ -12,6 +12,7 @@ from shared.utils.opencopilot_utils import get_vector_store
 from shared.utils.opencopilot_utils.interfaces import StoreOptions
 from utils.llm_consts import initialize_qdrant_client, VectorCollections
 from utils.get_logger import SilentException
+from utils.prompt_budget import with_token_count
 from models.repository.action_repo import create_actions as action_repo_create_action
 
 client = initialize_qdrant_client()
@@ -34,6 +35,7 @@ def create_actions(actions: List[ActionDTO]):
         description = action.description if action.description else ""
         document = Document(page_content=description + action.name)
         document.metadata.update(action.model_dump())
+        with_token_count(document)
 
         documents.append(document)
 
@@ -51,6 +53,7 @@ def create_action(action: ActionDTO):
     document = Document(page_content=description + " " + name)
 
     document.metadata.update(action.model_dump())
+    with_token_count(document)
 
     documents.append(document)
 
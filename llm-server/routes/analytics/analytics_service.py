@@ -1,33 +1,234 @@
-from sqlalchemy.orm import sessionmaker
+import datetime
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Literal, Optional, Tuple
+
+from redis.exceptions import LockError, ResponseError
+from sqlalchemy import func
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import sessionmaker, Session as SessionType
 
 from shared.models.opencopilot_db import engine
-from shared.models.opencopilot_db.analytics import Analytics
+from shared.models.opencopilot_db.analytics import Analytics, AnalyticsBucket, AnalyticsRollup
+from utils.get_logger import SilentException
+from utils.llm_consts import redis_client
+
+Session = sessionmaker(bind=engine)
+
+# pending counters of a bot, one hash field per hour bucket and counter
+ANALYTICS_PENDING_KEY_FORMAT = "analytics:pending:{}"
+# pending counters taken over by a rollup, keyed by bot id and rollup id
+ANALYTICS_ROLLUP_KEY_FORMAT = "analytics:rollup:{}:{}"
+ANALYTICS_ROLLUP_LOCK_KEY = "analytics:rollup_lock"
+# a rollup holding the lock longer than this is assumed dead, the applied rollup ids keep its keys from being counted twice
+ANALYTICS_ROLLUP_LOCK_TIMEOUT = 300
+# how long the applied rollup ids are kept, the next run applies the rollup keys left behind long before that
+APPLIED_ROLLUP_RETENTION = datetime.timedelta(days=1)
+BUCKET_FORMAT = "%Y-%m-%dT%H"
+
+# operation counts by hour bucket
+BucketCounts = Dict[datetime.datetime, Tuple[int, int]]
 
 
 def upsert_analytics_record(chatbot_id: str, successful_operations: int, total_operations: int, logs: str = ""):
-    Session = sessionmaker(bind=engine)
-    session = Session()
-
-    # Fetch the existing record, if any
-    existing_record = session.query(Analytics).filter_by(chatbot_id=chatbot_id).first()
-
-    if existing_record:
-        # Increment existing values
-        existing_record.successful_operations += successful_operations
-        existing_record.total_operations += total_operations
-        if logs:
-            existing_record.logs = logs
-        print("Analytics record updated for chatbot_id:", chatbot_id)
-    else:
-        # Create a new record
-        record_to_upsert = Analytics(
-            chatbot_id=chatbot_id,
-            successful_operations=successful_operations,
-            total_operations=total_operations,
-            logs=logs
+    """Increments the bot's counters with a single INSERT ... ON DUPLICATE KEY UPDATE, without locking the row"""
+    with Session() as session:
+        upsert_analytics_counts(session, chatbot_id, successful_operations, total_operations, logs)
+        session.commit()
+
+
+def upsert_analytics_counts(
+    session: SessionType, chatbot_id: str, successful_operations: int, total_operations: int, logs: str = ""
+):
+    statement = insert(Analytics).values(
+        chatbot_id=chatbot_id,
+        successful_operations=successful_operations,
+        total_operations=total_operations,
+        logs=logs or None,
+    )
+    update = {
+        "successful_operations": Analytics.successful_operations + statement.inserted.successful_operations,
+        "total_operations": Analytics.total_operations + statement.inserted.total_operations,
+    }
+    if logs:
+        update["logs"] = statement.inserted.logs
+
+    session.execute(statement.on_duplicate_key_update(**update))
+
+
+def apply_bucket_counts(chatbot_id: str, counts: BucketCounts, rollup_id: Optional[str] = None) -> bool:
+    """
+    Adds the counts to the bot's totals and hourly buckets in one transaction.
+
+    Args:
+        rollup_id: Recorded in the same transaction, the counts are not added again if it was already applied.
+
+    Returns:
+        Whether the counts were added.
+    """
+    if not counts:
+        return False
+
+    with Session() as session:
+        if rollup_id is not None:
+            # blocks on a concurrent transaction recording the same id, and is ignored once it committed
+            recorded = session.execute(
+                insert(AnalyticsRollup)
+                .prefix_with("IGNORE")
+                .values(rollup_id=rollup_id, chatbot_id=chatbot_id, applied_at=datetime.datetime.utcnow())
+            )
+            if recorded.rowcount == 0:
+                return False
+
+        upsert_analytics_counts(
+            session,
+            chatbot_id,
+            sum(successful for successful, _ in counts.values()),
+            sum(total for _, total in counts.values()),
+        )
+
+        statement = insert(AnalyticsBucket).values(
+            [
+                {
+                    "chatbot_id": chatbot_id,
+                    "bucket_start": bucket_start,
+                    "successful_operations": successful,
+                    "total_operations": total,
+                }
+                for bucket_start, (successful, total) in counts.items()
+            ]
+        )
+        session.execute(
+            statement.on_duplicate_key_update(
+                successful_operations=AnalyticsBucket.successful_operations
+                + statement.inserted.successful_operations,
+                total_operations=AnalyticsBucket.total_operations + statement.inserted.total_operations,
+            )
+        )
+        session.commit()
+        return True
+
+
+def current_bucket_start() -> datetime.datetime:
+    return datetime.datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+
+
+def increment_analytics(chatbot_id: str, successful_operations: int, total_operations: int):
+    """
+    Increments the bot's counters in redis, they are written to mysql by the periodic rollup. Falls back to an
+    atomic upsert if redis is unreachable.
+    """
+    bucket_start = current_bucket_start()
+    bucket = bucket_start.strftime(BUCKET_FORMAT)
+    try:
+        pipeline = redis_client.pipeline()
+        key = ANALYTICS_PENDING_KEY_FORMAT.format(chatbot_id)
+        pipeline.hincrby(key, f"{bucket}:successful_operations", successful_operations)
+        pipeline.hincrby(key, f"{bucket}:total_operations", total_operations)
+        pipeline.execute()
+    except Exception as e:
+        SilentException.capture_exception(e)
+        apply_bucket_counts(chatbot_id, {bucket_start: (successful_operations, total_operations)})
+
+
+def parse_bucket_counts(fields: Dict[str, str]) -> BucketCounts:
+    counts: Dict[datetime.datetime, List[int]] = defaultdict(lambda: [0, 0])
+    for field, value in fields.items():
+        bucket, counter = field.rsplit(":", 1)
+        bucket_start = datetime.datetime.strptime(bucket, BUCKET_FORMAT)
+        counts[bucket_start][0 if counter == "successful_operations" else 1] += int(value)
+
+    return {bucket_start: (successful, total) for bucket_start, (successful, total) in counts.items()}
+
+
+def apply_rollup(rollup_key: str):
+    _, _, chatbot_id, rollup_id = rollup_key.split(":")
+    apply_bucket_counts(chatbot_id, parse_bucket_counts(redis_client.hgetall(rollup_key)), rollup_id)
+    redis_client.delete(rollup_key)
+
+
+def delete_applied_rollups(before: datetime.datetime):
+    with Session() as session:
+        session.query(AnalyticsRollup).filter(AnalyticsRollup.applied_at < before).delete(synchronize_session=False)
+        session.commit()
+
+
+def rollup_analytics() -> int:
+    """
+    Moves the pending redis counters of every bot to mysql. The pending hash is renamed before it is read, so
+    increments made during the rollup go to a new hash and are not lost. Runs are serialized by a redis lock, and
+    each renamed hash is applied at most once.
+
+    Returns:
+        The number of rolled up bots, 0 if another rollup is running.
+    """
+    lock = redis_client.lock(ANALYTICS_ROLLUP_LOCK_KEY, timeout=ANALYTICS_ROLLUP_LOCK_TIMEOUT, blocking_timeout=0)
+    if not lock.acquire():
+        return 0
+
+    try:
+        return rollup_pending_analytics()
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            # the lock expired during the rollup, the applied rollup ids kept a concurrent run from double counting
+            pass
+
+
+def rollup_pending_analytics() -> int:
+    started_at = datetime.datetime.utcnow()
+
+    # left behind by an interrupted rollup, skipped by apply_bucket_counts if it was applied already
+    for rollup_key in redis_client.scan_iter(match=ANALYTICS_ROLLUP_KEY_FORMAT.format("*", "*")):
+        apply_rollup(rollup_key)
+
+    rolled_up = 0
+    for pending_key in redis_client.scan_iter(match=ANALYTICS_PENDING_KEY_FORMAT.format("*")):
+        chatbot_id = pending_key.split(":")[2]
+        rollup_key = ANALYTICS_ROLLUP_KEY_FORMAT.format(chatbot_id, uuid.uuid4().hex)
+        try:
+            redis_client.rename(pending_key, rollup_key)
+        except ResponseError:
+            # rolled up by a concurrent run
+            continue
+
+        apply_rollup(rollup_key)
+        rolled_up += 1
+
+    delete_applied_rollups(started_at - APPLIED_ROLLUP_RETENTION)
+    return rolled_up
+
+
+def get_analytics_time_series(
+    chatbot_id: str, granularity: Literal["hourly", "daily"] = "hourly", days: int = 7
+) -> List[Dict]:
+    """
+    Returns the bot's operation counts per hour or per day over the last days, oldest first. Counts are written by
+    the periodic rollup, so the current bucket lags behind by up to ANALYTICS_ROLLUP_INTERVAL.
+    """
+    since = current_bucket_start() - datetime.timedelta(days=days)
+    with Session() as session:
+        bucket = (
+            func.date(AnalyticsBucket.bucket_start) if granularity == "daily" else AnalyticsBucket.bucket_start
+        )
+        rows = (
+            session.query(
+                bucket.label("bucket"),
+                func.sum(AnalyticsBucket.successful_operations).label("successful_operations"),
+                func.sum(AnalyticsBucket.total_operations).label("total_operations"),
+            )
+            .filter(AnalyticsBucket.chatbot_id == chatbot_id, AnalyticsBucket.bucket_start >= since)
+            .group_by(bucket)
+            .order_by(bucket)
+            .all()
         )
-        session.add(record_to_upsert)
-        print("Analytics record inserted for chatbot_id:", chatbot_id)
 
-    session.commit()
-    session.close()
+    return [
+        {
+            "bucket": row.bucket.isoformat(),
+            "successful_operations": int(row.successful_operations or 0),
+            "total_operations": int(row.total_operations or 0),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from typing import Optional
+
+from qdrant_client import models
+
+from shared.utils.opencopilot_utils.get_embeddings import get_embeddings
+from utils.get_logger import SilentException
+from utils.knowledgebase_version import get_knowledgebase_version
+from utils.llm_consts import (
+    ANSWER_CACHE_BOT_IDS,
+    ANSWER_CACHE_MAX_DISTANCE,
+    ANSWER_CACHE_TTL,
+    VectorCollections,
+    initialize_async_qdrant_client,
+    is_enabled_for_bot,
+)
+
+
+def is_answer_cache_enabled(bot_id: Optional[str]) -> bool:
+    return bot_id is not None and is_enabled_for_bot(ANSWER_CACHE_BOT_IDS, bot_id)
+
+
+def get_prompt_hash(base_prompt: str) -> str:
+    return hashlib.sha256(base_prompt.encode()).hexdigest()
+
+
+def get_answer_cache_filter(
+    bot_id: str, kb_version: int, prompt_hash: str
+) -> models.Filter:
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key="metadata.bot_id",
+                match=models.MatchValue(value=bot_id),
+            ),
+            models.FieldCondition(
+                key="metadata.kb_version",
+                match=models.MatchValue(value=kb_version),
+            ),
+            models.FieldCondition(
+                key="metadata.prompt_hash",
+                match=models.MatchValue(value=prompt_hash),
+            ),
+            models.FieldCondition(
+                key="metadata.created_at",
+                range=models.Range(gte=time.time() - ANSWER_CACHE_TTL),
+            ),
+        ]
+    )
+
+
+async def get_cached_answer(bot_id: str, text: str, base_prompt: str) -> Optional[str]:
+    """
+    Returns a previously generated answer of this bot for a semantically equivalent question, as long as neither the
+    knowledgebase nor the base prompt changed since, otherwise None.
+
+    Entries are keyed on the question alone, callers only look up and cache the first turn of a session: later
+    questions are read in the light of the conversation ("what do they serve?") and would match unrelated answers.
+    """
+    kb_version = await asyncio.to_thread(get_knowledgebase_version, bot_id)
+    if kb_version is None:
+        return None
+
+    try:
+        query_vector = await get_embeddings().aembed_query(text)
+        client = initialize_async_qdrant_client()
+        results = await client.search(
+            collection_name=VectorCollections.answer_cache,
+            query_filter=get_answer_cache_filter(
+                bot_id, kb_version, get_prompt_hash(base_prompt)
+            ),
+            query_vector=query_vector,
+            with_payload=True,
+            limit=1,
+            score_threshold=1 - ANSWER_CACHE_MAX_DISTANCE,
+        )
+    except Exception as e:
+        SilentException.capture_exception(e)
+        return None
+
+    if not results or not results[0].payload:
+        return None
+
+    return results[0].payload.get("answer")
+
+
+async def cache_answer(bot_id: str, text: str, base_prompt: str, answer: str) -> None:
+    kb_version = await asyncio.to_thread(get_knowledgebase_version, bot_id)
+    if kb_version is None or not answer:
+        return
+
+    try:
+        query_vector = await get_embeddings().aembed_query(text)
+        client = initialize_async_qdrant_client()
+        await client.upsert(
+            collection_name=VectorCollections.answer_cache,
+            points=[
+                models.PointStruct(
+                    id=uuid.uuid4().hex,
+                    vector=query_vector,
+                    payload={
+                        "query": text,
+                        "answer": answer,
+                        "metadata": {
+                            "bot_id": bot_id,
+                            "kb_version": kb_version,
+                            "prompt_hash": get_prompt_hash(base_prompt),
+                            "created_at": time.time(),
+                        },
+                    },
+                )
+            ],
+        )
+    except Exception as e:
+        SilentException.capture_exception(e)
@@ -6,7 +6,6 @@ from models.repository.chat_history_repo import (
     get_all_chat_history_by_session_id_with_total,
     get_session_counts_by_user,
     get_unique_sessions_with_first_message_by_bot_id,
-    create_chat_histories,
     get_analytics,
     most_called_actions_by_bot,
 )
@@ -16,22 +15,38 @@ from models.repository.chat_intent_repo import (
     get_chat_intent_by_session_id,
 )
 from models.repository.copilot_repo import find_one_or_fail_by_token
-from routes.analytics.analytics_service import upsert_analytics_record
+from routes.analytics.analytics_service import (
+    get_analytics_time_series,
+    increment_analytics,
+)
 from routes.chat.chat_dto import ChatInput
+from routes.chat.followup_service import (
+    get_follow_up_questions,
+    wait_for_follow_up_questions,
+)
 from routes.chat.helpers import parse_json_intent
 from routes.chat.implementation.chain_strategy import ChainStrategy
+from routes.chat.speculation_stats import get_speculation_stats
 from routes.chat.implementation.functions_strategy import FunctionStrategy
 from routes.chat.implementation.handler_interface import ChatRequestHandler
 from routes.chat.implementation.tools_strategy import ToolStrategy
-from utils.llm_consts import X_App_Name, chat_strategy, ChatStrategy
+from utils.llm_consts import (
+    X_App_Name,
+    chat_strategy,
+    ChatStrategy,
+    ENABLE_PERSISTENT_EVENT_LOOP,
+)
 from utils.sqlalchemy_objs_to_json_array import sqlalchemy_objs_to_json_array
 from utils.get_chat_model import get_chat_model
-from flask_socketio import emit
+from utils.socket_emit import emit
 
 from models.repository.chat_vote_repo import (
     upvote_or_down_vote_message,
 )
 from utils.get_logger import SilentException
+from utils.conversation_buffer import append_to_conversation_buffer
+from utils.prompt_budget import get_remaining_tokens, trim_history
+from utils.write_behind import record_chat_histories, resolve_chat_message_id
 
 
 from langchain.schema import HumanMessage, SystemMessage
@@ -96,6 +111,12 @@ def get_session_chats(session_id: str) -> Response:
     return jsonify(response_data)
 
 
+@chat_workflow.route("/sessions/<session_id>/follow_up_questions", methods=["GET"])
+def get_session_follow_up_questions(session_id: str) -> Response:
+    # the follow-up questions of the session's last answer are generated after it was returned, poll while pending
+    return jsonify(get_follow_up_questions(session_id))
+
+
 @chat_workflow.route("/b/<bot_id>/chat_sessions", methods=["GET"])
 def get_chat_sessions(bot_id: str):
     # Get limit and page from query parameters
@@ -230,7 +251,7 @@ async def send_chat():
                 .replace("Salla", "")
             )
 
-    return await handle_chat_send_common(
+    response = await handle_chat_send_common(
         message,
         bot_token,
         session_id,
@@ -239,6 +260,10 @@ async def send_chat():
         is_streaming=False,
         incoming_message_id=incoming_message_id,
     )
+    if not ENABLE_PERSISTENT_EVENT_LOOP:
+        # the request's event loop is closed once it returns, the follow-up questions would be cancelled
+        await wait_for_follow_up_questions(session_id)
+    return response
 
 
 @chat_workflow.route("/webhook/<bot_token>/s/<session_id>", methods=["POST"])
@@ -321,10 +346,17 @@ async def handle_chat_send_common(
                 },
             ]
 
-            upsert_analytics_record(
+            increment_analytics(
                 chatbot_id=str(bot.id), successful_operations=1, total_operations=1
             )
-            chat_histories = create_chat_histories(str(bot.id), chat_records)
+            chat_histories = record_chat_histories(str(bot.id), chat_records)
+            append_to_conversation_buffer(
+                session_id,
+                [
+                    (bool(record["from_user"]), str(record["message"]))
+                    for record in chat_records
+                ],
+            )
 
         (
             emit(session_id, "|im_end|")
@@ -334,7 +366,7 @@ async def handle_chat_send_common(
 
         # Return the bot response message id to the client to be used for voting
         if chat_histories and len(chat_histories) > 1:
-            emit(f"{session_id}_vote", chat_histories[1].id) if is_streaming else None
+            emit(f"{session_id}_vote", chat_histories[1]) if is_streaming else None
 
         return jsonify({"type": "text", "response": {"text": result.message}})
     except BadRequest as e:
@@ -375,6 +407,7 @@ async def vote(message_id: str):
 
     try:
         bot = find_one_or_fail_by_token(bot_token)
+        message_id = resolve_chat_message_id(message_id)
         if request.method == "DELETE":
             upvote_or_down_vote_message(
                 chatbot_id=bot.id,
@@ -391,7 +424,7 @@ async def vote(message_id: str):
     return jsonify({"message": "Vote added successfully"}), 200
 
 
-# @Todo convert to chathistory, use a larger model 32k and add trim history, then start caching these conversation intents
+# @Todo convert to chathistory, use a larger model 32k, then start caching these conversation intents
 @chat_workflow.route("/intents/<session_id>", methods=["GET"])
 async def get_conversation_intent(session_id: str):
     histories, _ = get_all_chat_history_by_session_id_with_total(session_id=session_id)
@@ -432,7 +465,8 @@ JSON Format Example:
     for history in histories:
         if bool(history.from_user):
             user_messages.append(HumanMessage(content=str(history.message)))
-    messages.extend(user_messages)
+    # long sessions keep their most recent questions that fit in the model's budget
+    messages.extend(trim_history(user_messages, get_remaining_tokens(messages)))
 
     # Invoke the large language model
     result = await chat.ainvoke(messages)
@@ -454,6 +488,21 @@ def get_analytics_by_email(bot_id: str) -> Response:
     return jsonify(result)
 
 
+@chat_workflow.route("/analytics/<bot_id>/timeseries", methods=["GET"])
+def get_analytics_time_series_by_bot(bot_id: str) -> Response:
+    granularity = request.args.get("granularity", "hourly")
+    if granularity not in ("hourly", "daily"):
+        return jsonify({"error": "granularity must be hourly or daily"}), 400
+
+    days = request.args.get("days", default=7, type=int)
+    return jsonify(get_analytics_time_series(bot_id, granularity, days))
+
+
+@chat_workflow.route("/analytics/<bot_id>/speculation", methods=["GET"])
+def get_speculation_stats_by_bot(bot_id: str) -> Response:
+    return jsonify(get_speculation_stats(bot_id))
+
+
 @chat_workflow.route("/sessions/count/<email>", methods=["GET"])
 def session_counts_by_user(email: str):
     response = get_session_counts_by_user(email)
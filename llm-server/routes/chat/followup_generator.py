@@ -4,6 +4,13 @@ from typing import List, cast
 from langchain.schema import HumanMessage, SystemMessage, BaseMessage
 
 from utils import get_chat_model
+from utils.llm_consts import FOLLOWUP_HISTORY_TOKENS
+from utils.prompt_budget import (
+    count_document_tokens,
+    get_remaining_tokens,
+    select_chunks,
+    trim_history,
+)
 from routes.flow.utils.document_similarity_dto import (
     DocumentSimilarityDTO,
 )
@@ -25,13 +32,14 @@ def extract_follow_up_questions(content: str):
     return r
 
 
-def generate_conversation_string(conversation_history: List[BaseMessage]) -> str:
+def generate_conversation_string(
+    conversation_history: List[BaseMessage], max_tokens: int
+) -> str:
     conversation_str = ""
-    # add trim history for robustness
-    for message in conversation_history[-8:]:
+    for message in trim_history(conversation_history, max_tokens):
         if message.type == "ai":
             conversation_str += f"Assistant: {message.content} \n"
-        if message.type == "Human":
+        if message.type == "human":
             conversation_str += f"Human: {message.content} \n"
     return conversation_str
 
@@ -44,24 +52,10 @@ async def generate_follow_up_questions(
     knowledgebase: List[DocumentSimilarityDTO],
 ):
     chat = get_chat_model("generate_follow_up_questions")
-    conversation_string = generate_conversation_string(conversation_history)
-    content = ""
-    for action in actions:
-        content = content + action.document.page_content + "\n"
-
-    for kb in knowledgebase:
-        content = content + kb.document.page_content + "\n"
-
-    messages = [
-        SystemMessage(
-            content="You are an intelligent machine learning model that can predict follow-up questions that the user may ask."
-        ),
-        HumanMessage(
-            content=f"The followup questions you generate should correspond to the question asked by the user and your capabilities. Your capabilities are as follows: {content}"
-        ),
-        HumanMessage(
-            content=f"The followup questions you generate should correspond to the question asked by the user and your capabilities. Your capabilities are as follows: {content}"
-        ),
+    system_message = SystemMessage(
+        content="You are an intelligent machine learning model that can predict follow-up questions that the user may ask."
+    )
+    instructions = [
         HumanMessage(
             content="Limit your response to 4 follow-up questions based on most similar content to knowledgebase and actions."
         ),
@@ -78,10 +72,36 @@ async def generate_follow_up_questions(
                 ]
             }"""
         ),
-        HumanMessage(content="History: {}.".format(conversation_string)),
+    ]
+    turn = [
         HumanMessage(content="Current Input: {}.".format(current_input)),
         HumanMessage(content="Assistant response: {}.".format(llm_response)),
     ]
+
+    # the capabilities and the history share what the fixed messages leave of the budget
+    remaining = get_remaining_tokens([system_message, *instructions, *turn])
+    history_tokens = min(FOLLOWUP_HISTORY_TOKENS, remaining // 2)
+    capabilities = select_chunks(
+        [
+            (dto.document.page_content + "\n", count_document_tokens(dto.document) + 1)
+            for dto in actions + knowledgebase
+        ],
+        remaining - history_tokens,
+    )
+    content = "".join(capabilities)
+    conversation_string = generate_conversation_string(
+        conversation_history, history_tokens
+    )
+
+    messages = [
+        system_message,
+        HumanMessage(
+            content=f"The followup questions you generate should correspond to the question asked by the user and your capabilities. Your capabilities are as follows: {content}"
+        ),
+        *instructions,
+        HumanMessage(content="History: {}.".format(conversation_string)),
+        *turn,
+    ]
     result = await chat.ainvoke(messages)
 
     # Assuming extract_follow_up_questions is a function to extract follow-up questions from the model's response
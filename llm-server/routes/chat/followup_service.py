@@ -0,0 +1,132 @@
+import asyncio
+import json
+import weakref
+from typing import Any, Dict, List, Optional
+
+from langchain.schema import BaseMessage
+
+from routes.chat.followup_generator import generate_follow_up_questions
+from routes.flow.utils.document_similarity_dto import DocumentSimilarityDTO
+from utils.get_logger import SilentException
+from utils.llm_consts import FOLLOWUP_QUESTIONS_TTL, redis_client
+from utils.socket_emit import emit
+
+FOLLOW_UP_QUESTIONS_KEY_FORMAT = "follow_up_questions:{}"
+
+
+class FollowUpStatus:
+    pending = "pending"
+    ready = "ready"
+    failed = "failed"
+    none = "none"  # nothing was generated for the session's last answer, or it expired
+
+
+# the generations running on each event loop, by session
+_pending: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def store_follow_up_questions(
+    session_id: str, status: str, questions: Optional[List[Dict[str, Any]]] = None
+) -> None:
+    try:
+        redis_client.set(
+            FOLLOW_UP_QUESTIONS_KEY_FORMAT.format(session_id),
+            json.dumps({"status": status, "follow_up_questions": questions or []}),
+            ex=FOLLOWUP_QUESTIONS_TTL,
+        )
+    except Exception as e:
+        SilentException.capture_exception(e)
+
+
+def get_follow_up_questions(session_id: str) -> Dict[str, Any]:
+    """The follow-up questions of the session's last answer, once their status is ready"""
+    value = redis_client.get(FOLLOW_UP_QUESTIONS_KEY_FORMAT.format(session_id))
+    if value is None:
+        return {"status": FollowUpStatus.none, "follow_up_questions": []}
+    return json.loads(value)
+
+
+async def run_follow_up_questions(
+    session_id: str,
+    is_streaming: bool,
+    conversation_history: List[BaseMessage],
+    llm_response: str,
+    current_input: str,
+    actions: List[DocumentSimilarityDTO],
+    knowledgebase: List[DocumentSimilarityDTO],
+) -> None:
+    try:
+        followups = await generate_follow_up_questions(
+            conversation_history,
+            llm_response,
+            current_input,
+            actions=actions,
+            knowledgebase=knowledgebase,
+        )
+    except Exception as e:
+        SilentException.capture_exception(e)
+        store_follow_up_questions(session_id, FollowUpStatus.failed)
+        return
+
+    store_follow_up_questions(
+        session_id, FollowUpStatus.ready, followups.dict()["follow_up_questions"]
+    )
+    if is_streaming:
+        emit(f"{session_id}_follow_qns", followups.json())
+
+
+def schedule_follow_up_questions(
+    session_id: str,
+    is_streaming: bool,
+    conversation_history: List[BaseMessage],
+    llm_response: str,
+    current_input: str,
+    actions: List[DocumentSimilarityDTO],
+    knowledgebase: List[DocumentSimilarityDTO],
+) -> asyncio.Task:
+    """
+    Generates the follow-up questions of an answer in the background, the answer is returned and its history saved
+    without waiting for them. They are emitted to the session once ready, and can be retrieved with
+    get_follow_up_questions by the clients of the non-streaming endpoints.
+    """
+    store_follow_up_questions(session_id, FollowUpStatus.pending)
+
+    loop = asyncio.get_running_loop()
+    pending = _pending.get(loop)
+    if pending is None:
+        pending = {}
+        _pending[loop] = pending
+
+    task = asyncio.create_task(
+        run_follow_up_questions(
+            session_id,
+            is_streaming,
+            conversation_history,
+            llm_response,
+            current_input,
+            actions,
+            knowledgebase,
+        )
+    )
+    pending[session_id] = task
+
+    def forget(done: asyncio.Task):
+        if pending.get(session_id) is done:
+            del pending[session_id]
+
+    task.add_done_callback(forget)
+    return task
+
+
+def get_follow_up_task(session_id: str) -> Optional[asyncio.Task]:
+    """The generation of the session's follow-up questions running on the loop, if any"""
+    return _pending.get(asyncio.get_running_loop(), {}).get(session_id)
+
+
+async def wait_for_follow_up_questions(session_id: str) -> None:
+    """Waits for the session's follow-up questions being generated on the running loop, if any"""
+    task = get_follow_up_task(session_id)
+    if task is not None:
+        await asyncio.wait([task])
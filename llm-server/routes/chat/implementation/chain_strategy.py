@@ -1,16 +1,14 @@
-from flask_socketio import emit
+from utils.socket_emit import emit
 from models.repository.chat_history_repo import get_chat_message_as_llm_conversation
-from routes.chat.followup_generator import generate_follow_up_questions
+from routes.chat.followup_service import schedule_follow_up_questions
+from routes.chat.speculation_stats import record_speculation
 from routes.chat.implementation.handler_interface import ChatRequestHandler
 from typing import Dict, Optional
 import asyncio
 import threading
+import time
 from custom_types.response_dict import LLMResponse
-from routes.flow.utils.api_retrievers import (
-    get_relevant_actions,
-    get_relevant_flows,
-    get_relevant_knowledgebase,
-)
+from routes.flow.utils.api_retrievers import get_relevant_chat_documents
 from routes.flow.utils.document_similarity_dto import select_top_documents
 
 from routes.flow.utils.process_conversation_step import get_next_response_type
@@ -21,8 +19,12 @@ from routes.root_service import (
     run_informative_item,
 )
 from shared.models.opencopilot_db.chatbot import Chatbot
-from utils.llm_consts import VectorCollections
-from models.repository.action_call_repo import add_action_call
+from utils.emit_stream import StreamProgress
+from utils.llm_consts import (
+    VectorCollections,
+    SPECULATIVE_ANSWER_BOT_IDS,
+    is_enabled_for_bot,
+)
 from utils.llm_consts import enable_followup_questions
 
 
@@ -42,13 +44,14 @@ class ChainStrategy(ChatRequestHandler):
         check_required_fields(base_prompt, text)
 
         tasks = [
-            get_relevant_knowledgebase(text, str(bot.id)),
-            get_relevant_actions(text, str(bot.id)),
-            get_relevant_flows(text, str(bot.id)),
+            get_relevant_chat_documents(text, str(bot.id)),
             get_chat_message_as_llm_conversation(session_id),
         ]
         results = await asyncio.gather(*tasks)
-        knowledgebase, actions, flows, conversations_history = results
+        relevant_documents, conversations_history = results
+        knowledgebase = relevant_documents[VectorCollections.knowledgebase]
+        actions = relevant_documents[VectorCollections.actions]
+        flows = relevant_documents[VectorCollections.flows]
 
         top_documents = select_top_documents(actions + flows + knowledgebase)
 
@@ -57,22 +60,53 @@ class ChainStrategy(ChatRequestHandler):
             if is_streaming
             else None
         )
-        next_step = get_next_response_type(
+        # start answering as if the message were informative, the answer is held back until the verdict is known
+        speculative_answer: Optional[asyncio.Task] = None
+        release = asyncio.Event()
+        progress = StreamProgress()
+        speculation_started_at = time.monotonic()
+        if is_enabled_for_bot(SPECULATIVE_ANSWER_BOT_IDS, str(bot.id)):
+            speculative_answer = asyncio.create_task(
+                run_informative_item(
+                    informative_item=top_documents,
+                    base_prompt=base_prompt,
+                    text=text,
+                    conversations_history=conversations_history,
+                    is_streaming=is_streaming,
+                    session_id=session_id,
+                    bot_id=str(bot.id),
+                    release=release,
+                    progress=progress,
+                )
+            )
+
+        # the classifier call is blocking, keep it off the event loop shared by the other chats and the speculative answer
+        next_step = await asyncio.to_thread(
+            get_next_response_type,
             user_message=text,
             session_id=session_id,
             chat_history=conversations_history,
             top_documents=top_documents,
+            bot_id=str(bot.id),
         )
+        head_start = time.monotonic() - speculation_started_at
 
         (
             emit(
                 f"{session_id}_info",
-                f"Is next step actionable: {next_step.actionable}... \n",
+                f"Is next step actionable: {next_step.actionable} ({next_step.route})... \n",
             )
             if is_streaming
             else None
         )
         if next_step.actionable and next_step.api:
+            if speculative_answer is not None:
+                speculative_answer.cancel()
+                await asyncio.gather(speculative_answer, return_exceptions=True)
+                record_speculation(
+                    str(bot.id), used=False, chunks=progress.chunks, head_start=head_start
+                )
+
             # if the LLM given operationID is actually exist, then use it, otherwise fallback to the highest vector space document
             llm_predicted_operation_id = (
                 is_the_llm_predicted_operation_id_actually_true(
@@ -102,17 +136,8 @@ class ChainStrategy(ChatRequestHandler):
                 session_id=session_id,
             )
 
+            # the called operations are recorded by run_actionable_item
             response.api_called = True
-            if (
-                actionable_item
-                and "actions" in actionable_item
-                and actionable_item["actions"]
-            ):
-                action = actionable_item["actions"][0]
-                operation_id = action.document.metadata.get("operation_id", "")
-                add_action_call(
-                    operation_id=operation_id, session_id=session_id, bot_id=str(bot.id)
-                )
             return response
 
         else:
@@ -123,28 +148,35 @@ class ChainStrategy(ChatRequestHandler):
                 if is_streaming
                 else None
             )
-            response = await run_informative_item(
-                informative_item=top_documents,
-                base_prompt=base_prompt,
-                text=text,
-                conversations_history=conversations_history,
-                is_streaming=is_streaming,
-                session_id=session_id,
-            )
+            if speculative_answer is not None:
+                release.set()
+                response = await speculative_answer
+                record_speculation(
+                    str(bot.id), used=True, chunks=progress.chunks, head_start=head_start
+                )
+            else:
+                response = await run_informative_item(
+                    informative_item=top_documents,
+                    base_prompt=base_prompt,
+                    text=text,
+                    conversations_history=conversations_history,
+                    is_streaming=is_streaming,
+                    session_id=session_id,
+                    bot_id=str(bot.id),
+                )
 
             emit(session_id, "|im_end|") if is_streaming else None
 
-            # we only support follow_up question this in streaming mode
-
+            # generated while the answer is saved and returned, emitted when ready
             if enable_followup_questions:
-                followup_question_list = await generate_follow_up_questions(
+                schedule_follow_up_questions(
+                    session_id,
+                    is_streaming,
                     conversations_history,
                     response.message or "",
                     text,
                     actions=actions,
                     knowledgebase=knowledgebase,
                 )
-                if is_streaming:
-                    emit(f"{session_id}_follow_qns", followup_question_list.json())
             response.knowledgebase_called = True
             return response
@@ -0,0 +1,249 @@
+import os
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.repository.action_call_repo import get_latest_action_calls_by_bot_id
+from models.repository.chat_history_repo import get_latest_chat_history_by_bot_id
+from routes.uploads.celery_service import celery
+from shared.utils.opencopilot_utils.get_embeddings import get_embeddings
+from utils.get_logger import SilentException
+from utils.llm_consts import (
+    INTENT_CLASSIFIER_BOT_IDS,
+    INTENT_CLASSIFIER_MIN_MARGIN,
+    INTENT_CLASSIFIER_MIN_SAMPLES,
+    INTENT_CLASSIFIER_MIN_SIMILARITY,
+    INTENT_CLASSIFIER_RETRAIN_INTERVAL,
+    INTENT_CLASSIFIER_TRAINING_LIMIT,
+    SHARED_FOLDER,
+    is_enabled_for_bot,
+    redis_client,
+)
+
+# the label of messages answered from the knowledgebase, every other label is an operation id
+INFORMATIVE_LABEL = "__informative__"
+INTENT_CLASSIFIERS_FOLDER = os.path.join(SHARED_FOLDER, "intent_classifiers")
+# set while a bot without a classifier waits for its training, so it is requested once per retrain interval
+INTENT_CLASSIFIER_TRAINING_KEY_FORMAT = "intent_classifier_training:{}"
+
+
+@dataclass
+class IntentPrediction:
+    label: str
+    similarity: float
+    margin: float
+
+    @property
+    def actionable(self) -> bool:
+        return self.label != INFORMATIVE_LABEL
+
+
+class IntentClassifier:
+    """Nearest centroid classifier over normalized query embeddings"""
+
+    def __init__(self, centroids: np.ndarray, labels: np.ndarray):
+        self.centroids = centroids
+        self.labels = labels
+
+    @classmethod
+    def fit(
+        cls, embeddings: np.ndarray, labels: List[str], min_samples: int
+    ) -> Optional["IntentClassifier"]:
+        samples: Dict[str, List[int]] = defaultdict(list)
+        for index, label in enumerate(labels):
+            samples[label].append(index)
+
+        kept_labels = [
+            label for label, indexes in samples.items() if len(indexes) >= min_samples
+        ]
+        # a single class can't discriminate anything
+        if len(kept_labels) < 2:
+            return None
+
+        normalized = normalize(embeddings)
+        centroids = np.stack(
+            [normalized[samples[label]].mean(axis=0) for label in kept_labels]
+        )
+        return cls(normalize(centroids).astype(np.float32), np.array(kept_labels))
+
+    def predict(self, query_vector: List[float]) -> IntentPrediction:
+        similarities = self.centroids @ normalize(
+            np.asarray(query_vector, dtype=np.float32)
+        )
+        ranking = np.argsort(similarities)[::-1]
+        best, runner_up = ranking[0], ranking[1]
+
+        return IntentPrediction(
+            label=str(self.labels[best]),
+            similarity=float(similarities[best]),
+            margin=float(similarities[best] - similarities[runner_up]),
+        )
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write then rename, so the chat process never loads a partially written file
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, centroids=self.centroids, labels=self.labels)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IntentClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["centroids"], data["labels"])
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def get_intent_classifier_path(bot_id: str) -> str:
+    return os.path.join(INTENT_CLASSIFIERS_FOLDER, f"{bot_id}.npz")
+
+
+def get_labelled_queries(bot_id: str) -> Tuple[List[str], List[str]]:
+    """
+    Pairs every user message with the outcome of its turn, the operation id that was called or the informative
+    label. Action calls are attributed to a turn by timestamp, since both chat history rows of a turn are written
+    once the turn completes.
+    """
+    histories = get_latest_chat_history_by_bot_id(
+        bot_id, limit=INTENT_CLASSIFIER_TRAINING_LIMIT
+    )
+    action_calls: Dict[str, list] = defaultdict(list)
+    for action_call in get_latest_action_calls_by_bot_id(
+        bot_id, limit=INTENT_CLASSIFIER_TRAINING_LIMIT
+    ):
+        action_calls[str(action_call.session_id)].append(action_call)
+
+    queries: List[str] = []
+    labels: List[str] = []
+    user_messages: Dict[str, str] = {}
+    turn_started_at: Dict[str, object] = {}
+
+    for history in histories:
+        session_id = str(history.session_id)
+        if history.from_user:
+            user_messages[session_id] = str(history.message)
+            continue
+
+        query = user_messages.pop(session_id, None)
+        started_at = turn_started_at.get(session_id)
+        turn_started_at[session_id] = history.created_at
+        if not query:
+            continue
+
+        if history.api_called:
+            operation_ids = [
+                str(action_call.operation_id)
+                for action_call in action_calls[session_id]
+                if (started_at is None or action_call.timestamp > started_at)
+                and action_call.timestamp <= history.created_at
+            ]
+            # turns that called several actions don't map to a single intent
+            if len(set(operation_ids)) == 1:
+                queries.append(query)
+                labels.append(operation_ids[0])
+        elif history.knowledgebase_called:
+            queries.append(query)
+            labels.append(INFORMATIVE_LABEL)
+
+    return queries, labels
+
+
+def train_intent_classifier(bot_id: str) -> Optional[IntentClassifier]:
+    queries, labels = get_labelled_queries(bot_id)
+    if not queries:
+        return None
+
+    embeddings = np.asarray(get_embeddings().embed_documents(queries), np.float32)
+    classifier = IntentClassifier.fit(
+        embeddings, labels, min_samples=INTENT_CLASSIFIER_MIN_SAMPLES
+    )
+    path = get_intent_classifier_path(bot_id)
+
+    if classifier is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+
+    classifier.save(path)
+    return classifier
+
+
+_loaded_classifiers: Dict[str, Tuple[float, IntentClassifier]] = {}
+_loaded_classifiers_lock = threading.Lock()
+
+
+def get_intent_classifier(bot_id: str) -> Optional[IntentClassifier]:
+    """Returns the bot's latest trained classifier, reloading it whenever the worker retrained it"""
+    path = get_intent_classifier_path(bot_id)
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+    with _loaded_classifiers_lock:
+        loaded = _loaded_classifiers.get(bot_id)
+        if loaded and loaded[0] == mtime:
+            return loaded[1]
+
+    try:
+        classifier = IntentClassifier.load(path)
+    except Exception as e:
+        SilentException.capture_exception(e)
+        return None
+
+    with _loaded_classifiers_lock:
+        _loaded_classifiers[bot_id] = (mtime, classifier)
+
+    return classifier
+
+
+def request_intent_classifier_training(bot_id: str) -> None:
+    """Has the workers train the bot's classifier now rather than at the next periodic training"""
+    try:
+        if redis_client.set(
+            INTENT_CLASSIFIER_TRAINING_KEY_FORMAT.format(bot_id),
+            1,
+            nx=True,
+            ex=INTENT_CLASSIFIER_RETRAIN_INTERVAL,
+        ):
+            celery.send_task(
+                "workers.tasks.train_intent_classifiers.train_bot_intent_classifier",
+                args=[bot_id],
+            )
+    except Exception as e:
+        SilentException.capture_exception(e)
+
+
+def predict_intent(bot_id: Optional[str], text: str) -> Optional[IntentPrediction]:
+    """
+    Returns the classifier's prediction for the message, or None if the bot has no classifier or the prediction is
+    not confident enough to skip the LLM classifier. Embeds the message on a cache miss, call it off the event loop.
+    """
+    if bot_id is None or not is_enabled_for_bot(INTENT_CLASSIFIER_BOT_IDS, bot_id):
+        return None
+
+    classifier = get_intent_classifier(bot_id)
+    if classifier is None:
+        request_intent_classifier_training(bot_id)
+        return None
+
+    try:
+        # served from the embedding cache, retrieval embedded the same text
+        prediction = classifier.predict(get_embeddings().embed_query(text))
+    except Exception as e:
+        SilentException.capture_exception(e)
+        return None
+
+    if (
+        prediction.similarity < INTENT_CLASSIFIER_MIN_SIMILARITY
+        or prediction.margin < INTENT_CLASSIFIER_MIN_MARGIN
+    ):
+        return None
+
+    return prediction
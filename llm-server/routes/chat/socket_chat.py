@@ -0,0 +1,64 @@
+import asyncio
+from functools import lru_cache
+
+import socketio
+from flask import Flask
+
+from routes.chat.chat_controller import send_chat_stream
+from routes.chat.chat_dto import ChatInput
+from routes.uploads.celery_service import celery
+from shared.utils.opencopilot_utils.telemetry import log_opensource_telemetry_data
+from utils.llm_consts import (
+    CHAT_WORKER_QUEUE,
+    SOCKETIO_CHANNEL,
+    SOCKETIO_MESSAGE_QUEUE,
+)
+from utils.socket_emit import Emitter, use_emitter
+
+
+async def run_socket_chat(
+    app: Flask, user_message: ChatInput, emitter: Emitter, telemetry_data: dict
+) -> None:
+    # the chat outlives its socket event, it runs in its own app context and emits to the client through the emitter
+    with app.app_context(), use_emitter(emitter):
+        await send_chat_stream(
+            user_message.content,
+            user_message.bot_token,
+            user_message.session_id,
+            user_message.headers,
+            user_message.extra_params or {},
+            user_message.id or None,  # incoming message (assigned by the client)
+        )
+
+    asyncio.get_running_loop().run_in_executor(
+        None, log_opensource_telemetry_data, telemetry_data
+    )
+
+
+def queue_socket_chat(sid: str, json_data: dict, telemetry_data: dict) -> None:
+    """Hands the chat over to the chat workers, they emit to the client through the Socket.IO message queue"""
+    celery.send_task(
+        "workers.tasks.process_chat.process_chat",
+        args=[sid, json_data, telemetry_data],
+        queue=CHAT_WORKER_QUEUE,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_message_queue() -> socketio.RedisManager:
+    if SOCKETIO_MESSAGE_QUEUE is None:
+        raise ValueError("Chat workers need SOCKETIO_MESSAGE_QUEUE to emit")
+
+    return socketio.RedisManager(
+        SOCKETIO_MESSAGE_QUEUE, channel=SOCKETIO_CHANNEL, write_only=True
+    )
+
+
+def get_queue_emitter(sid: str) -> Emitter:
+    """Emits to a client connected to any of the servers, from outside of them"""
+    message_queue = get_message_queue()
+
+    def emit_to_client(event: str, data) -> None:
+        message_queue.emit(event, data, to=sid, namespace="/")
+
+    return emit_to_client
@@ -0,0 +1,43 @@
+import logging
+from typing import Dict
+
+from utils.get_logger import SilentException
+from utils.llm_consts import redis_client
+
+SPECULATION_STATS_KEY_FORMAT = "speculation_stats:{}"
+
+
+def record_speculation(bot_id: str, used: bool, chunks: int, head_start: float):
+    """
+    Records the outcome of a speculative answer generation.
+
+    Args:
+        bot_id: The bot the answer was generated for.
+        used: Whether the message turned out informative and the answer was kept.
+        chunks: The number of chunks generated before the verdict, wasted if the answer was discarded.
+        head_start: Seconds the generation ran before the verdict, the latency saved if the answer was kept.
+    """
+    logging.info(
+        "Speculative answer for bot %s used=%s chunks=%s head_start=%.3fs",
+        bot_id,
+        used,
+        chunks,
+        head_start,
+    )
+    try:
+        key = SPECULATION_STATS_KEY_FORMAT.format(bot_id)
+        pipeline = redis_client.pipeline()
+        pipeline.hincrby(key, "runs", 1)
+        if used:
+            pipeline.hincrby(key, "used", 1)
+            pipeline.hincrby(key, "saved_ms", int(head_start * 1000))
+        else:
+            pipeline.hincrby(key, "wasted_chunks", chunks)
+        pipeline.execute()
+    except Exception as e:
+        SilentException.capture_exception(e)
+
+
+def get_speculation_stats(bot_id: str) -> Dict[str, int]:
+    stats = redis_client.hgetall(SPECULATION_STATS_KEY_FORMAT.format(bot_id))
+    return {key: int(value) for key, value in stats.items()}
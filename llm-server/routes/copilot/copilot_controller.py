@@ -19,6 +19,7 @@ from models.repository.copilot_repo import (
 from models.repository.powerup_repo import create_powerups_bulk
 from shared.models.opencopilot_db.chatbot import Chatbot
 from routes._swagger.reindex_service import migrate_actions
+from utils.chatbot_cache import invalidate_chatbot
 from utils.get_logger import SilentException
 from workers.notification_proxy import (
     send_copilot_created_follow_up_email,
@@ -101,6 +102,7 @@ def delete_bot(user, copilot_id):
         # This should be soft delete but for now, we are doing hard delete
         session.delete(bot)
         session.commit()
+        invalidate_chatbot(copilot_id)
         return jsonify({"success": "chatbot_deleted"}), 200
     except ValueError:
         # If the bot is not found, a ValueError is raised
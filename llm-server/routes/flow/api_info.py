@@ -9,9 +9,12 @@ class ApiInfo:
         path_params: Any,
         query_params: Any,
         body_schema: Any,
+        timeout: Optional[float] = None,
     ) -> None:
         self.endpoint = endpoint
         self.method = method
         self.path_params: Any = path_params
         self.query_params: Any = query_params
         self.body_schema = body_schema
+        # in seconds, None for the default
+        self.timeout = timeout
@@ -9,6 +9,7 @@ from entities.flow_entity import FlowDTO
 from shared.utils.opencopilot_utils import get_vector_store
 from shared.utils.opencopilot_utils.interfaces import StoreOptions
 from utils.llm_consts import initialize_qdrant_client
+from utils.prompt_budget import with_token_count
 
 client = initialize_qdrant_client()
 
@@ -54,6 +55,7 @@ def create_flow(flow: FlowDTO):
             "operation_id": flow.operation_id,
         }
     )
+    with_token_count(document)
 
     documents.append(document)
 
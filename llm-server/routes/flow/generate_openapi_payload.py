@@ -1,17 +1,49 @@
+import asyncio
 import json
 import os
-from typing import Optional
+import weakref
+from typing import Any, Awaitable, Optional
 
 from entities.action_entity import ActionDTO
 from extractors.extract_body import gen_body_from_schema
 from extractors.extract_param import gen_params_from_schema
+from extractors.extract_payload import gen_payload_from_schema
 from routes.flow.api_info import ApiInfo
 from shared.utils.opencopilot_utils import get_llm
+from utils.get_logger import SilentException
+from utils.llm_consts import (
+    PAYLOAD_GENERATION_CONCURRENCY,
+    SINGLE_CALL_PAYLOAD_BOT_IDS,
+    is_enabled_for_bot,
+)
 
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
 llm = get_llm()
 
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_payload_generation_semaphore() -> asyncio.Semaphore:
+    # semaphores can't be shared across event loops
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(PAYLOAD_GENERATION_CONCURRENCY)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def bounded(generation: Awaitable[Any]) -> Any:
+    async with get_payload_generation_semaphore():
+        return await generation
+
+
+async def unchanged(value: Any) -> Any:
+    return value
+
 
 async def generate_api_payload(
     text: str,
@@ -19,6 +51,7 @@ async def generate_api_payload(
     prev_api_response: str,
     app: Optional[str],
     current_state: Optional[str],
+    bot_id: Optional[str] = None,
 ) -> ApiInfo:
     payload = action.payload
 
@@ -48,33 +81,73 @@ async def generate_api_payload(
         path_params=path_params,
         query_params=query_params,
         body_schema=body_schema,
+        timeout=payload.get("timeout"),
     )
 
-    if api_info.path_params:
-        api_info.path_params = await gen_params_from_schema(
-            json.dumps(api_info.path_params, separators=(",", ":")),
-            text,
-            prev_api_response,
-            current_state,
-        )
+    if (
+        bot_id is not None
+        and is_enabled_for_bot(SINGLE_CALL_PAYLOAD_BOT_IDS, bot_id)
+        and (api_info.path_params or api_info.query_params or api_info.body_schema)
+    ):
+        try:
+            generated = await bounded(
+                gen_payload_from_schema(
+                    api_info.path_params,
+                    api_info.query_params,
+                    api_info.body_schema,
+                    text,
+                    prev_api_response,
+                    app,
+                    current_state,
+                )
+            )
+        except Exception as e:
+            SilentException.capture_exception(e)
+            generated = None
 
-    if api_info.query_params:
-        api_info.query_params = await gen_params_from_schema(
-            json.dumps(api_info.query_params, separators=(",", ":")),
-            text,
-            prev_api_response,
-            current_state,
-        )
+        if generated is not None:
+            api_info.path_params = generated["path_params"]
+            api_info.query_params = generated["query_params"]
+            api_info.body_schema = generated["body"] if api_info.body_schema else {}
+            return api_info
 
-    if api_info.body_schema:
-        api_info.body_schema = await gen_body_from_schema(
-            json.dumps(api_info.body_schema, separators=(",", ":")),
-            text,
-            prev_api_response,
-            app,
-            current_state,
+    # the three parts are independent of each other, generate them concurrently
+    path_params, query_params, body_schema = await asyncio.gather(
+        bounded(
+            gen_params_from_schema(
+                json.dumps(api_info.path_params, separators=(",", ":")),
+                text,
+                prev_api_response,
+                current_state,
+            )
+        )
+        if api_info.path_params
+        else unchanged(api_info.path_params),
+        bounded(
+            gen_params_from_schema(
+                json.dumps(api_info.query_params, separators=(",", ":")),
+                text,
+                prev_api_response,
+                current_state,
+            )
         )
-    else:
-        api_info.body_schema = {}
+        if api_info.query_params
+        else unchanged(api_info.query_params),
+        bounded(
+            gen_body_from_schema(
+                json.dumps(api_info.body_schema, separators=(",", ":")),
+                text,
+                prev_api_response,
+                app,
+                current_state,
+            )
+        )
+        if api_info.body_schema
+        else unchanged({}),
+    )
+
+    api_info.path_params = path_params
+    api_info.query_params = query_params
+    api_info.body_schema = body_schema
 
     return api_info
@@ -0,0 +1,95 @@
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Mapping
+
+from cachetools import TTLCache
+
+from entities.action_entity import ActionDTO
+from entities.flow_entity import FlowDTO
+from models.repository.action_repo import list_all_actions
+from models.repository.flow_repo import get_all_flows_for_bot
+from utils.action_catalog_version import get_action_catalog_version
+from utils.get_logger import SilentException
+from utils.llm_consts import ACTION_CATALOG_MAX_SIZE, ACTION_CATALOG_TTL
+
+
+@dataclass(frozen=True)
+class ActionCatalog:
+    """
+    The compiled actions and flows of a bot. The catalog is shared between requests, its DTOs must be treated as
+    read-only.
+    """
+
+    version: int
+    # by operation id
+    actions: Mapping[str, ActionDTO]
+    # by flow id
+    flows: Mapping[str, FlowDTO]
+
+
+_catalogs: TTLCache = TTLCache(
+    maxsize=ACTION_CATALOG_MAX_SIZE, ttl=max(ACTION_CATALOG_TTL, 1)
+)
+_catalogs_lock = threading.Lock()
+
+
+def compile_action_catalog(bot_id: str, version: int) -> ActionCatalog:
+    actions: Dict[str, ActionDTO] = {}
+    for action in list_all_actions(bot_id):
+        if not action.operation_id or action.operation_id in actions:
+            continue
+
+        actions[action.operation_id] = ActionDTO(
+            bot_id=bot_id,
+            name=action.name,
+            api_endpoint=action.api_endpoint,
+            description=action.description,
+            request_type=action.request_type,
+            operation_id=action.operation_id,
+            payload=action.payload,
+            cache_policy=action.cache_policy,
+        )
+
+    flows: Dict[str, FlowDTO] = {}
+    for flow in get_all_flows_for_bot(bot_id):
+        try:
+            flows[str(flow.id)] = FlowDTO(
+                id=flow.id,
+                bot_id=bot_id,
+                flow_id=flow.id,
+                name=flow.name,
+                description=flow.description,
+                blocks=flow.payload,
+                variables=[],
+            )
+        except Exception as e:
+            # a malformed flow must not take the bot's other actions down with it
+            SilentException.capture_exception(e)
+
+    return ActionCatalog(
+        version=version,
+        actions=MappingProxyType(actions),
+        flows=MappingProxyType(flows),
+    )
+
+
+def get_action_catalog(bot_id: str) -> ActionCatalog:
+    """
+    Returns the bot's compiled catalog, rebuilding it with one query per table whenever the bot's actions or flows
+    changed. If the catalog version can't be read, the cached catalog is served until it expires.
+    """
+    version = get_action_catalog_version(bot_id)
+    with _catalogs_lock:
+        catalog = _catalogs.get(bot_id)
+
+    if catalog is not None and (version is None or catalog.version == version):
+        return catalog
+
+    catalog = compile_action_catalog(bot_id, version or 0)
+    # a catalog compiled while the version could not be read is not cached, it can't be validated later
+    if version is not None:
+        with _catalogs_lock:
+            _catalogs[bot_id] = catalog
+
+    return catalog
@@ -1,5 +1,7 @@
+import asyncio
 import os
-from typing import List, Dict
+from dataclasses import dataclass
+from typing import List, Dict, Optional
 
 from langchain.docstore.document import Document
 from qdrant_client import models
@@ -8,7 +10,12 @@ from routes.flow.utils.document_similarity_dto import DocumentSimilarityDTO
 from shared.utils.opencopilot_utils import StoreOptions
 from shared.utils.opencopilot_utils.get_embeddings import get_embeddings
 from shared.utils.opencopilot_utils.get_vector_store import get_vector_store
-from utils.llm_consts import vs_thresholds, VectorCollections, initialize_qdrant_client
+from utils.llm_consts import (
+    vs_thresholds,
+    VectorCollections,
+    initialize_qdrant_client,
+    initialize_async_qdrant_client,
+)
 from utils.get_logger import SilentException
 
 client = initialize_qdrant_client()
@@ -27,53 +34,125 @@ score_thresholds: Dict[str, float] = {
 }
 
 
-async def get_relevant_documents(
-    text: str, bot_id: str, collection_name: str, limit=4
-) -> List[DocumentSimilarityDTO]:
-    try:
-        embedding = get_embeddings()
-        query_vector = embedding.embed_query(text)
-
-        query_response = client.search(
-            collection_name=collection_name,
-            query_filter=models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="metadata.bot_id",
-                        match=models.MatchValue(value=bot_id),
-                    )
-                ]
-            ),
-            query_vector=query_vector,
-            with_payload=True,
-            limit=limit,
-            search_params=models.SearchParams(hnsw_ef=128, exact=False),
-            score_threshold=score_thresholds.get(collection_name, 0.0),
-        )
+@dataclass
+class CollectionSearch:
+    """A single collection lookup, the threshold defaults to the collection's configured one"""
+
+    collection_name: str
+    limit: int = 4
+    score_threshold: Optional[float] = None
+
+    def get_score_threshold(self) -> float:
+        if self.score_threshold is not None:
+            return self.score_threshold
+        return score_thresholds.get(self.collection_name, 0.0)
+
 
-        documents_with_similarity: List[DocumentSimilarityDTO] = []
-        for response in query_response:
-            payload = response.payload
-
-            if not payload:
-                continue
-
-            documents_with_similarity.append(
-                DocumentSimilarityDTO(
-                    score=response.score,
-                    type=collection_name,
-                    document=Document(
-                        page_content=payload.get("page_content", ""),
-                        metadata=payload.get("metadata", {}),
-                    ),
+# The collections consulted on every chat turn
+chat_collection_searches: List[CollectionSearch] = [
+    CollectionSearch(VectorCollections.knowledgebase),
+    CollectionSearch(VectorCollections.actions, limit=7),
+    CollectionSearch(VectorCollections.flows),
+]
+
+
+async def search_collection(
+    query_vector: List[float], bot_id: str, search: CollectionSearch
+) -> List[DocumentSimilarityDTO]:
+    async_client = initialize_async_qdrant_client()
+    query_response = await async_client.search(
+        collection_name=search.collection_name,
+        query_filter=models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="metadata.bot_id",
+                    match=models.MatchValue(value=bot_id),
                 )
+            ]
+        ),
+        query_vector=query_vector,
+        with_payload=True,
+        limit=search.limit,
+        search_params=models.SearchParams(hnsw_ef=128, exact=False),
+        score_threshold=search.get_score_threshold(),
+    )
+
+    documents_with_similarity: List[DocumentSimilarityDTO] = []
+    for response in query_response:
+        payload = response.payload
+
+        if not payload:
+            continue
+
+        documents_with_similarity.append(
+            DocumentSimilarityDTO(
+                score=response.score,
+                type=search.collection_name,
+                document=Document(
+                    page_content=payload.get("page_content", ""),
+                    metadata=payload.get("metadata", {}),
+                ),
             )
+        )
+
+    return documents_with_similarity
+
+
+async def get_relevant_documents_from_collections(
+    text: str, bot_id: str, searches: List[CollectionSearch]
+) -> Dict[str, List[DocumentSimilarityDTO]]:
+    """
+    Embeds the text once and searches every requested collection concurrently with the same query vector.
 
-        return documents_with_similarity
+    Args:
+        text: The user query.
+        bot_id: Only documents belonging to this bot are returned.
+        searches: The collections to search, each with its own limit and threshold.
 
+    Returns:
+        Dict[str, List[DocumentSimilarityDTO]]: The matching documents keyed by collection name, a collection that
+        failed to respond maps to an empty list.
+    """
+    results: Dict[str, List[DocumentSimilarityDTO]] = {
+        search.collection_name: [] for search in searches
+    }
+
+    try:
+        embedding = get_embeddings()
+        query_vector = await embedding.aembed_query(text)
     except Exception as e:
         SilentException.capture_exception(e)
-        return []
+        return results
+
+    responses = await asyncio.gather(
+        *[search_collection(query_vector, bot_id, search) for search in searches],
+        return_exceptions=True,
+    )
+
+    for search, response in zip(searches, responses):
+        if isinstance(response, BaseException):
+            SilentException.capture_exception(response)
+            continue
+        results[search.collection_name] = response
+
+    return results
+
+
+async def get_relevant_documents(
+    text: str, bot_id: str, collection_name: str, limit=4
+) -> List[DocumentSimilarityDTO]:
+    results = await get_relevant_documents_from_collections(
+        text, bot_id, [CollectionSearch(collection_name, limit=limit)]
+    )
+    return results[collection_name]
+
+
+async def get_relevant_chat_documents(
+    text: str, bot_id: str
+) -> Dict[str, List[DocumentSimilarityDTO]]:
+    return await get_relevant_documents_from_collections(
+        text, bot_id, chat_collection_searches
+    )
 
 
 async def get_relevant_actions(text: str, bot_id: str) -> List[DocumentSimilarityDTO]:
@@ -1,30 +1,33 @@
 from typing import List
 
-from entities.action_entity import ActionDTO
 from entities.flow_entity import FlowDTO, Block
-from models.repository.action_repo import find_action_by_method_id_and_bot_id
+from entities.utils import generate_operation_id_from_name
+from routes.flow.utils.action_catalog import get_action_catalog
+
+DYNAMIC_FLOW_NAME = "Dynamic Flow"
+DYNAMIC_FLOW_OPERATION_ID = generate_operation_id_from_name(DYNAMIC_FLOW_NAME)
 
 
 def create_flow_from_operation_ids(
         operation_ids: List[str], bot_id: str
 ) -> FlowDTO:
-    flow = FlowDTO(blocks=[], bot_id=bot_id, description="", id="", name="", variables=[])
-    flow.name = "Dynamic Flow"
-    flow.description = "Dynamic Flow"
-    flow.bot_id = bot_id
-    flow.variables = []
-    flow.blocks = []
+    catalog = get_action_catalog(bot_id)
+    blocks = []
 
     for operation_id in operation_ids:
-        block = Block(actions=[], name="", next_on_fail=None, next_on_success=None, order=0)
-        operation = find_action_by_method_id_and_bot_id(operation_id=operation_id, bot_id=bot_id)
-        action = ActionDTO(bot_id=bot_id, name=operation.name, api_endpoint=operation.api_endpoint,
-                           description=operation.description, request_type=operation.request_type,
-                           operation_id=operation_id, payload=operation.payload)
-
-        block.name = "Dynamic Block"
-        block.actions.append(action)
+        action = catalog.actions.get(operation_id)
+        if action is None:
+            raise ValueError(f"No action found with operation id: {operation_id}")
 
-        flow.blocks.append(block)
+        # the catalog's actions are already validated, skip validating them again
+        blocks.append(Block.model_construct(actions=[action], name="Dynamic Block"))
 
-    return flow
+    return FlowDTO.model_construct(
+        blocks=blocks,
+        bot_id=bot_id,
+        id="",
+        name=DYNAMIC_FLOW_NAME,
+        description=DYNAMIC_FLOW_NAME,
+        variables=[],
+        operation_id=DYNAMIC_FLOW_OPERATION_ID,
+    )
@@ -1,6 +1,7 @@
 from routes.flow.utils.api_retrievers import get_relevant_actions
 from routes.flow.utils.document_similarity_dto import DocumentSimilarityDTO
 from utils.get_chat_model import get_chat_model
+from utils.prompt_budget import count_tokens, get_remaining_tokens, select_chunks
 from langchain.schema import BaseMessage, HumanMessage, SystemMessage
 from typing import List
 
@@ -21,21 +22,8 @@ def parse_json(content: str):
     return r
 
 
-async def build_dynamic_flow(text: str, bot_id: str):
-    docs = await get_relevant_actions(text=text, bot_id=bot_id)
-    chat = get_chat_model("build_dynamic_flow")
-
-    messages: List[BaseMessage] = []
-
-    messages.append(
-        SystemMessage(
-            content="You are a planning agent, that plans out the sequence of actions that have to be taken to fulfil a user request. An action could be anything from making calls to an api, connecting to an external data source... etc..."
-        )
-    )
-
-    messages.append(
-        HumanMessage(
-            content=f"""Given a list of actions in random order, and an input text that follows, find the correct sequence of action_ids needed to fulfill the upcoming requests. Return the response in json format without any commentary. You may only need a subset of actions provided to meet the user requirement.
+def render_instructions(actions: str, text: str) -> str:
+    return f"""Given a list of actions in random order, and an input text that follows, find the correct sequence of action_ids needed to fulfill the upcoming requests. Return the response in json format without any commentary. You may only need a subset of actions provided to meet the user requirement.
             
             Your response should be of the following format
             ---
@@ -47,7 +35,7 @@ async def build_dynamic_flow(text: str, bot_id: str):
             
             Here's the list of actions:
             ---
-            {docs}
+            {actions}
             ---
             
             
@@ -56,9 +44,29 @@ async def build_dynamic_flow(text: str, bot_id: str):
             {text}
             ---
             """
-        )
+
+
+async def build_dynamic_flow(text: str, bot_id: str):
+    docs = await get_relevant_actions(text=text, bot_id=bot_id)
+    chat = get_chat_model("build_dynamic_flow")
+
+    system_message = SystemMessage(
+        content="You are a planning agent, that plans out the sequence of actions that have to be taken to fulfil a user request. An action could be anything from making calls to an api, connecting to an external data source... etc..."
     )
 
+    # the best ranked actions that fit in what the instructions and the input leave of the budget
+    remaining = get_remaining_tokens(
+        [system_message, HumanMessage(content=render_instructions("", text))]
+    )
+    actions = select_chunks(
+        [(str(doc), count_tokens(str(doc)) + 1) for doc in docs], remaining
+    )
+
+    messages: List[BaseMessage] = [
+        system_message,
+        HumanMessage(content=render_instructions("\n".join(actions), text)),
+    ]
+
     result = await chat.ainvoke(messages)
     dynamic_builder_payload = parse_json(cast(str, result.content))
 
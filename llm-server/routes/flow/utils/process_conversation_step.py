@@ -1,5 +1,6 @@
 import json
-from typing import List, cast, Dict
+import logging
+from typing import List, cast, Dict, Optional
 
 from langchain.schema import HumanMessage, SystemMessage, BaseMessage
 
@@ -8,9 +9,105 @@ from custom_types.actionable_or_not_type import (
     ActionableOrNotType,
     parse_informative_or_actionable_response,
 )
+from routes.chat.intent_classifier import predict_intent
 from routes.flow.utils.document_similarity_dto import DocumentSimilarityDTO
 from utils.get_chat_model import get_chat_model
-from utils.llm_consts import VectorCollections
+from utils.llm_consts import (
+    CLASSIFIER_HISTORY_TOKENS,
+    VectorCollections,
+    RouterPath,
+    router_thresholds,
+)
+from utils.prompt_budget import build_prompt
+
+
+def route_by_retrieval_scores(
+    available_documents: Dict[str, List[DocumentSimilarityDTO]],
+) -> Optional[ActionableOrNotType]:
+    """
+    Decides between informative and actionable from the retrieval scores alone, when they are decisive enough.
+
+    Args:
+        available_documents: The retrieved documents, categorized by collection.
+
+    Returns:
+        The verdict, or None when the scores fall in the ambiguous band and the LLM classifier has to decide.
+    """
+    actionable_documents = sorted(
+        (available_documents.get(VectorCollections.actions) or [])
+        + (available_documents.get(VectorCollections.flows) or []),
+        key=lambda dto: dto.score,
+        reverse=True,
+    )
+
+    if not actionable_documents:
+        return parse_actionable_or_not_response(
+            {"actionable": False, "route": RouterPath.no_candidates}
+        )
+
+    top_document = actionable_documents[0]
+    if top_document.score < router_thresholds["informative_max_score"]:
+        return parse_actionable_or_not_response(
+            {"actionable": False, "route": RouterPath.low_score}
+        )
+
+    runner_up_score = max(
+        [dto.score for dto in actionable_documents[1:]]
+        + [
+            dto.score
+            for dto in available_documents.get(VectorCollections.knowledgebase) or []
+        ],
+        default=0.0,
+    )
+    if (
+        top_document.type == VectorCollections.actions
+        and top_document.score >= router_thresholds["actionable_min_score"]
+        and top_document.score - runner_up_score
+        >= router_thresholds["actionable_min_margin"]
+    ):
+        return parse_actionable_or_not_response(
+            {
+                "actionable": True,
+                "api": top_document.document.metadata.get("operation_id"),
+                "route": RouterPath.score_margin,
+            }
+        )
+
+    return None
+
+
+def route_by_intent_classifier(
+    bot_id: Optional[str],
+    current_message: str,
+    available_documents: Dict[str, List[DocumentSimilarityDTO]],
+) -> Optional[ActionableOrNotType]:
+    """
+    Asks the bot's locally trained intent classifier, an actionable prediction is only trusted when the predicted
+    operation was also retrieved for this message.
+    """
+    prediction = predict_intent(bot_id, current_message)
+    if prediction is None:
+        return None
+
+    if not prediction.actionable:
+        return parse_actionable_or_not_response(
+            {"actionable": False, "route": RouterPath.intent_classifier}
+        )
+
+    retrieved_operation_ids = {
+        dto.document.metadata.get("operation_id")
+        for dto in available_documents.get(VectorCollections.actions) or []
+    }
+    if prediction.label not in retrieved_operation_ids:
+        return None
+
+    return parse_actionable_or_not_response(
+        {
+            "actionable": True,
+            "api": prediction.label,
+            "route": RouterPath.intent_classifier,
+        }
+    )
 
 
 def is_it_informative_or_actionable(
@@ -101,15 +198,17 @@ The available tools:
     """
     )
 
-    messages: List[BaseMessage] = [
-        SystemMessage(content=prompt),
-    ]
-    messages.extend(chat_history[-6:])
-    messages.append(HumanMessage(content=current_message))
-    messages.append(
-        HumanMessage(
-            content="Return the corresponding json for the last user input, without any commentary."
-        )
+    # only the last exchanges matter to the verdict
+    messages: List[BaseMessage] = build_prompt(
+        system=[SystemMessage(content=prompt)],
+        history=chat_history,
+        tail=[
+            HumanMessage(content=current_message),
+            HumanMessage(
+                content="Return the corresponding json for the last user input, without any commentary."
+            ),
+        ],
+        max_history_tokens=CLASSIFIER_HISTORY_TOKENS,
     )
 
     content = cast(str, chat(messages=messages).content)
@@ -127,12 +226,14 @@ def get_next_response_type(
     user_message: str,
     chat_history: List[BaseMessage],
     top_documents: Dict[str, List[DocumentSimilarityDTO]],
+    bot_id: Optional[str] = None,
 ) -> ActionableOrNotType:
     """
     Processes a conversation step by generating a response based on the provided inputs.
 
     Args:
         top_documents:
+        bot_id: The bot's id, used to consult its intent classifier.
         session_id (str): The ID of the session for the chat conversation.
         user_message (str): The message from the user.
         chat_history (List[BaseMessage]): A list of previous conversation messages.
@@ -144,8 +245,20 @@ def get_next_response_type(
     if not session_id:
         raise ValueError("Session id must be defined for chat conversations")
 
-    return is_it_informative_or_actionable(
-        chat_history=chat_history,
-        current_message=user_message,
-        available_documents=top_documents,
+    response = route_by_retrieval_scores(top_documents)
+    if response is None:
+        response = route_by_intent_classifier(bot_id, user_message, top_documents)
+    if response is None:
+        response = is_it_informative_or_actionable(
+            chat_history=chat_history,
+            current_message=user_message,
+            available_documents=top_documents,
+        )
+
+    logging.info(
+        "Routed session %s as actionable=%s via %s",
+        session_id,
+        response.actionable,
+        response.route,
     )
+    return response
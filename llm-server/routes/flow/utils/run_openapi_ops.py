@@ -1,20 +1,108 @@
+import asyncio
 import json
-from typing import Optional, Tuple
-from flask_socketio import emit
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional, Tuple
+from utils.socket_emit import emit
 
 from werkzeug.datastructures import Headers
+from entities.action_entity import ActionDTO, ResponsePruning
 from entities.flow_entity import FlowDTO
 from extractors.convert_json_to_text import (
     convert_json_error_to_text,
     convert_json_to_text,
 )
-from integrations.load_json_config import load_json_config
-from integrations.transformers.transformer import transform_response
+from integrations.transformer_registry import get_transformer
 from routes.flow.api_info import ApiInfo
 from routes.flow.generate_openapi_payload import generate_api_payload
+from routes.flow.utils.action_catalog import get_action_catalog
+from utils.flow_graph import (
+    FlowStep,
+    build_flow_graph,
+    get_ready_steps,
+    should_run,
+)
 from utils.get_logger import SilentException
+from utils.llm_consts import FLOW_MAX_CONCURRENCY
 from utils.make_api_call import make_api_request
 from utils.process_app_state import process_state
+from utils.prune_json import prune_response
+
+
+@dataclass
+class StepResult:
+    # the transformed api responses of the step's actions, by operation id
+    responses: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[Exception] = None
+
+
+async def run_action(
+    action: ActionDTO,
+    text: str,
+    prev_api_response: str,
+    headers: Headers,
+    app: Optional[str],
+    current_state: Optional[str],
+    bot_id: str,
+) -> Tuple[ApiInfo, Any, Dict[str, Any]]:
+    """
+    Generates the action's payload and calls it.
+
+    Returns:
+        The payload, the response and the debug data: the timings in ms and what the pruning elided.
+    """
+    started_at = time.monotonic()
+    api_payload = await generate_api_payload(
+        text=text,
+        action=action,
+        prev_api_response=prev_api_response,
+        app=app,
+        current_state=current_state,
+        bot_id=bot_id,
+    )
+    generated_at = time.monotonic()
+
+    operation_id = str(action.operation_id)
+    # the catalog has the action's current policies, the flow may have been saved before they were set
+    current_action = get_action_catalog(bot_id).actions.get(operation_id) or action
+    api_response = await make_api_request(
+        headers=headers,
+        extra_params={},
+        bot_id=bot_id,
+        operation_id=operation_id,
+        cache_policy=current_action.cache_policy,
+        **api_payload.__dict__,
+    )
+    debug: Dict[str, Any] = {
+        "timing": {
+            "payload_ms": round((generated_at - started_at) * 1000, 1),
+            "request_ms": round((time.monotonic() - generated_at) * 1000, 1),
+        }
+    }
+
+    """ 
+    if a custom transformer function is defined for this operationId use that, otherwise forward it to the llm,
+    so we don't necessarily have to defined mappers for all api endpoints
+    """
+
+    transformer = get_transformer(app, operation_id)
+    if transformer is None:
+        response, report = prune_response(
+            api_response["response"],
+            ResponsePruning(**current_action.payload["response_pruning"])
+            if current_action.payload.get("response_pruning")
+            else None,
+        )
+        if report is not None:
+            debug["pruning"] = asdict(report)
+        return api_payload, response, debug
+
+    api_json = api_response["response"]
+    # make_api_request decodes json responses, only a raw body needs decoding
+    if isinstance(api_json, (str, bytes)):
+        api_json = json.loads(api_json)
+    return api_payload, transformer.projection(api_json), debug
 
 
 async def run_actions(
@@ -26,60 +114,130 @@ async def run_actions(
     session_id: str,
     is_streaming: bool,
 ) -> Tuple[str, dict]:
+    """
+    Runs the flow's blocks as a dependency graph (see build_flow_graph), independent blocks run concurrently, up to
+    FLOW_MAX_CONCURRENCY at a time. The actions of a block run one after another, the payload of each action is
+    generated from the responses of the actions that ran before it: its block's and the block's ancestors'.
+    """
     api_request_data = {}
-    prev_api_response = ""
-    apis_calls_history = {}
     current_state = process_state(app, headers)
-    api_payload: Optional[ApiInfo] = None
-    blocks = flow.blocks
+    endpoint: Optional[str] = None
+    flow_started_at = time.monotonic()
+    semaphore = asyncio.Semaphore(FLOW_MAX_CONCURRENCY)
 
-    for block in blocks:
-        for action in block.actions:
-            try:
-                operation_id = action.operation_id
+    async def run_step(step: FlowStep) -> StepResult:
+        nonlocal endpoint
+        result = StepResult()
+        previous_responses: Dict[str, Any] = {}
+        for ancestor in sorted(step.ancestors):
+            # skipped ancestors have no result
+            if ancestor in results:
+                previous_responses.update(results[ancestor].responses)
 
+        async with semaphore:
+            for action in step.block.actions:
+                operation_id = action.operation_id
                 if not operation_id:
                     continue
 
-                api_payload = await generate_api_payload(
-                    text=text,
-                    action=action,
-                    prev_api_response=prev_api_response,
-                    app=app,
-                    current_state=current_state,
-                )
-                api_request_data[operation_id] = api_payload.__dict__
-
-                api_response = await make_api_request(
-                    headers=headers, extra_params={}, **api_payload.__dict__
-                )
-
-                """ 
-                if a custom transformer function is defined for this operationId use that, otherwise forward it to the llm,
-                so we don't necessarily have to defined mappers for all api endpoints
-                """
-
-                partial_json = load_json_config(app, operation_id)
-                if not partial_json:
-                    apis_calls_history[operation_id] = api_response["response"]
-                else:
-                    api_json = json.loads(api_response["response"])
-                    apis_calls_history[operation_id] = json.dumps(
-                        transform_response(
-                            full_json=api_json, partial_json=partial_json
-                        )
+                started_ms = round((time.monotonic() - flow_started_at) * 1000, 1)
+                try:
+                    api_payload, response, debug = await run_action(
+                        action,
+                        text,
+                        json.dumps(previous_responses, default=str)
+                        if previous_responses
+                        else "",
+                        headers,
+                        app,
+                        current_state,
+                        bot_id,
                     )
+                except Exception as e:
+                    SilentException.capture_exception(e)
+                    result.error = e
+                    return result
 
-            except Exception as e:
-                SilentException.capture_exception(e)
+                endpoint = api_payload.endpoint
+                debug["timing"] = {
+                    "block": step.block.name,
+                    "started_ms": started_ms,
+                    **debug["timing"],
+                }
+                api_request_data[operation_id] = {**api_payload.__dict__, **debug}
+                result.responses[operation_id] = response
+                previous_responses[operation_id] = response
 
-                formatted_error = convert_json_error_to_text(
-                    str(e), is_streaming, session_id
-                )
-                return str(formatted_error), api_request_data
+        return result
 
     try:
-        readable_response = convert_json_to_text(
+        steps = build_flow_graph(flow.blocks)
+    except ValueError as e:
+        SilentException.capture_exception(e)
+        formatted_error = await convert_json_error_to_text(
+            str(e), is_streaming, session_id
+        )
+        return str(formatted_error), api_request_data
+
+    results: Dict[int, StepResult] = {}
+    # True for the steps that succeeded, False for the ones that failed and None for the skipped ones
+    outcomes: Dict[int, Optional[bool]] = {}
+    pending = {step.index: step for step in steps}
+    running: Dict[asyncio.Task, int] = {}
+    error: Optional[Exception] = None
+
+    while error is None and (pending or running):
+        # skipping a step can settle the predecessors of another, repeat until no step is ready
+        ready = get_ready_steps(pending.values(), outcomes)
+        while ready:
+            for step in ready:
+                del pending[step.index]
+                if should_run(step, outcomes):
+                    running[asyncio.create_task(run_step(step))] = step.index
+                else:
+                    outcomes[step.index] = None
+            ready = get_ready_steps(pending.values(), outcomes)
+
+        if not running:
+            break
+
+        done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            index = running.pop(task)
+            results[index] = task.result()
+            outcomes[index] = results[index].error is None
+            # a failure is handled by the block's next_on_fail, otherwise it fails the flow
+            if results[index].error is not None and not steps[index].block.next_on_fail:
+                error = results[index].error
+
+    for task in running:
+        task.cancel()
+    await asyncio.gather(*running, return_exceptions=True)
+
+    logging.info(
+        "Flow %s steps %s",
+        flow.name,
+        json.dumps(
+            {
+                operation_id: request["timing"]
+                for operation_id, request in api_request_data.items()
+            },
+            separators=(",", ":"),
+        ),
+    )
+
+    if error is not None:
+        formatted_error = await convert_json_error_to_text(
+            str(error), is_streaming, session_id
+        )
+        return str(formatted_error), api_request_data
+
+    apis_calls_history = {}
+    for index in sorted(results):
+        apis_calls_history.update(results[index].responses)
+
+    try:
+        readable_response = await convert_json_to_text(
             text,
             apis_calls_history,
             api_request_data,
@@ -90,9 +248,7 @@ async def run_actions(
 
         return readable_response, api_request_data
     except Exception as e:
-        error_message = (
-            f"{str(e)}: {api_payload.endpoint}" if api_payload is not None else ""
-        )
+        error_message = f"{str(e)}: {endpoint}" if endpoint is not None else ""
         SilentException.capture_exception(e)
         emit(session_id, error_message) if is_streaming else None
         return error_message, api_request_data
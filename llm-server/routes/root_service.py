@@ -6,17 +6,28 @@ from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
 
 from custom_types.response_dict import LLMResponse, ApiRequestResult
 from custom_types.run_workflow_input import ChatContext
-from entities.flow_entity import FlowDTO
-from models.repository.action_call_repo import add_action_call
-from models.repository.flow_repo import get_flow_by_id
+from routes.chat.answer_cache import (
+    cache_answer,
+    get_cached_answer,
+    is_answer_cache_enabled,
+)
 from routes.flow.utils import create_flow_from_operation_ids, run_flow
+from routes.flow.utils.action_catalog import get_action_catalog
 
 from routes.flow.utils.document_similarity_dto import (
     DocumentSimilarityDTO,
 )
+from utils.emit_stream import emit_stream, replay_stream, StreamProgress
 from utils.get_chat_model import get_chat_model
 from utils.llm_consts import VectorCollections
-from flask_socketio import emit
+from utils.prompt_budget import (
+    ContextChunk,
+    build_prompt,
+    count_document_tokens,
+    count_tokens,
+)
+from utils.write_behind import record_action_call
+from utils.socket_emit import emit
 
 
 # Define constants for error messages
@@ -90,18 +101,7 @@ async def run_actionable_item(
             flow_with_relevance_score.document
         )  # this variable now holds Qdrant vector document, which is the flow metadata
         flow_id = cast(str, flow.metadata.get("flow_id"))
-        flow_model = get_flow_by_id(flow_id)
-
-        if flow_model:
-            _flow = FlowDTO(
-                id=flow_model.id,
-                bot_id=bot_id,
-                flow_id=flow_model.id,
-                name=flow_model.name,
-                description=flow_model.description,
-                blocks=flow_model.payload,
-                variables=[],
-            )
+        _flow = get_action_catalog(bot_id).flows.get(str(flow_id))
 
     if _flow is not None:
         output = await run_flow(
@@ -113,9 +113,8 @@ async def run_actionable_item(
             is_streaming=is_streaming,
         )
 
-        # @Todo convert to bulk
         for operation_id in output.operation_ids:
-            add_action_call(
+            record_action_call(
                 bot_id=bot_id,
                 session_id=session_id,
                 operation_id=operation_id,
@@ -131,56 +130,81 @@ async def run_informative_item(
     conversations_history: List[BaseMessage],
     is_streaming: bool,
     session_id: str,
+    bot_id: Optional[str] = None,
+    release: Optional[asyncio.Event] = None,
+    progress: Optional[StreamProgress] = None,
 ) -> LLMResponse:
+    """
+    Answers the user from the retrieved context and the conversation history.
+
+    Args:
+        release: Set when generating speculatively, nothing is emitted to the session until the event is set.
+        progress: Tracks the number of generated chunks.
+    """
+    # answers only depend on the question when there is no prior conversation, so only those turns are cached,
+    # follow-up questions always go to the LLM
+    use_answer_cache = is_answer_cache_enabled(bot_id) and not conversations_history
+    if use_answer_cache:
+        cached_answer = await get_cached_answer(str(bot_id), text, base_prompt)
+        if cached_answer is not None:
+            await emit_stream(
+                replay_stream(cached_answer),
+                session_id,
+                is_streaming,
+                release,
+                progress,
+            )
+            return LLMResponse(
+                message=cached_answer,
+                error=None,
+                api_request_response=ApiRequestResult(),
+                knowledgebase_called=True,
+            )
+
     # so we got all context, let's ask:
     chat = get_chat_model("run_informative_item")
-    context = []
-    for vector_result in informative_item.get(VectorCollections.knowledgebase) or []:
-        context.append(
-            vector_result.document.page_content
-            + f" metadata: {vector_result.document.metadata}"
-        )
-
-    for vector_result in (informative_item.get(VectorCollections.actions) or [])[:2]:
+    knowledgebase = informative_item.get(VectorCollections.knowledgebase) or []
+    actions = (informative_item.get(VectorCollections.actions) or [])[:2]
+    context: List[ContextChunk] = []
+    for vector_result in knowledgebase + actions:
+        metadata = f" metadata: {vector_result.document.metadata}"
         context.append(
-            vector_result.document.page_content
-            + f" metadata: {vector_result.document.metadata}"
-        )
-
-    messages: List[BaseMessage] = [SystemMessage(content=base_prompt)]
-
-    if len(conversations_history) > 0:
-        messages.extend(conversations_history)
-
-    if len(context):
-        messages.append(
-            HumanMessage(
-                content=f"I found some relevant context that might be helpful. Here is the context: ```{','.join(context)}```. "
+            (
+                vector_result.document.page_content + metadata,
+                count_document_tokens(vector_result.document) + count_tokens(metadata),
             )
         )
 
-    messages.append(
-        HumanMessage(
-            content="""Based on the information provided to you and the conversation history of this conversation, I want you to answer the questions that follow, make sure your answer is helpful
+    # the history and the retrieved context share what the instructions and the question leave of the budget
+    messages: List[BaseMessage] = build_prompt(
+        system=[SystemMessage(content=base_prompt)],
+        history=conversations_history,
+        context=context,
+        render_context=lambda chunks: HumanMessage(
+            content=f"I found some relevant context that might be helpful. Here is the context: ```{','.join(chunks)}```. "
+        ),
+        tail=[
+            HumanMessage(
+                content="""Based on the information provided to you and the conversation history of this conversation, I want you to answer the questions that follow, make sure your answer is helpful
             and clear and use advisable tune (at the end you advise based on the given context)"""
-        )
-    )
-    messages.append(
-        HumanMessage(
-            content="If you are unsure, or you think you can do a better job by asking clarification questions, then ask."
-        )
+            ),
+            HumanMessage(
+                content="If you are unsure, or you think you can do a better job by asking clarification questions, then ask."
+            ),
+            HumanMessage(content=text),
+        ],
     )
 
     emit(
         f"{session_id}_info", "Distilling the information received...\n"
-    ) if is_streaming else None
-    messages.append(HumanMessage(content=text))
-
-    # convert to astream
-    content = ""
-    for chunk in chat.stream(messages):
-        emit(session_id, chunk.content) if is_streaming else None
-        content += str(chunk.content)
+    ) if is_streaming and release is None else None
+
+    content = await emit_stream(
+        chat.astream(messages), session_id, is_streaming, release, progress
+    )
+
+    if use_answer_cache:
+        await cache_answer(str(bot_id), text, base_prompt, content)
 
     # return {"response": content, "error": None}
     return LLMResponse(
@@ -0,0 +1,233 @@
+"""
+Compares the requests/sec and latencies of the serving modes.
+
+Every mode is started in turn on the same port, warmed up, then loaded with a fixed number of concurrent clients:
+
+    python scripts/benchmark_server.py --bot-token <token> --concurrency 32 --requests 500
+
+By default it sends chats to /backend/chat/send, use --method GET --path ... for a route that doesn't call the LLM.
+The servers are started from llm-server with this environment, mysql, redis and qdrant must be reachable.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES: Dict[str, List[str]] = {
+    # the production mode this replaces
+    "flask": [
+        sys.executable,
+        "-m",
+        "flask",
+        "run",
+        "--host=127.0.0.1",
+        "--port={port}",
+        "--reload",
+    ],
+    "hypercorn": [
+        sys.executable,
+        "-m",
+        "hypercorn",
+        "--config",
+        "python:hypercorn_conf",
+        "--bind",
+        "127.0.0.1:{port}",
+        "--workers",
+        "{workers}",
+        "asgi:application",
+    ],
+    "uvicorn": [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "asgi:application",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        "{port}",
+        "--workers",
+        "{workers}",
+        "--loop",
+        "uvloop",
+    ],
+}
+
+
+@dataclass
+class Result:
+    mode: str
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0
+
+    @property
+    def requests_per_second(self) -> float:
+        return len(self.latencies) / self.elapsed if self.elapsed else 0
+
+    def percentile(self, percent: int) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0
+        return statistics.quantiles(self.latencies, n=100)[percent - 1]
+
+
+def build_request(args: argparse.Namespace) -> dict:
+    headers = {"X-Bot-Token": args.bot_token} if args.bot_token else {}
+    if args.method == "GET":
+        return {"method": "GET", "url": args.path, "headers": headers}
+
+    payload = (
+        json.loads(args.payload)
+        if args.payload
+        else {"content": args.message, "bot_token": args.bot_token}
+    )
+    return {"method": args.method, "url": args.path, "headers": headers, "json": payload}
+
+
+async def wait_until_up(base_url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get("/backend/chat/init")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.5)
+    raise TimeoutError(f"The server at {base_url} did not start in {timeout}s")
+
+
+async def run_load(base_url: str, mode: str, args: argparse.Namespace) -> Result:
+    result = Result(mode=mode)
+    request = build_request(args)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    queue: "asyncio.Queue[int]" = asyncio.Queue()
+
+    async def client_loop(client: httpx.AsyncClient):
+        while not queue.empty():
+            queue.get_nowait()
+            kwargs = dict(request)
+            if "json" in kwargs:
+                # a new session per request, the sessions' history would otherwise grow with the run
+                kwargs["json"] = {**kwargs["json"], "session_id": str(uuid.uuid4())}
+
+            started = time.perf_counter()
+            try:
+                response = await client.request(**kwargs)
+                if response.status_code >= 500:
+                    result.errors += 1
+                    continue
+            except httpx.HTTPError:
+                result.errors += 1
+                continue
+            result.latencies.append(time.perf_counter() - started)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        for _ in range(args.warmup):
+            queue.put_nowait(0)
+        await asyncio.gather(*(client_loop(client) for _ in range(args.concurrency)))
+        result.latencies.clear()
+        result.errors = 0
+
+        for _ in range(args.requests):
+            queue.put_nowait(0)
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(args.concurrency)))
+        result.elapsed = time.perf_counter() - started
+
+    return result
+
+
+def start_server(mode: str, args: argparse.Namespace) -> subprocess.Popen:
+    command = [
+        part.format(port=args.port, workers=args.workers) for part in MODES[mode]
+    ]
+    return subprocess.Popen(
+        command,
+        cwd=SERVER_DIR,
+        env={**os.environ, "FLASK_APP": "app"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    # the reloader and the asgi servers run the app in child processes
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+async def benchmark(mode: str, args: argparse.Namespace) -> Result:
+    base_url = f"http://127.0.0.1:{args.port}"
+    process: Optional[subprocess.Popen] = None
+    if not args.no_start:
+        process = start_server(mode, args)
+    try:
+        await wait_until_up(base_url, args.startup_timeout)
+        return await run_load(base_url, mode, args)
+    finally:
+        if process is not None:
+            stop_server(process)
+
+
+def print_results(results: List[Result]) -> None:
+    print(f"{'mode':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for result in results:
+        print(
+            f"{result.mode:<12}{result.requests_per_second:>10.1f}"
+            f"{result.percentile(50) * 1000:>10.1f}{result.percentile(99) * 1000:>10.1f}"
+            f"{result.errors:>8}"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--modes", nargs="+", choices=MODES.keys(), default=["flask", "hypercorn"]
+    )
+    parser.add_argument("--port", type=int, default=8102)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    parser.add_argument("--method", default="POST")
+    parser.add_argument("--path", default="/backend/chat/send")
+    parser.add_argument("--bot-token", default=os.getenv("BENCHMARK_BOT_TOKEN"))
+    parser.add_argument("--message", default="What can you do?")
+    parser.add_argument("--payload", help="The request's json body")
+    parser.add_argument(
+        "--no-start",
+        action="store_true",
+        help="Load a server that is already running on --port instead of starting the modes",
+    )
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    modes = ["running"] if args.no_start else args.modes
+    results = [await benchmark(mode, args) for mode in modes]
+    print_results(results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -27,6 +27,7 @@ class Action(Base):
     request_type = Column(String(255), nullable=True, default="")  # GET, POST, etc...
     operation_id = Column(String(255), nullable=True, default="")  # auto generated
     payload = Column(JSON, nullable=False, default={})  # The request stuff
+    cache_policy = Column(JSON, nullable=True)  # see ActionCachePolicy
     status = Column(String(255), default="live")  # live, draft
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
 from .get_declarative_base import Base
 from .database_setup import engine
 from .chatbot import Chatbot
@@ -15,5 +15,27 @@ class Analytics(Base):
         self.successful_operations = successful_operations
         self.total_operations = total_operations
         self.logs = logs
-        
+
+
+class AnalyticsBucket(Base):
+    """Hourly operation counts of a bot, rolled up from the redis counters"""
+
+    __tablename__ = 'analytics_buckets'
+
+    chatbot_id = Column(String(36), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    successful_operations = Column(Integer, default=0)
+    total_operations = Column(Integer, default=0)
+
+
+class AnalyticsRollup(Base):
+    """The rollups applied to the counters, recorded with their counts so a rollup is never applied twice"""
+
+    __tablename__ = 'analytics_rollups'
+
+    rollup_id = Column(String(32), primary_key=True)
+    chatbot_id = Column(String(36), nullable=False)
+    applied_at = Column(DateTime, nullable=False, index=True)
+
+
 Base.metadata.create_all(engine)
\ No newline at end of file
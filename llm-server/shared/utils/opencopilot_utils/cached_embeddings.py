@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import json
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from cachetools import TTLCache
+from langchain.embeddings.base import Embeddings
+
+from utils.get_logger import SilentException
+from utils.llm_consts import redis_client
+
+EMBEDDING_CACHE_KEY_FORMAT = "embedding_cache:{}"
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings object and caches query embeddings in two tiers, an in-process TTL bounded LRU and a shared
+    redis tier, so repeated questions never reach the embedding provider. Document embeddings are not cached.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        provider: str,
+        model: str,
+        ttl: int,
+        max_size: int,
+    ):
+        self.embeddings = embeddings
+        self.provider = provider
+        self.model = model
+        self.ttl = ttl
+        self.local_cache: TTLCache = TTLCache(maxsize=max_size, ttl=ttl)
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def get_cache_key(self, text: str) -> str:
+        digest = hashlib.sha256(
+            f"{self.provider}:{self.model}:{normalize_query(text)}".encode()
+        ).hexdigest()
+        return EMBEDDING_CACHE_KEY_FORMAT.format(digest)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "local_hits": self.stats["local_hits"],
+                "redis_hits": self.stats["redis_hits"],
+                "misses": self.stats["misses"],
+                "local_size": len(self.local_cache),
+            }
+
+    def _record(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _get_local(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            return self.local_cache.get(key)
+
+    def _set_local(self, key: str, vector: List[float]):
+        with self._lock:
+            self.local_cache[key] = vector
+
+    def _get_shared(self, key: str) -> Optional[List[float]]:
+        try:
+            cached = redis_client.get(key)
+        except Exception as e:
+            SilentException.capture_exception(e)
+            return None
+
+        return json.loads(cached) if cached else None
+
+    def _set_shared(self, key: str, vector: List[float]):
+        try:
+            redis_client.setex(key, self.ttl, json.dumps(vector))
+        except Exception as e:
+            SilentException.capture_exception(e)
+
+    def _get_cached(self, key: str) -> Optional[List[float]]:
+        vector = self._get_local(key)
+        if vector is not None:
+            self._record("local_hits")
+            return vector
+
+        vector = self._get_shared(key)
+        if vector is not None:
+            self._record("redis_hits")
+            self._set_local(key, vector)
+            return vector
+
+        return None
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.get_cache_key(text)
+        vector = self._get_cached(key)
+        if vector is not None:
+            return vector
+
+        self._record("misses")
+        vector = self.embeddings.embed_query(text)
+        self._set_local(key, vector)
+        self._set_shared(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self.get_cache_key(text)
+        vector = self._get_local(key)
+        if vector is not None:
+            self._record("local_hits")
+            return vector
+
+        # redis is sync, keep its round trips off the event loop
+        vector = await asyncio.to_thread(self._get_shared, key)
+        if vector is not None:
+            self._record("redis_hits")
+            self._set_local(key, vector)
+            return vector
+
+        self._record("misses")
+        vector = await self.embeddings.aembed_query(text)
+        self._set_local(key, vector)
+        await asyncio.to_thread(self._set_shared, key, vector)
+        return vector
@@ -3,18 +3,42 @@ import warnings
 from functools import lru_cache
 from langchain.embeddings.openai import OpenAIEmbeddings
 from langchain.embeddings.ollama import OllamaEmbeddings
+from langchain.embeddings.base import Embeddings
+from .cached_embeddings import CachedEmbeddings
 from .embedding_type import EmbeddingProvider
 from utils.get_logger import SilentException
+from utils.llm_consts import (
+    ENABLE_EMBEDDING_CACHE,
+    EMBEDDING_CACHE_TTL,
+    EMBEDDING_CACHE_MAX_SIZE,
+)
 
 LOCAL_IP = os.getenv("LOCAL_IP", "host.docker.internal")
 
 
 @lru_cache(maxsize=1)
-def get_embeddings():
+def get_embeddings() -> Embeddings:
     embedding_provider = os.environ.get(
         "EMBEDDING_PROVIDER", EmbeddingProvider.OPENAI.value
     )
+    embeddings = get_provider_embeddings(embedding_provider)
 
+    if not ENABLE_EMBEDDING_CACHE:
+        return embeddings
+
+    model = getattr(embeddings, "deployment", None) or getattr(
+        embeddings, "model", ""
+    )
+    return CachedEmbeddings(
+        embeddings,
+        provider=str(embedding_provider),
+        model=str(model),
+        ttl=EMBEDDING_CACHE_TTL,
+        max_size=EMBEDDING_CACHE_MAX_SIZE,
+    )
+
+
+def get_provider_embeddings(embedding_provider: str) -> Embeddings:
     if embedding_provider == EmbeddingProvider.azure.value:
         deployment = os.environ.get("AZURE_OPENAI_EMBEDDING_MODEL_NAME")
         client = os.environ.get("AZURE_OPENAI_API_TYPE")
@@ -7,16 +7,23 @@ from langchain.vectorstores.qdrant import Qdrant
 from .interfaces import StoreOptions
 from .store_type import StoreType
 from shared.utils.opencopilot_utils.get_vector_store import get_vector_store
+from utils.knowledgebase_version import bump_knowledgebase_version
+from utils.prompt_budget import with_token_count
 
 def init_vector_store(docs: list[Document], options: StoreOptions) -> None:
     store_type = StoreType[os.getenv('STORE', StoreType.QDRANT.value)]
 
     for doc in docs:
         doc.metadata.update(options.metadata)
+        with_token_count(doc)
 
     if store_type == StoreType.QDRANT:
         kb_vector_store = get_vector_store(StoreOptions("knowledgebase"))
         kb_vector_store.add_documents(docs)
+
+        for bot_id in {doc.metadata.get("bot_id") for doc in docs}:
+            if bot_id:
+                bump_knowledgebase_version(bot_id)
     else:
         valid_stores = ", ".join(StoreType._member_names())
         raise ValueError(
@@ -0,0 +1,30 @@
+from typing import List
+
+import fakeredis
+import pytest
+
+from utils import prompt_budget
+
+
+class WordEncoding:
+    """One token per whitespace-separated word, so the tests' budgets are easy to count and nothing is downloaded"""
+
+    def encode(self, text: str, disallowed_special=()) -> List[str]:
+        return text.split()
+
+    def decode(self, tokens: List[str]) -> str:
+        return " ".join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def word_encoding(monkeypatch):
+    monkeypatch.setattr(prompt_budget, "get_encoding", WordEncoding)
+    prompt_budget.count_tokens.cache_clear()
+    yield
+    prompt_budget.count_tokens.cache_clear()
+
+
+@pytest.fixture
+def fake_redis() -> fakeredis.FakeRedis:
+    # configured like utils.llm_consts.redis_client
+    return fakeredis.FakeRedis(decode_responses=True)
@@ -0,0 +1,163 @@
+import time
+
+import pytest
+
+from entities.action_entity import ActionCachePolicy
+from utils import action_response_cache
+from utils.action_response_cache import (
+    CachedResponse,
+    get_action_cache_stats,
+    get_freshness,
+    get_response_cache_key,
+    is_cacheable,
+    parse_cache_control,
+    read_cached_response,
+    record_cache_event,
+    revalidate_cached_response,
+    store_cached_response,
+)
+
+POLICY = ActionCachePolicy(enabled=True, ttl=300)
+
+
+@pytest.fixture(autouse=True)
+def redis_client(monkeypatch, fake_redis):
+    monkeypatch.setattr(action_response_cache, "redis_client", fake_redis)
+    return fake_redis
+
+
+def test_only_get_requests_of_enabled_policies_are_cacheable():
+    assert is_cacheable("GET", POLICY)
+    assert not is_cacheable("POST", POLICY)
+    assert not is_cacheable("GET", None)
+    assert not is_cacheable("GET", ActionCachePolicy(enabled=False))
+    assert not is_cacheable("GET", ActionCachePolicy(enabled=True, ttl=0))
+
+
+def test_parses_cache_control_directives():
+    assert parse_cache_control('public, Max-Age=60, no-cache="Set-Cookie"') == {
+        "public": None,
+        "max-age": "60",
+        "no-cache": "Set-Cookie",
+    }
+    assert parse_cache_control("") == {}
+
+
+@pytest.mark.parametrize(
+    "cache_control, freshness",
+    [
+        ("", 300),
+        ("max-age=60", 60),
+        ("max-age=600", 300),
+        ("s-maxage=30, max-age=60", 30),
+        ("max-age=soon", 300),
+        ("no-cache", 0),
+        ("no-store", None),
+        ("private, max-age=60", None),
+    ],
+)
+def test_freshness_is_capped_by_the_response_cache_control(cache_control, freshness):
+    assert get_freshness(POLICY, {"Cache-Control": cache_control}) == freshness
+
+
+def test_cache_key_only_depends_on_the_key_params_and_headers():
+    policy = ActionCachePolicy(
+        enabled=True, key_params=["page"], key_headers=["Authorization"]
+    )
+
+    def key(query_params, headers):
+        return get_response_cache_key(
+            "bot", "listOrders", "https://api/orders", query_params, headers, policy
+        )
+
+    same = key({"page": 1, "ts": 1}, {"authorization": "a", "X-Request-Id": "1"})
+    assert same.startswith("action_response:bot:listOrders:")
+    assert (
+        key({"page": 1, "ts": 2}, {"Authorization": "a", "X-Request-Id": "2"}) == same
+    )
+    assert key({"page": 2}, {"Authorization": "a"}) != same
+    assert key({"page": 1}, {"Authorization": "b"}) != same
+
+
+def test_user_credentials_are_part_of_the_key_by_default():
+    def key(headers):
+        return get_response_cache_key("bot", "op", "https://api", {}, headers, POLICY)
+
+    assert key({"Authorization": "a"}) != key({"Authorization": "b"})
+    assert key({"Cookie": "session=a"}) != key({"Cookie": "session=b"})
+    assert key({"X-Request-Id": "1"}) == key({"X-Request-Id": "2"})
+
+
+def test_every_query_param_is_part_of_the_key_by_default():
+    def key(query_params):
+        return get_response_cache_key(
+            "bot", "op", "https://api", query_params, {}, POLICY
+        )
+
+    assert key({"page": 1, "ts": 1}) != key({"page": 1, "ts": 2})
+
+
+def test_stores_and_reads_fresh_responses(redis_client):
+    assert store_cached_response(
+        "key", {"id": 1}, POLICY, {"Cache-Control": "max-age=60"}
+    )
+
+    cached = read_cached_response("key")
+    assert cached.response == {"id": 1}
+    assert cached.etag is None
+    assert cached.is_fresh()
+    assert 0 < redis_client.ttl("key") <= 60
+
+
+def test_keeps_responses_with_an_etag_to_revalidate_them(redis_client, monkeypatch):
+    monkeypatch.setattr(action_response_cache, "ACTION_CACHE_STALE_TTL", 1000)
+
+    assert store_cached_response(
+        "key", [1], POLICY, {"Cache-Control": "no-cache", "ETag": '"v1"'}
+    )
+
+    cached = read_cached_response("key")
+    assert not cached.is_fresh()
+    assert cached.etag == '"v1"'
+    assert 0 < redis_client.ttl("key") <= 1000
+
+
+def test_does_not_store_what_cannot_be_served(monkeypatch):
+    assert not store_cached_response("key", [1], POLICY, {"Cache-Control": "no-store"})
+    assert not store_cached_response("key", [1], POLICY, {"Cache-Control": "no-cache"})
+
+    monkeypatch.setattr(action_response_cache, "ACTION_CACHE_MAX_ENTRY_BYTES", 10)
+    assert not store_cached_response("key", ["a" * 20], POLICY, {})
+
+    assert read_cached_response("key") is None
+
+
+def test_revalidation_extends_the_cached_response():
+    stale = CachedResponse(response={"id": 1}, etag='"v1"', expires_at=time.time() - 1)
+
+    revalidate_cached_response("key", stale, POLICY, {"Cache-Control": "max-age=60"})
+
+    cached = read_cached_response("key")
+    assert cached.response == {"id": 1}
+    assert cached.etag == '"v1"'
+    assert cached.is_fresh()
+
+
+def test_unreadable_entries_are_treated_as_misses(redis_client):
+    redis_client.set("key", "not json")
+
+    assert read_cached_response("key") is None
+
+
+def test_counts_cache_events_by_operation():
+    record_cache_event("bot", "listOrders", "hit")
+    record_cache_event("bot", "listOrders", "hit")
+    record_cache_event("bot", "listOrders", "miss")
+    record_cache_event("bot", "ns:getOrder", "store")
+    record_cache_event("other", "listOrders", "hit")
+
+    assert get_action_cache_stats("bot") == {
+        "listOrders": {"hit": 2, "miss": 1},
+        "ns:getOrder": {"store": 1},
+    }
+    assert get_action_cache_stats("missing") == {}
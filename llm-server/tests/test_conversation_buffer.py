@@ -0,0 +1,82 @@
+import pytest
+
+from utils import conversation_buffer
+from utils.conversation_buffer import (
+    append_to_conversation_buffer,
+    clear_conversation_buffer,
+    fill_conversation_buffer,
+    read_conversation_buffer,
+)
+from utils.prompt_budget import count_tokens
+
+
+@pytest.fixture(autouse=True)
+def redis_client(monkeypatch, fake_redis):
+    monkeypatch.setattr(conversation_buffer, "redis_client", fake_redis)
+    return fake_redis
+
+
+def test_buffer_is_not_loaded_until_filled():
+    assert read_conversation_buffer("session") is None
+
+
+def test_reads_filled_messages_with_their_token_counts():
+    fill_conversation_buffer("session", [(True, "hello"), (False, "hi there")])
+
+    assert read_conversation_buffer("session") == [
+        (True, "hello", count_tokens("hello")),
+        (False, "hi there", count_tokens("hi there")),
+    ]
+
+
+def test_empty_session_is_loaded():
+    fill_conversation_buffer("session", [])
+
+    assert read_conversation_buffer("session") == []
+
+
+def test_appends_only_to_a_loaded_buffer():
+    append_to_conversation_buffer("session", [(True, "hello")])
+    assert read_conversation_buffer("session") is None
+
+    fill_conversation_buffer("session", [])
+    append_to_conversation_buffer("session", [(True, "hello"), (False, "hi")])
+    assert [
+        (from_user, message)
+        for from_user, message, _ in read_conversation_buffer("session")
+    ] == [(True, "hello"), (False, "hi")]
+
+
+def test_keeps_the_most_recent_messages(monkeypatch):
+    monkeypatch.setattr(conversation_buffer, "CONVERSATION_BUFFER_SIZE", 3)
+    fill_conversation_buffer("session", [(True, str(index)) for index in range(5)])
+    assert [message for _, message, _ in read_conversation_buffer("session")] == [
+        "2",
+        "3",
+        "4",
+    ]
+
+    append_to_conversation_buffer("session", [(False, "5")])
+    assert [message for _, message, _ in read_conversation_buffer("session")] == [
+        "3",
+        "4",
+        "5",
+    ]
+
+
+def test_reads_entries_without_token_counts(redis_client):
+    redis_client.rpush(
+        conversation_buffer.CONVERSATION_BUFFER_KEY_FORMAT.format("session"),
+        '[1,"hello"]',
+    )
+
+    assert read_conversation_buffer("session") == [
+        (True, "hello", count_tokens("hello"))
+    ]
+
+
+def test_clear_unloads_the_buffer():
+    fill_conversation_buffer("session", [(True, "hello")])
+    clear_conversation_buffer("session")
+
+    assert read_conversation_buffer("session") is None
@@ -0,0 +1,110 @@
+from typing import Dict, List, Optional
+
+import pytest
+
+from entities.flow_entity import Block
+from utils.flow_graph import build_flow_graph, get_ready_steps, should_run
+
+
+def block(name: str, **kwargs) -> Block:
+    return Block(id=name, name=name, actions=[], **kwargs)
+
+
+def simulate(blocks: List[Block], failing: List[str] = []) -> List[Optional[str]]:
+    """
+    Settles the steps the way run_actions schedules them, one ready step at a time. Returns the names of the blocks
+    that ran, in order.
+    """
+    steps = build_flow_graph(blocks)
+    outcomes: Dict[int, Optional[bool]] = {}
+    pending = {step.index: step for step in steps}
+    ran = []
+    while pending:
+        ready = get_ready_steps(pending.values(), outcomes)
+        assert ready, "a step is waiting for a step that never settles"
+        step = min(ready, key=lambda ready_step: ready_step.index)
+        del pending[step.index]
+        if should_run(step, outcomes):
+            ran.append(step.block.name)
+            outcomes[step.index] = step.block.name not in failing
+        else:
+            outcomes[step.index] = None
+    return ran
+
+
+def test_runs_blocks_in_listed_order():
+    steps = build_flow_graph([block("a"), block("b"), block("c")])
+
+    assert [step.predecessors for step in steps] == [set(), {0}, {0, 1}]
+    assert simulate([block("a"), block("b"), block("c")]) == ["a", "b", "c"]
+
+
+def test_blocks_of_the_same_order_run_concurrently():
+    steps = build_flow_graph(
+        [block("a", order=1), block("b", order=1), block("c", order=2)]
+    )
+
+    assert steps[0].predecessors == set()
+    assert steps[1].predecessors == set()
+    assert steps[2].predecessors == {0, 1}
+    assert steps[2].earlier_ranks == [{0, 1}]
+
+
+def branching_flow() -> List[Block]:
+    return [
+        block("a", next_on_success="b", next_on_fail="c"),
+        block("b"),
+        block("c"),
+        block("d"),
+    ]
+
+
+def test_block_after_a_skipped_branch_waits_for_the_taken_one():
+    steps = build_flow_graph(branching_flow())
+
+    assert steps[3].predecessors == {0, 1, 2}
+    assert steps[3].earlier_ranks == [{2}, {1}, {0}]
+    assert steps[3].ancestors == {0, 1, 2}
+    assert simulate(branching_flow()) == ["a", "b", "d"]
+
+
+def test_block_after_the_fail_branch_runs_once_it_succeeded():
+    assert simulate(branching_flow(), failing=["a"]) == ["a", "c", "d"]
+
+
+def test_block_after_a_failed_branch_is_skipped():
+    assert simulate(branching_flow(), failing=["b"]) == ["a", "b"]
+
+
+def test_skipped_step_settles_without_running():
+    steps = build_flow_graph(branching_flow())
+
+    # a succeeded: b is triggered, c is not, d still waits for b
+    outcomes: Dict[int, Optional[bool]] = {0: True}
+    assert should_run(steps[1], outcomes)
+    assert not should_run(steps[2], outcomes)
+    outcomes[2] = None
+    assert steps[3] not in get_ready_steps(steps, outcomes)
+
+
+def test_block_jumped_back_to_is_not_waited_for():
+    steps = build_flow_graph(
+        [
+            block("retry", order=1),
+            block("a", order=2),
+            block("b", order=3, next_on_fail="retry"),
+        ]
+    )
+
+    assert steps[0].predecessors == {2}
+    assert steps[1].predecessors == set()
+
+
+def test_rejects_unknown_blocks_and_cycles():
+    with pytest.raises(ValueError):
+        build_flow_graph([block("a", next_on_success="missing")])
+
+    with pytest.raises(ValueError):
+        build_flow_graph(
+            [block("a", next_on_success="b"), block("b", next_on_success="a")]
+        )
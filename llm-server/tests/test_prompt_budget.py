@@ -0,0 +1,130 @@
+from langchain.docstore.document import Document
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
+
+from utils.prompt_budget import (
+    MESSAGE_OVERHEAD_TOKENS,
+    TOKEN_COUNT_KEY,
+    PromptBudget,
+    build_prompt,
+    count_document_tokens,
+    count_message_tokens,
+    fit_text,
+    get_prompt_budget,
+    get_remaining_tokens,
+    select_chunks,
+    trim_history,
+    truncate_to_tokens,
+    with_token_count,
+)
+
+
+def words(count: int, word: str = "word") -> str:
+    return " ".join([word] * count)
+
+
+def render_context(chunks):
+    return HumanMessage(content="".join(chunks))
+
+
+def test_counts_messages_with_their_overhead():
+    assert count_message_tokens(HumanMessage(content="one two three")) == (
+        3 + MESSAGE_OVERHEAD_TOKENS
+    )
+
+
+def test_uses_stored_token_counts():
+    message = HumanMessage(content="one two", additional_kwargs={TOKEN_COUNT_KEY: 10})
+    document = Document(page_content="one two", metadata={TOKEN_COUNT_KEY: 10})
+
+    assert count_message_tokens(message) == 10 + MESSAGE_OVERHEAD_TOKENS
+    assert count_document_tokens(document) == 10
+
+
+def test_with_token_count_tags_the_document():
+    document = with_token_count(Document(page_content="one two three"))
+
+    assert document.metadata[TOKEN_COUNT_KEY] == 3
+
+
+def test_trim_history_keeps_the_most_recent_messages():
+    history = [
+        HumanMessage(content=words(10, "old")),
+        AIMessage(content=words(10, "middle")),
+        HumanMessage(content=words(10, "new")),
+    ]
+
+    assert trim_history(history, 2 * (10 + MESSAGE_OVERHEAD_TOKENS)) == history[1:]
+    assert trim_history(history, 10) == []
+
+
+def test_select_chunks_keeps_the_ranking_order():
+    chunks = [("first", 5), ("too long", 20), ("second", 4), ("third", 2)]
+
+    assert select_chunks(chunks, 10) == ["first", "second"]
+
+
+def test_truncate_to_tokens():
+    assert truncate_to_tokens(words(3), 5) == words(3)
+    assert truncate_to_tokens(words(10), 4) == words(4) + " [truncated]"
+
+
+def test_fit_text_leaves_room_for_the_other_messages():
+    budget = PromptBudget(input_tokens=30, context_share=0.5)
+    messages = [SystemMessage(content=words(10))]
+
+    fitted = fit_text(words(100), messages, budget)
+
+    assert fitted == words(30 - 14 - MESSAGE_OVERHEAD_TOKENS) + " [truncated]"
+    assert get_remaining_tokens(messages, budget) == 30 - 14
+
+
+def test_prompt_budget_is_capped():
+    assert get_prompt_budget(100).input_tokens == 100
+
+
+def test_build_prompt_keeps_system_and_tail_and_fits_the_rest():
+    budget = PromptBudget(input_tokens=100, context_share=0.5)
+    system = [SystemMessage(content=words(10))]
+    tail = [HumanMessage(content=words(10))]
+    history = [HumanMessage(content=words(20, str(index))) for index in range(5)]
+    context = [(words(20, "chunk"), 20), (words(20, "other"), 20)]
+
+    messages = build_prompt(
+        system, tail, history, context, render_context=render_context, budget=budget
+    )
+
+    # 72 tokens left: up to 36 for the context (one chunk, 24 tokens), the history gets the other 48 (two messages)
+    assert messages[0] == system[0]
+    assert messages[-1] == tail[0]
+    assert messages[-2].content == words(20, "chunk")
+    assert messages[1:-2] == history[-2:]
+    assert get_remaining_tokens(messages, budget) >= 0
+
+
+def test_build_prompt_gives_the_context_everything_without_history():
+    budget = PromptBudget(input_tokens=100, context_share=0.5)
+    context = [(words(20, "chunk"), 20), (words(20, "other"), 20)]
+
+    messages = build_prompt(
+        [SystemMessage(content="system")],
+        [HumanMessage(content="input")],
+        context=context,
+        render_context=render_context,
+        budget=budget,
+    )
+
+    assert messages[1].content == words(20, "chunk") + words(20, "other")
+
+
+def test_build_prompt_caps_the_history():
+    history = [HumanMessage(content=words(5, str(index))) for index in range(5)]
+
+    messages = build_prompt(
+        [],
+        [],
+        history,
+        budget=PromptBudget(input_tokens=1000, context_share=0.5),
+        max_history_tokens=2 * (5 + MESSAGE_OVERHEAD_TOKENS),
+    )
+
+    assert messages == history[-2:]
@@ -0,0 +1,90 @@
+from entities.action_entity import ResponsePruning
+from utils import prune_json
+from utils.prune_json import prune_response
+
+
+def test_drops_empty_styling_and_url_heavy_fields():
+    response = {
+        "id": 1,
+        "name": "Order",
+        "note": "",
+        "tags": [],
+        "backgroundColor": "#fff",
+        "css_class": "order",
+        "avatarUrl": "https://example.com/avatar.png",
+        "_links": {"self": {"href": "https://example.com/orders/1"}},
+        "url": "https://example.com/orders/1",
+    }
+
+    pruned, report = prune_response(response)
+
+    assert pruned == {"id": 1, "name": "Order", "url": "https://example.com/orders/1"}
+    assert report.dropped_fields == 6
+
+
+def test_keeps_url_fields_that_hold_no_url():
+    pruned, _ = prune_response({"image_url": "not available"})
+
+    assert pruned == {"image_url": "not available"}
+
+
+def test_drops_objects_left_empty_once_pruned():
+    pruned, report = prune_response({"id": 1, "details": {"color": "red", "note": ""}})
+
+    assert pruned == {"id": 1}
+    assert report.dropped_fields == 3
+
+
+def test_honours_the_action_keep_and_drop_fields():
+    pruning = ResponsePruning(keep_fields=["color", "comment"], drop_fields=["secret"])
+
+    pruned, _ = prune_response(
+        {"color": "red", "comment": "", "secret": "s3cr3t", "id": 1}, pruning
+    )
+
+    assert pruned == {"color": "red", "comment": "", "id": 1}
+
+
+def test_elides_array_items_past_the_limit():
+    pruning = ResponsePruning(max_array_items=2)
+
+    pruned, report = prune_response(
+        {"items": [{"id": i} for i in range(5)]}, pruning
+    )
+
+    assert pruned == {"items": [{"id": 0}, {"id": 1}, "... 3 more items"]}
+    assert report.elided_items == 3
+    assert report.paths == ["$.items"]
+
+
+def test_truncates_long_strings():
+    pruning = ResponsePruning(max_string_length=5)
+
+    pruned, report = prune_response({"users": [{"bio": "abcdefgh"}]}, pruning)
+
+    assert pruned == {"users": [{"bio": "abcde... [3 more characters]"}]}
+    assert report.truncated_strings == 1
+    assert report.paths == ["$.users[].bio"]
+
+
+def test_tightens_the_limits_until_the_response_fits():
+    # every item is five words, the items next to each other share a token in the compact dump
+    pruning = ResponsePruning(max_array_items=8, max_tokens=20)
+
+    pruned, report = prune_response(["one two three four five"] * 10, pruning)
+
+    assert report.passes == 2
+    assert pruned == ["one two three four five"] * 4 + ["... 6 more items"]
+    assert report.tokens <= 20
+
+
+def test_returns_the_response_untouched_when_disabled(monkeypatch):
+    response = {"note": "", "items": list(range(100))}
+
+    assert prune_response(response, ResponsePruning(enabled=False)) == (
+        response,
+        None,
+    )
+
+    monkeypatch.setattr(prune_json, "ENABLE_RESPONSE_PRUNING", False)
+    assert prune_response(response) == (response, None)
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from utils.get_logger import SilentException
+from utils.llm_consts import redis_client
+
+ACTION_CATALOG_VERSION_KEY_FORMAT = "action_catalog_version:{}"
+
+
+def get_action_catalog_version(bot_id: str) -> Optional[int]:
+    """Returns the version of the bot's actions and flows, or None if it can't be read"""
+    try:
+        version = redis_client.get(ACTION_CATALOG_VERSION_KEY_FORMAT.format(bot_id))
+    except Exception as e:
+        SilentException.capture_exception(e)
+        return None
+
+    return int(version) if version else 0
+
+
+def bump_action_catalog_version(bot_id: str) -> None:
+    """Must be called whenever one of the bot's actions or flows is created, updated or deleted"""
+    try:
+        redis_client.incr(ACTION_CATALOG_VERSION_KEY_FORMAT.format(bot_id))
+    except Exception as e:
+        SilentException.capture_exception(e)
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+from entities.action_entity import ActionCachePolicy
+from utils.get_logger import SilentException
+from utils.llm_consts import (
+    ACTION_CACHE_MAX_ENTRY_BYTES,
+    ACTION_CACHE_STALE_TTL,
+    redis_client,
+)
+
+# keyed by bot id, operation id and a digest of the request
+ACTION_RESPONSE_KEY_FORMAT = "action_response:{}:{}:{}"
+# one hash per bot, fields are {operation_id}:{event}
+ACTION_CACHE_STATS_KEY_FORMAT = "action_cache_stats:{}"
+
+
+@dataclass
+class CachedResponse:
+    response: Any
+    etag: Optional[str]
+    expires_at: float
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+def is_cacheable(method: str, policy: Optional[ActionCachePolicy]) -> bool:
+    return method == "GET" and policy is not None and policy.enabled and policy.ttl > 0
+
+
+def get_response_cache_key(
+    bot_id: str,
+    operation_id: str,
+    url: str,
+    query_params: Mapping[str, Any],
+    headers: Mapping[str, Any],
+    policy: ActionCachePolicy,
+) -> str:
+    params = {
+        name: value
+        for name, value in query_params.items()
+        if policy.key_params is None or name in policy.key_params
+    }
+    key_headers = {name.lower() for name in policy.key_headers}
+    header_values = {
+        name.lower(): value
+        for name, value in headers.items()
+        if name.lower() in key_headers
+    }
+    request = json.dumps(
+        [url, params, header_values], sort_keys=True, default=str
+    ).encode()
+    return ACTION_RESPONSE_KEY_FORMAT.format(
+        bot_id, operation_id, hashlib.sha256(request).hexdigest()
+    )
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for directive in value.split(","):
+        name, _, argument = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def get_freshness(
+    policy: ActionCachePolicy, response_headers: Mapping[str, str]
+) -> Optional[int]:
+    """
+    The seconds the response can be served without revalidation, None if it must not be stored. Responses marked
+    private are not stored, the cache is shared by every user of the bot.
+    """
+    directives = parse_cache_control(response_headers.get("Cache-Control", ""))
+    if "no-store" in directives or "private" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+
+    freshness = policy.ttl
+    for directive in ("s-maxage", "max-age"):
+        argument = directives.get(directive)
+        if argument is not None and argument.isdigit():
+            return min(freshness, int(argument))
+    return freshness
+
+
+def read_cached_response(key: str) -> Optional[CachedResponse]:
+    try:
+        entry = redis_client.get(key)
+        if entry is None:
+            return None
+
+        return CachedResponse(**json.loads(entry))
+    except Exception as e:
+        # the api is called as if the response was not cached
+        SilentException.capture_exception(e)
+        return None
+
+
+def store_cached_response(
+    key: str,
+    response: Any,
+    policy: ActionCachePolicy,
+    response_headers: Mapping[str, str],
+) -> bool:
+    """
+    Stores the response as long as it is fresh, or longer if it has an ETag so it can be revalidated.
+
+    Returns:
+        Whether the response was stored.
+    """
+    freshness = get_freshness(policy, response_headers)
+    etag = response_headers.get("ETag")
+    if freshness is None or (freshness == 0 and not etag):
+        return False
+
+    entry = json.dumps(
+        {"response": response, "etag": etag, "expires_at": time.time() + freshness},
+        default=str,
+    )
+    if len(entry) > ACTION_CACHE_MAX_ENTRY_BYTES:
+        return False
+
+    try:
+        redis_client.setex(
+            key, freshness + (ACTION_CACHE_STALE_TTL if etag else 0), entry
+        )
+        return True
+    except Exception as e:
+        SilentException.capture_exception(e)
+        return False
+
+
+def revalidate_cached_response(
+    key: str,
+    cached: CachedResponse,
+    policy: ActionCachePolicy,
+    response_headers: Mapping[str, str],
+) -> None:
+    """Extends a cached response the api answered 304 Not Modified for"""
+    store_cached_response(
+        key,
+        cached.response,
+        policy,
+        {
+            "Cache-Control": response_headers.get("Cache-Control", ""),
+            "ETag": response_headers.get("ETag") or cached.etag or "",
+        },
+    )
+
+
+def record_cache_event(bot_id: str, operation_id: str, event: str) -> None:
+    """Counts a hit, revalidation, miss or store of the operation's cache"""
+    try:
+        redis_client.hincrby(
+            ACTION_CACHE_STATS_KEY_FORMAT.format(bot_id), f"{operation_id}:{event}", 1
+        )
+    except Exception as e:
+        SilentException.capture_exception(e)
+
+
+def get_action_cache_stats(bot_id: str) -> Dict[str, Dict[str, int]]:
+    """Returns the bot's cache counters by operation id"""
+    stats: Dict[str, Dict[str, int]] = {}
+    for field, value in redis_client.hgetall(
+        ACTION_CACHE_STATS_KEY_FORMAT.format(bot_id)
+    ).items():
+        operation_id, event = field.rsplit(":", 1)
+        stats.setdefault(operation_id, {})[event] = int(value)
+    return stats
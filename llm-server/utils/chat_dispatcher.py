@@ -0,0 +1,86 @@
+import asyncio
+import contextvars
+import weakref
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from utils.event_loop import get_worker_loop
+from utils.get_logger import SilentException
+from utils.llm_consts import CHAT_MAX_CONCURRENCY
+
+Chat = Callable[[], Awaitable[None]]
+
+
+@dataclass
+class ChatQueue:
+    semaphore: asyncio.Semaphore
+    # the last chat of each session, the session's next chat starts once it is done
+    sessions: Dict[str, asyncio.Task] = field(default_factory=dict)
+    # every chat waiting or running
+    tasks: Set[asyncio.Task] = field(default_factory=set)
+
+
+# chats are tasks of the event loop they were dispatched on
+_queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ChatQueue]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_chat_queue() -> ChatQueue:
+    loop = asyncio.get_running_loop()
+    queue = _queues.get(loop)
+    if queue is None:
+        queue = ChatQueue(semaphore=asyncio.Semaphore(CHAT_MAX_CONCURRENCY))
+        _queues[loop] = queue
+    return queue
+
+
+async def run_in_order(
+    queue: ChatQueue, chat: Chat, previous: Optional[asyncio.Task]
+) -> None:
+    if previous is not None:
+        # the previous chat's failure is its own, this one still runs
+        await asyncio.wait([previous])
+
+    async with queue.semaphore:
+        try:
+            await chat()
+        except Exception as e:
+            SilentException.capture_exception(e)
+
+
+def dispatch_chat(session_id: str, chat: Chat) -> asyncio.Task:
+    """
+    Runs the chat as a task of the running loop, after the session's previous chats. At most CHAT_MAX_CONCURRENCY
+    chats run at once, a slow chat only delays the chats of its own session.
+    """
+    queue = get_chat_queue()
+    task = asyncio.create_task(
+        run_in_order(queue, chat, queue.sessions.get(session_id))
+    )
+    queue.sessions[session_id] = task
+    queue.tasks.add(task)
+
+    def forget(done: asyncio.Task):
+        queue.tasks.discard(done)
+        if queue.sessions.get(session_id) is done:
+            del queue.sessions[session_id]
+
+    task.add_done_callback(forget)
+    return task
+
+
+def submit_chat(session_id: str, chat: Chat) -> None:
+    """
+    Dispatches the chat on the worker's loop from another thread and returns without waiting for it. The chat does
+    not inherit the caller's context, e.g. a Socket.IO handler's request context that ends when the handler returns.
+    """
+    get_worker_loop().call_soon_threadsafe(
+        dispatch_chat, session_id, chat, context=contextvars.Context()
+    )
+
+
+def get_pending_chats() -> List[asyncio.Task]:
+    """The chats of the running loop that are waiting or running"""
+    queue = _queues.get(asyncio.get_running_loop())
+    return list(queue.tasks) if queue is not None else []
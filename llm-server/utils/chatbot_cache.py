@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+from copy import deepcopy
+from typing import Callable, Optional, Tuple
+
+from cachetools import TTLCache
+
+from shared.models.opencopilot_db.chatbot import Chatbot
+from utils.get_logger import SilentException
+from utils.llm_consts import (
+    CHATBOT_CACHE_MAX_SIZE,
+    CHATBOT_CACHE_TTL,
+    redis_client,
+)
+
+CHATBOT_CACHE_CHANNEL = "chatbot_cache_invalidation"
+
+# entries are keyed by ("id", bot_id) and ("token", bot_token)
+_cache: TTLCache = TTLCache(
+    maxsize=CHATBOT_CACHE_MAX_SIZE, ttl=max(CHATBOT_CACHE_TTL, 1)
+)
+_cache_lock = threading.Lock()
+# bumped on every eviction, a snapshot loaded before an eviction may be stale and is not stored
+_generation = 0
+_subscriber: Optional[threading.Thread] = None
+
+
+def snapshot(chatbot: Chatbot) -> Chatbot:
+    """Copies the loaded columns into a transient instance, which is not bound to any session"""
+    return Chatbot(
+        **{
+            column.key: deepcopy(getattr(chatbot, column.key))
+            for column in Chatbot.__table__.columns
+        }
+    )
+
+
+def get_cached_chatbot(key: Tuple[str, str], load: Callable[[], Chatbot]) -> Chatbot:
+    """
+    Returns a snapshot of the chatbot, loading it on a miss. Every call returns its own copy, so callers can't
+    alter the cached entry.
+
+    Args:
+        key: ("id", bot_id) or ("token", bot_token).
+        load: Loads the chatbot from the database, its exceptions are propagated.
+    """
+    if CHATBOT_CACHE_TTL <= 0:
+        return load()
+
+    ensure_subscribed()
+    with _cache_lock:
+        cached = _cache.get(key)
+        generation = _generation
+
+    if cached is None:
+        cached = snapshot(load())
+        with _cache_lock:
+            if generation == _generation:
+                _cache[("id", str(cached.id))] = cached
+                _cache[("token", str(cached.token))] = cached
+
+    return snapshot(cached)
+
+
+def evict_chatbot(bot_id: str) -> None:
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        for key, chatbot in list(_cache.items()):
+            if str(chatbot.id) == bot_id:
+                _cache.pop(key, None)
+
+
+def clear_chatbot_cache() -> None:
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        _cache.clear()
+
+
+def invalidate_chatbot(bot_id: str) -> None:
+    """Must be called whenever a chatbot is updated or deleted, evicts it from every process"""
+    evict_chatbot(str(bot_id))
+    try:
+        redis_client.publish(CHATBOT_CACHE_CHANNEL, str(bot_id))
+    except Exception as e:
+        SilentException.capture_exception(e)
+
+
+def listen_for_invalidations() -> None:
+    while True:
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CHATBOT_CACHE_CHANNEL)
+            # invalidations published while disconnected are lost, start over from an empty cache
+            clear_chatbot_cache()
+
+            for message in pubsub.listen():
+                if message.get("type") == "message":
+                    evict_chatbot(str(message["data"]))
+        except Exception as e:
+            logging.warning("Chatbot cache invalidation listener failed: %s", e)
+            time.sleep(1)
+
+
+def ensure_subscribed() -> None:
+    global _subscriber
+    if _subscriber is not None and _subscriber.is_alive():
+        return
+
+    with _cache_lock:
+        if _subscriber is None or not _subscriber.is_alive():
+            _subscriber = threading.Thread(
+                target=listen_for_invalidations,
+                name="chatbot-cache-invalidation",
+                daemon=True,
+            )
+            _subscriber.start()
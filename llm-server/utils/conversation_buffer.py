@@ -0,0 +1,101 @@
+import json
+from typing import List, Optional, Tuple
+
+from utils.get_logger import SilentException
+from utils.llm_consts import (
+    CONVERSATION_BUFFER_SIZE,
+    CONVERSATION_BUFFER_TTL,
+    redis_client,
+)
+from utils.prompt_budget import count_tokens
+
+CONVERSATION_BUFFER_KEY_FORMAT = "conversation:{}"
+# marks the buffer of a session without messages as loaded, skipped when reading
+EMPTY_MARKER = ""
+
+# (from_user, message), oldest first
+ConversationMessages = List[Tuple[bool, str]]
+# (from_user, message, token count), oldest first
+CountedConversationMessages = List[Tuple[bool, str, int]]
+
+
+def serialize(from_user: bool, message: str) -> str:
+    # the token count is stored with the message, so prompts are budgeted without counting it again
+    return json.dumps(
+        [int(from_user), message, count_tokens(message)], separators=(",", ":")
+    )
+
+
+def read_conversation_buffer(
+    session_id: str,
+) -> Optional[CountedConversationMessages]:
+    """Returns the session's most recent messages, or None if the buffer is not loaded or can't be read"""
+    key = CONVERSATION_BUFFER_KEY_FORMAT.format(session_id)
+    try:
+        pipeline = redis_client.pipeline()
+        pipeline.lrange(key, 0, -1)
+        pipeline.expire(key, CONVERSATION_BUFFER_TTL)
+        entries, loaded = pipeline.execute()
+    except Exception as e:
+        SilentException.capture_exception(e)
+        return None
+
+    if not loaded:
+        return None
+
+    messages: CountedConversationMessages = []
+    for entry in entries:
+        if entry == EMPTY_MARKER:
+            continue
+        from_user, message, *token_count = json.loads(entry)
+        # entries written before token counts were stored
+        if not token_count:
+            token_count = [count_tokens(message)]
+        messages.append((bool(from_user), message, token_count[0]))
+
+    return messages
+
+
+def fill_conversation_buffer(session_id: str, messages: ConversationMessages) -> None:
+    """Loads the buffer of a session from its most recent messages, oldest first"""
+    key = CONVERSATION_BUFFER_KEY_FORMAT.format(session_id)
+    entries = [
+        serialize(from_user, message)
+        for from_user, message in messages[-CONVERSATION_BUFFER_SIZE:]
+    ]
+    try:
+        pipeline = redis_client.pipeline()
+        pipeline.delete(key)
+        pipeline.rpush(key, *(entries or [EMPTY_MARKER]))
+        pipeline.expire(key, CONVERSATION_BUFFER_TTL)
+        pipeline.execute()
+    except Exception as e:
+        SilentException.capture_exception(e)
+
+
+def append_to_conversation_buffer(
+    session_id: str, messages: ConversationMessages
+) -> None:
+    """
+    Appends the messages of a turn to the session's buffer, keeping the CONVERSATION_BUFFER_SIZE most recent ones.
+    Nothing is appended to a buffer that is not loaded, it is loaded from the database when it is read.
+    """
+    key = CONVERSATION_BUFFER_KEY_FORMAT.format(session_id)
+    try:
+        pipeline = redis_client.pipeline()
+        pipeline.rpushx(
+            key, *[serialize(from_user, message) for from_user, message in messages]
+        )
+        pipeline.ltrim(key, -CONVERSATION_BUFFER_SIZE, -1)
+        pipeline.expire(key, CONVERSATION_BUFFER_TTL)
+        pipeline.execute()
+    except Exception as e:
+        SilentException.capture_exception(e)
+
+
+def clear_conversation_buffer(session_id: str) -> None:
+    """Must be called when a stored message of the session is changed or deleted"""
+    try:
+        redis_client.delete(CONVERSATION_BUFFER_KEY_FORMAT.format(session_id))
+    except Exception as e:
+        SilentException.capture_exception(e)
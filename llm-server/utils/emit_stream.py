@@ -0,0 +1,63 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from utils.socket_emit import emit
+from langchain_core.messages import AIMessageChunk, BaseMessageChunk
+
+from utils.llm_consts import STREAM_EMIT_INTERVAL
+
+
+@dataclass
+class StreamProgress:
+    chunks: int = 0
+
+
+async def replay_stream(content: str) -> AsyncIterator[BaseMessageChunk]:
+    """A stream of an already generated answer, for it to be emitted like a generated one"""
+    yield AIMessageChunk(content=content)
+
+
+async def emit_stream(
+    chunks: AsyncIterator[BaseMessageChunk],
+    session_id: str,
+    is_streaming: bool,
+    release: Optional[asyncio.Event] = None,
+    progress: Optional[StreamProgress] = None,
+) -> str:
+    """
+    Consumes an LLM token stream and returns the full content. When streaming, tokens are buffered and emitted to
+    the session once per STREAM_EMIT_INTERVAL instead of one Socket.IO frame per token.
+
+    Args:
+        release: If given, nothing is emitted before it is set, the tokens received until then are emitted at once.
+        progress: If given, it is updated with the number of received chunks as the stream goes.
+    """
+    content = ""
+    buffer = ""
+    last_emit = time.monotonic()
+
+    async for chunk in chunks:
+        content += str(chunk.content)
+        if progress is not None:
+            progress.chunks += 1
+        if not is_streaming:
+            continue
+
+        buffer += str(chunk.content)
+        now = time.monotonic()
+        if release is not None and not release.is_set():
+            continue
+        if buffer and now - last_emit >= STREAM_EMIT_INTERVAL:
+            emit(session_id, buffer)
+            buffer = ""
+            last_emit = now
+
+    if release is not None:
+        await release.wait()
+
+    if is_streaming and buffer:
+        emit(session_id, buffer)
+
+    return content
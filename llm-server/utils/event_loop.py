@@ -0,0 +1,103 @@
+import asyncio
+import atexit
+import logging
+import threading
+from typing import Any, Collection, Coroutine, Optional, TypeVar
+
+from utils.http_clients import close_http_clients
+from utils.llm_consts import GRACEFUL_SHUTDOWN_TIMEOUT
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+# set when the loop was started by this module rather than by the asgi server
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def set_worker_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Makes the asgi server's loop the worker's loop, must be called from its lifespan startup"""
+    global _loop
+    with _lock:
+        _loop = loop
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the long-lived event loop of this worker process. Outside of the asgi server (flask run, celery) a loop
+    is started in a daemon thread on first use.
+    """
+    global _loop, _thread
+    if _loop is not None and not _loop.is_closed():
+        return _loop
+
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=loop.run_forever, name="worker-event-loop", daemon=True
+            )
+            _thread.start()
+            _loop = loop
+            atexit.register(shutdown_worker_loop)
+        return _loop
+
+
+def run_coroutine(coroutine: Coroutine[Any, Any, T]) -> T:
+    """
+    Runs the coroutine on the worker's loop and blocks the calling thread until it is done. The coroutine runs in a
+    copy of the caller's context, so the flask request and app contexts are available to it.
+    """
+    loop = get_worker_loop()
+    try:
+        on_worker_loop = asyncio.get_running_loop() is loop
+    except RuntimeError:
+        on_worker_loop = False
+    if on_worker_loop:
+        coroutine.close()
+        raise RuntimeError("run_coroutine can't block the worker's own event loop")
+
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+
+async def drain_worker_loop(
+    timeout: float, tasks: Optional[Collection[asyncio.Task]] = None
+) -> None:
+    """
+    Waits up to timeout for the tasks to finish, then cancels them and closes the pooled clients.
+
+    Args:
+        tasks: Defaults to every other task of the loop, the asgi server passes its own requests' tasks.
+    """
+    if tasks is None:
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logging.warning("Cancelled %s tasks on shutdown", len(pending))
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    await close_http_clients()
+
+
+def shutdown_worker_loop(timeout: float = GRACEFUL_SHUTDOWN_TIMEOUT) -> None:
+    """Drains and stops the loop started by get_worker_loop, the asgi server's loop is drained by its lifespan"""
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        if loop is None or thread is None:
+            return
+        _loop, _thread = None, None
+
+    try:
+        asyncio.run_coroutine_threadsafe(drain_worker_loop(timeout), loop).result(
+            timeout + 5
+        )
+    except Exception as e:
+        logging.warning("Worker event loop did not drain: %s", e)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
@@ -0,0 +1,136 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from entities.flow_entity import Block
+
+
+@dataclass
+class FlowStep:
+    index: int
+    block: Block
+    # the steps that must settle before this one
+    predecessors: Set[int] = field(default_factory=set)
+    # every step this one runs after, directly or not, their outputs feed its payload generation
+    ancestors: Set[int] = field(default_factory=set)
+    # (predecessor, whether it succeeded) pairs that trigger the step, empty for steps placed by their order
+    triggers: Set[Tuple[int, bool]] = field(default_factory=set)
+    # the steps placed before this one by their order, grouped by order from the closest, empty for triggered steps
+    earlier_ranks: List[Set[int]] = field(default_factory=list)
+
+
+def resolve_block_references(blocks: List[Block]) -> Dict[str, int]:
+    references: Dict[str, int] = {}
+    for index, block in enumerate(blocks):
+        references.setdefault(block.name, index)
+
+    # the id defaults to the same value for every block, it only identifies blocks if it is unique
+    ids = [block.id for block in blocks]
+    if len(set(ids)) == len(ids):
+        references.update({block_id: index for index, block_id in enumerate(ids)})
+    return references
+
+
+def is_placed_before(other: FlowStep, step: FlowStep, ranks: List[int]) -> bool:
+    """
+    Whether other comes before the order-based step. A triggered step only does if the steps triggering it do as
+    well, a step jumped back to from a later block is not waited for.
+    """
+    rank = ranks[step.index]
+    return ranks[other.index] < rank and all(
+        ranks[predecessor] < rank for predecessor, _ in other.triggers
+    )
+
+
+def build_flow_graph(blocks: List[Block]) -> List[FlowStep]:
+    """
+    Builds the dependency graph of a flow's blocks.
+
+    A block that another block points to with next_on_success or next_on_fail only runs once that block succeeded
+    or failed. Any other block runs once every block of a lower order has settled, after the closest order whose
+    blocks were not all skipped, blocks of the same order run concurrently. Flows that don't set any order run their
+    blocks one after another, in the order they are listed.
+
+    Raises:
+        ValueError: If a block points to an unknown block or the blocks form a cycle.
+    """
+    steps = [FlowStep(index=index, block=block) for index, block in enumerate(blocks)]
+    references = resolve_block_references(blocks)
+
+    for step in steps:
+        for target, succeeded in (
+            (step.block.next_on_success, True),
+            (step.block.next_on_fail, False),
+        ):
+            if not target:
+                continue
+
+            target_index = references.get(target)
+            if target_index is None or target_index == step.index:
+                raise ValueError(
+                    f"Block {step.block.name} points to an invalid block: {target}"
+                )
+            steps[target_index].triggers.add((step.index, succeeded))
+
+    ranks = (
+        [block.order for block in blocks]
+        if any(block.order for block in blocks)
+        else list(range(len(blocks)))
+    )
+    for step in steps:
+        if step.triggers:
+            step.predecessors = {predecessor for predecessor, _ in step.triggers}
+            continue
+
+        earlier: Dict[int, Set[int]] = {}
+        for other in steps:
+            if is_placed_before(other, step, ranks):
+                earlier.setdefault(ranks[other.index], set()).add(other.index)
+        step.earlier_ranks = [earlier[rank] for rank in sorted(earlier, reverse=True)]
+        step.predecessors = set().union(*step.earlier_ranks)
+
+    # resolve the ancestors in topological order, a step left unresolved is part of a cycle
+    resolved: Set[int] = set()
+    while len(resolved) < len(steps):
+        ready = [
+            step
+            for step in steps
+            if step.index not in resolved and step.predecessors <= resolved
+        ]
+        if not ready:
+            raise ValueError("The flow's blocks form a cycle")
+
+        for step in ready:
+            for predecessor in step.predecessors:
+                step.ancestors |= {predecessor, *steps[predecessor].ancestors}
+            resolved.add(step.index)
+
+    return steps
+
+
+def should_run(step: FlowStep, outcomes: Dict[int, Optional[bool]]) -> bool:
+    """
+    Whether a step whose predecessors have settled runs or is skipped. A triggered step runs if one of its triggers
+    matched, any other step if the blocks of the closest order that ran all succeeded, skipped orders (e.g. an
+    untaken next_on_fail branch) are looked through.
+
+    Args:
+        outcomes: True for the steps that succeeded, False for the ones that failed and None for the skipped ones.
+    """
+    if step.triggers:
+        return any(
+            outcomes.get(predecessor) is succeeded
+            for predecessor, succeeded in step.triggers
+        )
+
+    for rank in step.earlier_ranks:
+        ran = [outcomes[index] for index in rank if outcomes.get(index) is not None]
+        if ran:
+            return all(ran)
+    return True
+
+
+def get_ready_steps(
+    steps: Iterable[FlowStep], outcomes: Dict[int, Optional[bool]]
+) -> List[FlowStep]:
+    """The steps whose predecessors have all settled"""
+    return [step for step in steps if step.predecessors <= outcomes.keys()]
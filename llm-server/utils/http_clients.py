@@ -0,0 +1,68 @@
+import asyncio
+import weakref
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Dict
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils.llm_consts import (
+    HTTP_CLIENT_CONNECT_TIMEOUT,
+    HTTP_CLIENT_HTTP2,
+    HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST,
+    HTTP_CLIENT_MAX_KEEPALIVE_PER_HOST,
+    HTTP_CLIENT_TIMEOUT,
+)
+
+# clients are bound to the event loop they were created on, keyed by base url
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_base_url(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP_CLIENT_HTTP2,
+        limits=httpx.Limits(
+            max_connections=HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=HTTP_CLIENT_MAX_KEEPALIVE_PER_HOST,
+            keepalive_expiry=HTTP_CLIENT_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(HTTP_CLIENT_TIMEOUT, connect=HTTP_CLIENT_CONNECT_TIMEOUT),
+        # the client is shared between tenants, cookies set by one response must not be sent with the next request
+        cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+    )
+
+
+def get_http_client(url: str) -> httpx.AsyncClient:
+    """
+    Returns the pooled client of the url's host, connections are kept alive between the calls of a flow and across
+    requests served by the same event loop. The client is shared, headers must be passed per request and never set on
+    the client.
+    """
+    loop = asyncio.get_running_loop()
+    clients = _clients.get(loop)
+    if clients is None:
+        clients = {}
+        _clients[loop] = clients
+
+    base_url = get_base_url(url)
+    client = clients.get(base_url)
+    if client is None or client.is_closed:
+        client = create_http_client()
+        clients[base_url] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    """Closes the clients of the running event loop, must be awaited before the loop is shut down"""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    await asyncio.gather(
+        *[client.aclose() for client in clients.values()], return_exceptions=True
+    )
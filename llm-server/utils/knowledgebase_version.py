@@ -0,0 +1,25 @@
+from typing import Optional
+
+from utils.get_logger import SilentException
+from utils.llm_consts import redis_client
+
+KB_VERSION_KEY_FORMAT = "kb_version:{}"
+
+
+def get_knowledgebase_version(bot_id: str) -> Optional[int]:
+    """Returns the bot's knowledgebase version, or None if it can't be read"""
+    try:
+        version = redis_client.get(KB_VERSION_KEY_FORMAT.format(bot_id))
+    except Exception as e:
+        SilentException.capture_exception(e)
+        return None
+
+    return int(version) if version else 0
+
+
+def bump_knowledgebase_version(bot_id: str) -> None:
+    """Must be called whenever documents are added to or removed from the bot's knowledgebase"""
+    try:
+        redis_client.incr(KB_VERSION_KEY_FORMAT.format(bot_id))
+    except Exception as e:
+        SilentException.capture_exception(e)
@@ -1,9 +1,19 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 import csv
 from io import StringIO
 import json
 from copilot_exceptions.api_call_failed_exception import APICallFailedException
+from entities.action_entity import ActionCachePolicy
+from utils.action_response_cache import (
+    get_response_cache_key,
+    is_cacheable,
+    read_cached_response,
+    record_cache_event,
+    revalidate_cached_response,
+    store_cached_response,
+)
 from utils.get_logger import SilentException
+from utils.http_clients import get_http_client
 import httpx
 
 
@@ -36,6 +46,18 @@ def serialize_booleans(data: Any) -> Any:
         return data
 
 
+def parse_response(response: httpx.Response) -> Any:
+    if "text/csv" in response.headers["Content-Type"]:
+        return list(csv.DictReader(StringIO(response.text)))
+    elif "application/json" in response.headers["Content-Type"]:
+        return response.json()
+    else:
+        return {
+            "content_type": response.headers["Content-Type"],
+            "response_text": response.text,
+        }
+
+
 async def make_api_request(
     method: str,
     endpoint: str,
@@ -44,7 +66,19 @@ async def make_api_request(
     query_params: Dict[str, str],
     headers: Any,
     extra_params: Dict[str, str],
+    timeout: Optional[float] = None,
+    bot_id: Optional[str] = None,
+    operation_id: Optional[str] = None,
+    cache_policy: Optional[ActionCachePolicy] = None,
 ) -> dict[str, Any]:
+    """
+    Calls an action's endpoint through the pooled client of its host.
+
+    Args:
+        timeout: The action's timeout in seconds, defaults to HTTP_CLIENT_TIMEOUT.
+        cache_policy: The action's cache policy, GET responses are served from the cache while they are fresh and
+            revalidated with their ETag once they are stale. Requires the bot and operation ids.
+    """
     url = ""
     if not extra_params:
         extra_params = {}
@@ -54,40 +88,51 @@ async def make_api_request(
         endpoint = replace_url_placeholders(endpoint, path_params)
 
         url: str = endpoint
-        async with httpx.AsyncClient() as client:
-            headers["Content-Type"] = "application/json"
+        if method not in ("GET", "POST", "PUT", "PATCH", "DELETE"):
+            raise ValueError("Invalid request type. Use GET, POST, PUT, or DELETE.")
 
-            if headers:
-                client.headers.update(headers)
+        # the client is shared between bots, the headers only go with this request
+        request_headers = {**(headers or {}), "Content-Type": "application/json"}
 
-            if method == "GET":
-                response = await client.get(url, params=query_params, timeout=30)
-            elif method == "POST":
-                response = await client.post(
-                    url, json=body_schema, params=query_params, timeout=30
-                )
-            elif method == "PUT":
-                response = await client.put(
-                    url, json=body_schema, params=query_params, timeout=30
-                )
-            elif method == "PATCH":
-                response = await client.patch(
-                    url, json=body_schema, params=query_params, timeout=30
-                )
-            elif method == "DELETE":
-                response = await client.delete(url, params=query_params, timeout=30)
-            else:
-                raise ValueError("Invalid request type. Use GET, POST, PUT, or DELETE.")
+        cache_key = None
+        cached = None
+        if bot_id and operation_id and is_cacheable(method, cache_policy):
+            cache_key = get_response_cache_key(
+                bot_id, operation_id, url, query_params, request_headers, cache_policy
+            )
+            cached = read_cached_response(cache_key)
+
+        if cached is not None and cached.is_fresh():
+            record_cache_event(bot_id, operation_id, "hits")
+            response_data = cached.response
+        else:
+            if cached is not None and cached.etag:
+                request_headers["If-None-Match"] = cached.etag
 
-            if "text/csv" in response.headers["Content-Type"]:
-                response_data = list(csv.DictReader(StringIO(response.text)))
-            elif "application/json" in response.headers["Content-Type"]:
-                response_data = response.json()
+            client = get_http_client(url)
+            response = await client.request(
+                method,
+                url,
+                params=query_params,
+                json=body_schema if method in ("POST", "PUT", "PATCH") else None,
+                headers=request_headers,
+                timeout=timeout if timeout else httpx.USE_CLIENT_DEFAULT,
+            )
+
+            if cached is not None and response.status_code == 304:
+                revalidate_cached_response(
+                    cache_key, cached, cache_policy, response.headers
+                )
+                record_cache_event(bot_id, operation_id, "revalidations")
+                response_data = cached.response
             else:
-                response_data = {
-                    "content_type": response.headers["Content-Type"],
-                    "response_text": response.text,
-                }
+                response_data = parse_response(response)
+                if cache_key is not None:
+                    record_cache_event(bot_id, operation_id, "misses")
+                    if response.status_code == 200 and store_cached_response(
+                        cache_key, response_data, cache_policy, response.headers
+                    ):
+                        record_cache_event(bot_id, operation_id, "stores")
 
         return {
             "method": method,
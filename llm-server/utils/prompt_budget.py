@@ -0,0 +1,177 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import tiktoken
+from langchain.docstore.document import Document
+from langchain.schema import BaseMessage
+
+from utils.chat_models import CHAT_MODELS
+from utils.get_chat_model import model_name
+from utils.llm_consts import (
+    PROMPT_CONTEXT_SHARE,
+    PROMPT_CONTEXT_WINDOW,
+    PROMPT_MAX_INPUT_TOKENS,
+    PROMPT_RESERVED_OUTPUT_TOKENS,
+    TOKEN_COUNT_CACHE_SIZE,
+)
+
+# the key under which token counts are stored in message kwargs and vector payloads
+TOKEN_COUNT_KEY = "token_count"
+# the role and separators the chat format adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+CONTEXT_WINDOWS = {
+    CHAT_MODELS.gpt_3_5_turbo: 4096,
+    CHAT_MODELS.gpt_3_5_turbo_16k: 16384,
+    CHAT_MODELS.gpt_4_1106_preview: 128000,
+    CHAT_MODELS.gpt_4_32k: 32768,
+    "claude": 100000,
+    CHAT_MODELS.openchat: 8192,
+}
+
+# (text, token count)
+ContextChunk = Tuple[str, int]
+
+
+@lru_cache(maxsize=1)
+def get_encoding() -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        # non-openai models, the counts are an approximation
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@lru_cache(maxsize=TOKEN_COUNT_CACHE_SIZE)
+def count_tokens(text: str) -> int:
+    return len(get_encoding().encode(text, disallowed_special=()))
+
+
+def count_message_tokens(message: BaseMessage) -> int:
+    token_count = message.additional_kwargs.get(TOKEN_COUNT_KEY)
+    if not isinstance(token_count, int):
+        token_count = count_tokens(str(message.content))
+
+    return token_count + MESSAGE_OVERHEAD_TOKENS
+
+
+def count_messages_tokens(messages: Sequence[BaseMessage]) -> int:
+    return sum(count_message_tokens(message) for message in messages)
+
+
+def count_document_tokens(document: Document) -> int:
+    token_count = document.metadata.get(TOKEN_COUNT_KEY)
+    if isinstance(token_count, int):
+        return token_count
+
+    return count_tokens(document.page_content)
+
+
+def with_token_count(document: Document) -> Document:
+    """Stores the token count of the document in its metadata, so it is not counted again once retrieved"""
+    document.metadata[TOKEN_COUNT_KEY] = count_tokens(document.page_content)
+    return document
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    input_tokens: int
+    # the share of the tokens left after the fixed messages that goes to the retrieved context, the history gets
+    # the rest
+    context_share: float
+
+
+def get_prompt_budget(max_input_tokens: Optional[int] = None) -> PromptBudget:
+    context_window = PROMPT_CONTEXT_WINDOW or CONTEXT_WINDOWS.get(model_name, 4096)
+    input_tokens = min(
+        context_window - PROMPT_RESERVED_OUTPUT_TOKENS, PROMPT_MAX_INPUT_TOKENS
+    )
+    if max_input_tokens is not None:
+        input_tokens = min(input_tokens, max_input_tokens)
+
+    return PromptBudget(input_tokens=input_tokens, context_share=PROMPT_CONTEXT_SHARE)
+
+
+def trim_history(history: Sequence[BaseMessage], max_tokens: int) -> List[BaseMessage]:
+    """Keeps the most recent messages that fit in max_tokens"""
+    kept: List[BaseMessage] = []
+    for message in reversed(history):
+        max_tokens -= count_message_tokens(message)
+        if max_tokens < 0:
+            break
+        kept.append(message)
+
+    return kept[::-1]
+
+
+def select_chunks(chunks: Sequence[ContextChunk], max_tokens: int) -> List[str]:
+    """Keeps the chunks that fit in max_tokens, in their ranking order"""
+    selected: List[str] = []
+    for text, token_count in chunks:
+        if token_count <= max_tokens:
+            selected.append(text)
+            max_tokens -= token_count
+
+    return selected
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    tokens = get_encoding().encode(text, disallowed_special=())
+    return get_encoding().decode(tokens[: max(max_tokens, 0)]) + " [truncated]"
+
+
+def get_remaining_tokens(
+    messages: Sequence[BaseMessage], budget: Optional[PromptBudget] = None
+) -> int:
+    """The tokens left in the budget once the messages are sent"""
+    budget = budget or get_prompt_budget()
+    return max(budget.input_tokens - count_messages_tokens(messages), 0)
+
+
+def fit_text(
+    text: str, messages: Sequence[BaseMessage], budget: Optional[PromptBudget] = None
+) -> str:
+    """Truncates the text to what the other messages of the prompt leave of the budget"""
+    return truncate_to_tokens(
+        text, get_remaining_tokens(messages, budget) - MESSAGE_OVERHEAD_TOKENS
+    )
+
+
+def build_prompt(
+    system: Sequence[BaseMessage],
+    tail: Sequence[BaseMessage],
+    history: Sequence[BaseMessage] = (),
+    context: Sequence[ContextChunk] = (),
+    render_context: Optional[Callable[[List[str]], BaseMessage]] = None,
+    budget: Optional[PromptBudget] = None,
+    max_history_tokens: Optional[int] = None,
+) -> List[BaseMessage]:
+    """
+    Assembles system + history + context + tail within the model's input budget. The system and tail messages (the
+    instructions and the user message) are always kept, the retrieved context gets its share of what is left and the
+    history gets the rest, dropping the oldest messages first.
+
+    Args:
+        context: The retrieved chunks with their token counts, best ranked first.
+        render_context: Wraps the selected chunks into the message that carries them.
+        max_history_tokens: Caps the history for calls that only need the last few exchanges.
+    """
+    budget = budget or get_prompt_budget()
+    remaining = get_remaining_tokens([*system, *tail], budget)
+
+    context_messages: List[BaseMessage] = []
+    if context and render_context is not None:
+        context_tokens = int(remaining * budget.context_share) if history else remaining
+        selected = select_chunks(context, context_tokens)
+        if selected:
+            context_messages.append(render_context(selected))
+            remaining = max(remaining - count_messages_tokens(context_messages), 0)
+
+    if max_history_tokens is not None:
+        remaining = min(remaining, max_history_tokens)
+
+    return [*system, *trim_history(history, remaining), *context_messages, *tail]
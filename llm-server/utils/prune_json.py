@@ -0,0 +1,157 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+from entities.action_entity import ResponsePruning
+from utils.llm_consts import (
+    ENABLE_RESPONSE_PRUNING,
+    RESPONSE_PRUNING_MAX_ARRAY_ITEMS,
+    RESPONSE_PRUNING_MAX_STRING_LENGTH,
+    RESPONSE_PRUNING_MAX_TOKENS,
+)
+from utils.prompt_budget import count_tokens
+
+# links to other resources, images and api templates, "url" itself is usually the resource's own link and kept
+URL_FIELD_PATTERN = re.compile(r"(^|_)(url|uri|href|links?)$")
+STYLING_FIELD_PATTERN = re.compile(
+    r"(^|_)(colou?r|style|styles|css|class|class_name|font|icon|theme)$"
+)
+URL_PATTERN = re.compile(r"^https?://\S+$")
+# the limits are halved on every pass until the response fits in its budget
+MAX_PASSES = 4
+MIN_ARRAY_ITEMS = 1
+MIN_STRING_LENGTH = 50
+# the number of elided paths kept in the report
+MAX_REPORTED_PATHS = 20
+
+
+@dataclass
+class PruningReport:
+    dropped_fields: int = 0
+    elided_items: int = 0
+    truncated_strings: int = 0
+    # where items were elided or strings truncated
+    paths: List[str] = field(default_factory=list)
+    passes: int = 0
+    tokens: int = 0
+
+    def record_path(self, path: str) -> None:
+        if len(self.paths) < MAX_REPORTED_PATHS and path not in self.paths:
+            self.paths.append(path)
+
+
+def normalize_field_name(name: str) -> str:
+    # camelCase to snake_case, so both spellings match the patterns
+    return re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", name).lower()
+
+
+def is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def is_url_heavy(value: Any) -> bool:
+    if isinstance(value, str):
+        return bool(URL_PATTERN.match(value))
+    return isinstance(value, (dict, list))
+
+
+def should_drop(name: str, value: Any, pruning: ResponsePruning) -> bool:
+    if name in pruning.keep_fields:
+        return False
+    if name in pruning.drop_fields or is_empty(value):
+        return True
+
+    normalized = normalize_field_name(name)
+    if STYLING_FIELD_PATTERN.search(normalized):
+        return True
+    return (
+        normalized != "url"
+        and URL_FIELD_PATTERN.search(normalized) is not None
+        and is_url_heavy(value)
+    )
+
+
+class JsonPruner:
+    def __init__(
+        self,
+        pruning: ResponsePruning,
+        max_array_items: int,
+        max_string_length: int,
+        report: PruningReport,
+    ):
+        self.pruning = pruning
+        self.max_array_items = max_array_items
+        self.max_string_length = max_string_length
+        self.report = report
+
+    def prune(self, value: Any, path: str = "$") -> Any:
+        if isinstance(value, dict):
+            pruned = {}
+            for name, item in value.items():
+                if not should_drop(str(name), item, self.pruning):
+                    item = self.prune(item, f"{path}.{name}")
+                    # objects and arrays left empty once pruned are dropped as well
+                    if not is_empty(item) or name in self.pruning.keep_fields:
+                        pruned[name] = item
+                        continue
+                self.report.dropped_fields += 1
+            return pruned
+
+        if isinstance(value, list):
+            items = [
+                self.prune(item, f"{path}[]") for item in value[: self.max_array_items]
+            ]
+            elided = len(value) - len(items)
+            if elided > 0:
+                items.append(f"... {elided} more items")
+                self.report.elided_items += elided
+                self.report.record_path(path)
+            return items
+
+        if isinstance(value, str) and len(value) > self.max_string_length:
+            self.report.truncated_strings += 1
+            self.report.record_path(path)
+            return (
+                value[: self.max_string_length]
+                + f"... [{len(value) - self.max_string_length} more characters]"
+            )
+
+        return value
+
+
+def prune_response(
+    response: Any, pruning: Optional[ResponsePruning] = None
+) -> Tuple[Any, Optional[PruningReport]]:
+    """
+    Deterministically reduces an api response before it is summarized: drops empty, styling and url-heavy fields,
+    keeps the first items of long arrays and truncates long strings, tightening the limits until the response fits
+    in its token budget. What was elided is marked in place and counted in the report.
+
+    Returns:
+        The pruned response and the report, or the response untouched and None if pruning is disabled.
+    """
+    pruning = pruning or ResponsePruning()
+    if not ENABLE_RESPONSE_PRUNING or not pruning.enabled:
+        return response, None
+
+    max_array_items = pruning.max_array_items or RESPONSE_PRUNING_MAX_ARRAY_ITEMS
+    max_string_length = pruning.max_string_length or RESPONSE_PRUNING_MAX_STRING_LENGTH
+    max_tokens = pruning.max_tokens or RESPONSE_PRUNING_MAX_TOKENS
+
+    for passes in range(1, MAX_PASSES + 1):
+        report = PruningReport(passes=passes)
+        pruned = JsonPruner(pruning, max_array_items, max_string_length, report).prune(
+            response
+        )
+        report.tokens = count_tokens(
+            json.dumps(pruned, separators=(",", ":"), default=str)
+        )
+        if report.tokens <= max_tokens:
+            break
+
+        max_array_items = max(max_array_items // 2, MIN_ARRAY_ITEMS)
+        max_string_length = max(max_string_length // 2, MIN_STRING_LENGTH)
+
+    # anything still over the budget is truncated with the rest of the prompt
+    return pruned, report
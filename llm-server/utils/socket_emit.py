@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+import flask
+import flask_socketio
+
+# sends an event to the client of the chat being handled
+Emitter = Callable[[str, Any], None]
+
+_emitter: ContextVar[Optional[Emitter]] = ContextVar("socket_emitter", default=None)
+
+
+@contextmanager
+def use_emitter(emitter: Emitter) -> Iterator[None]:
+    """Routes the emits of the current context, used by the Socket.IO servers that are not Flask-SocketIO's"""
+    token = _emitter.set(emitter)
+    try:
+        yield
+    finally:
+        _emitter.reset(token)
+
+
+def emit(event: str, data: Any) -> None:
+    """
+    Emits an event to the client of the chat being handled. Outside of a Socket.IO event (e.g. the /send endpoint)
+    there is no client to emit to and nothing is sent.
+    """
+    emitter = _emitter.get()
+    if emitter is not None:
+        emitter(event, data)
+    elif flask.has_request_context() and hasattr(flask.request, "sid"):
+        flask_socketio.emit(event, data)
@@ -237,6 +237,11 @@ class SwaggerParser:
                     "request_body": method_data.get("requestBody", {}),
                     "parameters": method_data.get("parameters", []),
                 }
+                # per operation settings, as openapi extensions (the timeout is in seconds)
+                if "x-timeout" in method_data:
+                    payload["timeout"] = method_data["x-timeout"]
+                if "x-response-pruning" in method_data:
+                    payload["response_pruning"] = method_data["x-response-pruning"]
 
                 # Process the payload to resolve any $ref references
                 processed_payload = self.process_payload(payload)
@@ -54,4 +54,5 @@ def init_qdrant_collections():
     try_create_collection(VectorCollections.actions, vector_params)
     try_create_collection(VectorCollections.flows, vector_params)
     try_create_collection(VectorCollections.flows, vector_params)
+    try_create_collection(VectorCollections.answer_cache, vector_params)
     try_create_neural_search_collection(VectorCollections.neural_search, vector_params)
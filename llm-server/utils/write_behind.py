@@ -0,0 +1,251 @@
+import datetime
+import json
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Union
+
+from redis.exceptions import LockError
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from shared.models.opencopilot_db import ChatHistory, engine
+from shared.models.opencopilot_db.action import ActionCall
+from utils.get_logger import SilentException
+from utils.llm_consts import (
+    ENABLE_WRITE_BEHIND,
+    WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_FLUSH_INTERVAL_MS,
+    WRITE_BEHIND_MAX_ATTEMPTS,
+    WRITE_BEHIND_MESSAGE_ID_TTL,
+    redis_client,
+)
+
+Session = sessionmaker(bind=engine)
+
+WRITE_BEHIND_QUEUE_KEY = "write_behind:queue"
+WRITE_BEHIND_FAILED_KEY = "write_behind:failed"
+WRITE_BEHIND_ATTEMPTS_KEY = "write_behind:attempts"
+WRITE_BEHIND_LOCK_KEY = "write_behind:lock"
+CHAT_MESSAGE_ID_KEY_FORMAT = "chat_message_id:{}"
+
+_flush_requested = threading.Event()
+_flusher: Optional[threading.Thread] = None
+_flusher_lock = threading.Lock()
+
+
+def utcnow_isoformat() -> str:
+    return datetime.datetime.utcnow().isoformat()
+
+
+def write_records(records: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Writes a batch of queued records in a single transaction.
+
+    Returns:
+        The ids of the written chat histories by their vote message ids.
+    """
+    histories: List[tuple] = []
+    action_calls: List[Dict[str, Any]] = []
+
+    with Session() as session:
+        for record in records:
+            kind = record["kind"]
+            if kind == "chat_history":
+                history = ChatHistory(
+                    chatbot_id=record["chatbot_id"],
+                    session_id=record["session_id"],
+                    from_user=record["from_user"],
+                    message=record["message"],
+                    debug_json=record.get("debug_json"),
+                    api_called=record.get("api_called"),
+                    knowledgebase_called=record.get("knowledgebase_called"),
+                    created_at=datetime.datetime.fromisoformat(record["created_at"]),
+                )
+                session.add(history)
+                histories.append((record["key"], history))
+            elif kind == "action_call":
+                action_calls.append(
+                    {
+                        "id": record["id"],
+                        "operation_id": record["operation_id"],
+                        "session_id": record["session_id"],
+                        "chatbot_id": record["chatbot_id"],
+                        "timestamp": datetime.datetime.fromisoformat(
+                            record["timestamp"]
+                        ),
+                    }
+                )
+
+        if action_calls:
+            # the ids are generated when queueing, a batch written twice doesn't duplicate the calls
+            session.execute(insert(ActionCall).prefix_with("IGNORE"), action_calls)
+
+        session.flush()
+        message_ids = {key: history.id for key, history in histories}
+        session.commit()
+
+    try:
+        pipeline = redis_client.pipeline()
+        for key, message_id in message_ids.items():
+            pipeline.setex(
+                CHAT_MESSAGE_ID_KEY_FORMAT.format(key),
+                WRITE_BEHIND_MESSAGE_ID_TTL,
+                message_id,
+            )
+        pipeline.execute()
+    except Exception as e:
+        # the records are committed, failing here would write them again
+        SilentException.capture_exception(e)
+
+    return message_ids
+
+
+def enqueue(records: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Queues the records for the flusher, or writes them right away when write-behind is disabled.
+
+    Returns:
+        The ids of the chat histories written right away, by their vote message ids.
+    """
+    if not ENABLE_WRITE_BEHIND:
+        return write_records(records)
+
+    try:
+        length = redis_client.rpush(
+            WRITE_BEHIND_QUEUE_KEY,
+            *[json.dumps(record, default=str) for record in records],
+        )
+    except Exception as e:
+        # the bookkeeping must not be lost because redis is unreachable
+        SilentException.capture_exception(e)
+        return write_records(records)
+
+    ensure_flusher()
+    if length >= WRITE_BEHIND_BATCH_SIZE:
+        _flush_requested.set()
+    return {}
+
+
+def record_chat_histories(
+    chatbot_id: str, chat_records: List[Dict[str, Union[str, bool]]]
+) -> List[str]:
+    """
+    Queues the chat history records of a turn.
+
+    Returns:
+        The ids to vote on the messages with. They are resolved to the chat history ids with resolve_chat_message_id,
+        since the rows may not be written yet.
+    """
+    created_at = utcnow_isoformat()
+    records = [
+        {
+            "kind": "chat_history",
+            "key": uuid.uuid4().hex,
+            "chatbot_id": chatbot_id,
+            "created_at": created_at,
+            **record,
+        }
+        for record in chat_records
+    ]
+    written = enqueue(records)
+    return [str(written.get(record["key"], record["key"])) for record in records]
+
+
+def record_action_call(operation_id: str, session_id: str, bot_id: str) -> None:
+    enqueue(
+        [
+            {
+                "kind": "action_call",
+                "id": str(uuid.uuid4()),
+                "operation_id": operation_id,
+                "session_id": session_id,
+                "chatbot_id": bot_id,
+                "timestamp": utcnow_isoformat(),
+            }
+        ]
+    )
+
+
+def flush_write_behind_queue(blocking_timeout: float = 0) -> int:
+    """
+    Writes the oldest batch of queued records. Records are only removed from the queue once they are committed, a
+    batch that keeps failing is moved to the failed queue after WRITE_BEHIND_MAX_ATTEMPTS attempts.
+
+    Args:
+        blocking_timeout: How long to wait for a flush running in another process.
+
+    Returns:
+        The number of flushed records.
+    """
+    lock = redis_client.lock(
+        WRITE_BEHIND_LOCK_KEY, timeout=60, blocking_timeout=blocking_timeout
+    )
+    if not lock.acquire():
+        return 0
+
+    try:
+        batch = redis_client.lrange(
+            WRITE_BEHIND_QUEUE_KEY, 0, WRITE_BEHIND_BATCH_SIZE - 1
+        )
+        if not batch:
+            return 0
+
+        try:
+            write_records([json.loads(record) for record in batch])
+        except Exception as e:
+            SilentException.capture_exception(e)
+            if redis_client.incr(WRITE_BEHIND_ATTEMPTS_KEY) < WRITE_BEHIND_MAX_ATTEMPTS:
+                return 0
+            redis_client.rpush(WRITE_BEHIND_FAILED_KEY, *batch)
+
+        pipeline = redis_client.pipeline()
+        pipeline.ltrim(WRITE_BEHIND_QUEUE_KEY, len(batch), -1)
+        pipeline.delete(WRITE_BEHIND_ATTEMPTS_KEY)
+        pipeline.execute()
+        return len(batch)
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            # the lock expired while writing, another process may have flushed the same batch
+            pass
+
+
+def resolve_chat_message_id(message_id: str) -> str:
+    """Resolves a vote message id returned by record_chat_histories to the chat history id"""
+    if message_id.isdigit():
+        return message_id
+
+    key = CHAT_MESSAGE_ID_KEY_FORMAT.format(message_id)
+    resolved = redis_client.get(key)
+    if resolved is None:
+        # the message may still be queued, write it now rather than voting on an id that won't resolve later
+        flush_write_behind_queue(blocking_timeout=5)
+        resolved = redis_client.get(key)
+
+    return str(resolved) if resolved is not None else message_id
+
+
+def run_flusher() -> None:
+    while True:
+        _flush_requested.wait(WRITE_BEHIND_FLUSH_INTERVAL_MS / 1000)
+        _flush_requested.clear()
+        try:
+            # keep flushing while full batches are waiting
+            while flush_write_behind_queue() >= WRITE_BEHIND_BATCH_SIZE:
+                pass
+        except Exception as e:
+            SilentException.capture_exception(e)
+
+
+def ensure_flusher() -> None:
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(
+                target=run_flusher, name="write-behind-flusher", daemon=True
+            )
+            _flusher.start()
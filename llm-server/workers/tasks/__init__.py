@@ -2,3 +2,6 @@ from workers.tasks.process_pdfs import process_pdf
 from workers.tasks.process_markdown import process_markdown
 from workers.tasks.web_crawl import web_crawl
 from workers.tasks.convert_swagger_to_actions import index_actions
+from workers.tasks.train_intent_classifiers import train_intent_classifiers
+from workers.tasks.rollup_analytics import rollup_analytics_counters
+from workers.tasks.process_chat import process_chat
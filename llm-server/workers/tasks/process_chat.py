@@ -0,0 +1,32 @@
+from celery import shared_task
+from flask import Flask
+
+from routes.chat.chat_dto import ChatInput
+from routes.chat.socket_chat import get_queue_emitter, run_socket_chat
+from utils.chat_dispatcher import dispatch_chat
+from utils.config import Config
+from utils.event_loop import run_coroutine
+
+# the chat handlers only need an app context, the routes are served by the llm-server
+flask_app = Flask(__name__)
+flask_app.config.from_object(Config)
+
+
+async def process_chat_in_order(
+    sid: str, user_message: ChatInput, telemetry_data: dict
+) -> None:
+    emitter = get_queue_emitter(sid)
+    await dispatch_chat(
+        user_message.session_id,
+        lambda: run_socket_chat(flask_app, user_message, emitter, telemetry_data),
+    )
+
+
+@shared_task
+def process_chat(sid: str, json_data: dict, telemetry_data: dict):
+    """
+    Processes a Socket.IO chat received by one of the servers, its events are emitted to the client through the
+    message queue. Run the worker with a thread pool (--pool threads) to process several chats per process, they
+    share the process' event loop.
+    """
+    run_coroutine(process_chat_in_order(sid, ChatInput(**json_data), telemetry_data))
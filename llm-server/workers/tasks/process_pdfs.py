@@ -16,6 +16,8 @@ from shared.utils.opencopilot_utils import (
 )
 from workers.utils.remove_escape_sequences import remove_escape_sequences
 from workers.tasks.bot_utils import determine_file_storage_path, download_s3_file
+from utils.knowledgebase_version import bump_knowledgebase_version
+from utils.prompt_budget import with_token_count
 
 embeddings = get_embeddings()
 kb_vector_store = get_vector_store(StoreOptions("knowledgebase"))
@@ -54,8 +56,10 @@ def process_pdf(file_name: str, bot_id: str):
         for doc in docs:
             doc.metadata["bot_id"] = bot_id
             doc.metadata["link"] = file_path
+            with_token_count(doc)
 
         kb_vector_store.add_documents(docs)
+        bump_knowledgebase_version(bot_id)
         update_pdf_data_source_status(
             chatbot_id=bot_id, file_name=file_path, status="COMPLETED"
         )
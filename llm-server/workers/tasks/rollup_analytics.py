@@ -0,0 +1,14 @@
+import logging
+
+from celery import shared_task
+
+from routes.analytics.analytics_service import rollup_analytics
+
+
+@shared_task
+def rollup_analytics_counters():
+    """
+    Writes the analytics counters accumulated in redis to mysql, runs periodically through celery beat.
+    """
+    rolled_up = rollup_analytics()
+    logging.info("Rolled up the analytics of %s bots", rolled_up)
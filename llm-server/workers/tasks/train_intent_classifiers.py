@@ -0,0 +1,29 @@
+from celery import shared_task
+
+from models.repository.copilot_repo import list_all_with_filter
+from routes.chat.intent_classifier import train_intent_classifier
+from shared.models.opencopilot_db.chatbot import Chatbot
+from utils.get_logger import SilentException
+from utils.llm_consts import INTENT_CLASSIFIER_BOT_IDS
+
+
+@shared_task
+def train_intent_classifiers():
+    """
+    Retrains the intent classifier of every bot that has it enabled, runs periodically through celery beat.
+    """
+    if "*" in INTENT_CLASSIFIER_BOT_IDS:
+        bot_ids = [str(bot.id) for bot in list_all_with_filter()]
+    else:
+        bot_ids = list(INTENT_CLASSIFIER_BOT_IDS)
+
+    for bot_id in bot_ids:
+        train_bot_intent_classifier(bot_id)
+
+
+@shared_task
+def train_bot_intent_classifier(bot_id: str):
+    try:
+        train_intent_classifier(bot_id)
+    except Exception as e:
+        SilentException.capture_exception(e)